@@ -9,6 +9,7 @@ class USVConnection {
     constructor() {
         this.ws = null;
         this.connected = false;
+        this.useMsgPack = false;  // set on open from the negotiated subprotocol
         this.latency = 0;
         this.reconnectInterval = 2000;
         this.hostname = '';
@@ -40,11 +41,13 @@ class USVConnection {
         const url = `${protocol}//${window.location.host}/ws`;
 
         console.log('[USV] Connecting to', url);
-        this.ws = new WebSocket(url);
+        // Offer MessagePack first; the server picks usv.json when it lacks msgpack
+        this.ws = new WebSocket(url, ['usv.msgpack', 'usv.json']);
 
         this.ws.onopen = () => {
             console.log('[USV] Connected');
             this.connected = true;
+            this.useMsgPack = this.ws.protocol === 'usv.msgpack';
             this._bytesReceived = 0;
             this._lastBwTime = performance.now();
             this.bandwidth = 0;
@@ -92,6 +95,18 @@ class USVConnection {
         const view = new Uint8Array(buffer);
         if (view.length < 2) return;
         const topicNameLen = view[0];
+        if (topicNameLen === 0) {
+            // Zero-length topic marks a MessagePack-encoded [type, payload] message
+            let argv;
+            try {
+                argv = MsgPack.decode(view.subarray(1));
+            } catch (e) {
+                console.error('[USV] Bad MessagePack frame:', e);
+                return;
+            }
+            this._dispatch(argv);
+            return;
+        }
         if (view.length < 1 + topicNameLen) return;
         const topicName = new TextDecoder().decode(view.slice(1, 1 + topicNameLen));
         const h264Data = view.slice(1 + topicNameLen);
@@ -109,12 +124,20 @@ class USVConnection {
             return;
         }
 
+        this._dispatch(argv);
+    }
+
+    _dispatch(argv) {
         if (!Array.isArray(argv) || argv.length < 2) return;
 
         const msgType = argv[0];
         const data = argv[1];
 
         switch (msgType) {
+            case 'b': // BATCH -> dispatch each coalesced message in order
+                for (const item of data) this._dispatch(item);
+                break;
+
             case 'y': // SYSTEM
                 this.hostname = data.hostname || '';
                 this.version = data.version || '';
@@ -173,7 +196,14 @@ class USVConnection {
     }
 
     sendJoy(axes, buttons) {
-        this._send(['j', { axes: axes, buttons: buttons }]);
+        // Highest-rate input: sent as a binary MessagePack frame when the
+        // server negotiated it
+        const msg = ['j', { axes: axes, buttons: buttons }];
+        if (this.useMsgPack) {
+            this._sendBinary(MsgPack.encode(msg));
+        } else {
+            this._send(msg);
+        }
     }
 
     subscribeCamera(cameraId) {
@@ -199,4 +229,10 @@ class USVConnection {
             this.ws.send(JSON.stringify(data));
         }
     }
+
+    _sendBinary(bytes) {
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) {
+            this.ws.send(bytes);
+        }
+    }
 }
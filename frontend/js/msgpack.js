@@ -0,0 +1,187 @@
+/**
+ * Minimal MessagePack codec
+ *
+ * decode() handles what the server's msgpack.packb(..., use_bin_type=True)
+ * produces: nil, bool, int, float, str, bin, array, map. Ext types
+ * 0x10-0x17 are numeric arrays (raw little-endian bytes) and decode to
+ * typed arrays; other ext types are returned as {type, data}.
+ *
+ * encode() covers the values the client sends: null, bool, number, string,
+ * array and plain object. Non-integer numbers are written as float64.
+ */
+
+const MsgPack = (() => {
+    const textDecoder = new TextDecoder();
+    const textEncoder = new TextEncoder();
+
+    // Ext type code -> typed array constructor (see _TYPED_ARRAY_EXT in
+    // server/handlers.py)
+    const TYPED_ARRAYS = {
+        0x10: Int8Array, 0x11: Uint8Array,
+        0x12: Int16Array, 0x13: Uint16Array,
+        0x14: Int32Array, 0x15: Uint32Array,
+        0x16: Float32Array, 0x17: Float64Array,
+    };
+
+    function typedArray(Ctor, data) {
+        const size = Ctor.BYTES_PER_ELEMENT;
+        // Views need an aligned offset; copy the bytes out when they aren't
+        if (data.byteOffset % size === 0) {
+            return new Ctor(data.buffer, data.byteOffset, data.byteLength / size);
+        }
+        return new Ctor(data.slice().buffer);
+    }
+
+    function decode(bytes) {
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let pos = 0;
+
+        function str(len) {
+            const s = textDecoder.decode(bytes.subarray(pos, pos + len));
+            pos += len;
+            return s;
+        }
+
+        function bin(len) {
+            const b = bytes.subarray(pos, pos + len);
+            pos += len;
+            return b;
+        }
+
+        function array(len) {
+            const out = new Array(len);
+            for (let i = 0; i < len; i++) out[i] = read();
+            return out;
+        }
+
+        function map(len) {
+            const out = {};
+            for (let i = 0; i < len; i++) {
+                const key = read();
+                out[key] = read();
+            }
+            return out;
+        }
+
+        function ext(len) {
+            const type = view.getInt8(pos);
+            pos += 1;
+            const data = bin(len);
+            const Ctor = TYPED_ARRAYS[type];
+            return Ctor ? typedArray(Ctor, data) : { type: type, data: data };
+        }
+
+        function read() {
+            const b = bytes[pos++];
+            if (b <= 0x7f) return b;                      // positive fixint
+            if (b <= 0x8f) return map(b & 0x0f);          // fixmap
+            if (b <= 0x9f) return array(b & 0x0f);        // fixarray
+            if (b <= 0xbf) return str(b & 0x1f);          // fixstr
+            if (b >= 0xe0) return b - 0x100;              // negative fixint
+
+            let v;
+            switch (b) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: v = bytes[pos]; pos += 1; return bin(v);
+                case 0xc5: v = view.getUint16(pos); pos += 2; return bin(v);
+                case 0xc6: v = view.getUint32(pos); pos += 4; return bin(v);
+                case 0xc7: v = bytes[pos]; pos += 1; return ext(v);
+                case 0xc8: v = view.getUint16(pos); pos += 2; return ext(v);
+                case 0xc9: v = view.getUint32(pos); pos += 4; return ext(v);
+                case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+                case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+                case 0xcc: v = bytes[pos]; pos += 1; return v;
+                case 0xcd: v = view.getUint16(pos); pos += 2; return v;
+                case 0xce: v = view.getUint32(pos); pos += 4; return v;
+                case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+                case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+                case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+                case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+                case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+                case 0xd4: return ext(1);
+                case 0xd5: return ext(2);
+                case 0xd6: return ext(4);
+                case 0xd7: return ext(8);
+                case 0xd8: return ext(16);
+                case 0xd9: v = bytes[pos]; pos += 1; return str(v);
+                case 0xda: v = view.getUint16(pos); pos += 2; return str(v);
+                case 0xdb: v = view.getUint32(pos); pos += 4; return str(v);
+                case 0xdc: v = view.getUint16(pos); pos += 2; return array(v);
+                case 0xdd: v = view.getUint32(pos); pos += 4; return array(v);
+                case 0xde: v = view.getUint16(pos); pos += 2; return map(v);
+                case 0xdf: v = view.getUint32(pos); pos += 4; return map(v);
+            }
+            throw new Error('msgpack: unknown type byte 0x' + b.toString(16));
+        }
+
+        return read();
+    }
+
+    function encode(value) {
+        let buf = new Uint8Array(256);
+        let view = new DataView(buf.buffer);
+        let pos = 0;
+
+        function reserve(n) {
+            if (pos + n <= buf.length) return;
+            let size = buf.length * 2;
+            while (size < pos + n) size *= 2;
+            const grown = new Uint8Array(size);
+            grown.set(buf.subarray(0, pos));
+            buf = grown;
+            view = new DataView(buf.buffer);
+        }
+
+        function header(len, fix, fixMax, b8, b16, b32) {
+            reserve(5);
+            if (len <= fixMax) { buf[pos++] = fix | len; }
+            else if (b8 !== null && len <= 0xff) { buf[pos++] = b8; buf[pos++] = len; }
+            else if (len <= 0xffff) { buf[pos++] = b16; view.setUint16(pos, len); pos += 2; }
+            else { buf[pos++] = b32; view.setUint32(pos, len); pos += 4; }
+        }
+
+        function write(v) {
+            if (v === null || v === undefined) { reserve(1); buf[pos++] = 0xc0; return; }
+            if (v === false) { reserve(1); buf[pos++] = 0xc2; return; }
+            if (v === true) { reserve(1); buf[pos++] = 0xc3; return; }
+            if (typeof v === 'number') {
+                reserve(9);
+                if (Number.isInteger(v) && v >= -0x80000000 && v <= 0xffffffff) {
+                    if (v >= 0 && v <= 0x7f) { buf[pos++] = v; }
+                    else if (v < 0 && v >= -32) { buf[pos++] = v & 0xff; }
+                    else if (v < 0) { buf[pos++] = 0xd2; view.setInt32(pos, v); pos += 4; }
+                    else { buf[pos++] = 0xce; view.setUint32(pos, v); pos += 4; }
+                } else {
+                    buf[pos++] = 0xcb; view.setFloat64(pos, v); pos += 8;
+                }
+                return;
+            }
+            if (typeof v === 'string') {
+                const bytes = textEncoder.encode(v);
+                header(bytes.length, 0xa0, 0x1f, 0xd9, 0xda, 0xdb);
+                reserve(bytes.length);
+                buf.set(bytes, pos);
+                pos += bytes.length;
+                return;
+            }
+            if (Array.isArray(v)) {
+                header(v.length, 0x90, 0x0f, null, 0xdc, 0xdd);
+                for (let i = 0; i < v.length; i++) write(v[i]);
+                return;
+            }
+            const keys = Object.keys(v);
+            header(keys.length, 0x80, 0x0f, null, 0xde, 0xdf);
+            for (let i = 0; i < keys.length; i++) {
+                write(keys[i]);
+                write(v[keys[i]]);
+            }
+        }
+
+        write(value);
+        return buf.subarray(0, pos);
+    }
+
+    return { decode, encode };
+})();
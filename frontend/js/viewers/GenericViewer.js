@@ -43,7 +43,7 @@ class GenericViewer extends Viewer {
             return;
         }
 
-        if (typeof obj !== 'object' || Array.isArray(obj)) {
+        if (typeof obj !== 'object' || Array.isArray(obj) || ArrayBuffer.isView(obj)) {
             // Leaf value — shouldn't normally be called at top level
             this._addRow(path, path.split('.').pop() || '', this._formatValue(obj), depth);
             return;
@@ -57,7 +57,7 @@ class GenericViewer extends Viewer {
             const val = obj[key];
             const childPath = path ? path + '.' + key : key;
 
-            if (val !== null && typeof val === 'object' && !Array.isArray(val)) {
+            if (val !== null && typeof val === 'object' && !Array.isArray(val) && !ArrayBuffer.isView(val)) {
                 // Nested object — collapsible header row
                 const isCollapsed = this._collapsed[childPath] || false;
                 this._addGroupRow(childPath, key, isCollapsed, depth);
@@ -129,18 +129,19 @@ class GenericViewer extends Viewer {
         if (typeof val === 'string') {
             return '<span class="viewer-string">"' + this._escapeHtml(val) + '"</span>';
         }
-        if (Array.isArray(val)) {
+        // Typed arrays are numeric arrays sent over MessagePack
+        if (Array.isArray(val) || ArrayBuffer.isView(val)) {
             if (val.length === 0) return '<span class="viewer-array">[]</span>';
             if (val.length <= 8) {
                 // Short array — show inline
-                const items = val.map(v => {
+                const items = Array.from(val, v => {
                     if (typeof v === 'number' && !Number.isInteger(v)) return v.toFixed(4);
                     return String(v);
                 });
                 return '<span class="viewer-array">[' + this._escapeHtml(items.join(', ')) + ']</span>';
             }
             // Long array — show length and first few
-            const preview = val.slice(0, 4).map(v => {
+            const preview = Array.from(val.slice(0, 4), v => {
                 if (typeof v === 'number' && !Number.isInteger(v)) return v.toFixed(4);
                 return String(v);
             });
@@ -8,18 +8,19 @@ stdout and sends H.264 chunks over the existing WebSocket binary protocol.
 
 Architecture:
   Camera device → GStreamer subprocess (capture + encode) → stdout
-  → Python _read_loop → [topic_header + H.264] → WebSocket broadcast
+  → shared selector I/O thread → [topic_header + H.264] → WebSocket broadcast
 """
 
 import glob
 import os
-import shlex
+from concurrent.futures import ThreadPoolExecutor, wait
 import shutil
 import subprocess
-import threading
-import time
 
 from .log import info as _log_info, warn as _log_warn, error as _log_error
+from .log import is_enabled_for, WARN
+from . import probe_cache
+from .pipe_io import IO_LOOP as _IO_LOOP
 
 
 def _log(msg):
@@ -37,6 +38,7 @@ def _log_e(msg):
 # ---------------------------------------------------------------------------
 
 _GST_LAUNCH = shutil.which("gst-launch-1.0")
+_GST_INSPECT = shutil.which("gst-inspect-1.0")
 
 
 def has_gstreamer():
@@ -57,14 +59,14 @@ def _probe_gst_encoder(encoder_element, extra_props="", timeout=5):
         return False
 
     pipeline = (
-        "videotestsrc num-buffers=1 ! "
-        "video/x-raw,width=256,height=256,framerate=1/1 ! "
-        "videoconvert ! "
-        "%s %s ! "
-        "fakesink" % (encoder_element, extra_props)
+        ["videotestsrc", "num-buffers=1", "!",
+         "video/x-raw,width=256,height=256,framerate=1/1", "!",
+         "videoconvert", "!", encoder_element]
+        + extra_props.split()
+        + ["!", "fakesink"]
     )
 
-    cmd = [_GST_LAUNCH, "-q"] + shlex.split(pipeline)
+    cmd = [_GST_LAUNCH, "-q"] + pipeline
     try:
         result = subprocess.run(
             cmd,
@@ -88,6 +90,26 @@ def _probe_gst_encoder(encoder_element, extra_props="", timeout=5):
         return False
 
 
+def _gst_element_exists(element, timeout=1):
+    """
+    Cheap plugin-registry check for a GStreamer element. Returns True when
+    gst-inspect-1.0 is unavailable so the caller falls back to a live probe.
+    """
+    if not _GST_INSPECT:
+        return True
+    try:
+        result = subprocess.run(
+            [_GST_INSPECT, "--exists", element],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+        return result.returncode == 0
+    except Exception:
+        return True
+
+
 def _detect_gst_encoder():
     """
     Probe available GStreamer H.264 encoders at module load time.
@@ -98,15 +120,34 @@ def _detect_gst_encoder():
         return None
 
     encoders = [
-        ("nvh264enc",       "preset=low-latency-hq"),
+        ("nvh264enc",       "preset=low-latency rc-mode=cbr-ld-hq zerolatency=true"),
         ("nvv4l2h264enc",   ""),
         ("vaapih264enc",    ""),
         ("qsvh264enc",      ""),
         ("x264enc",         "tune=zerolatency speed-preset=ultrafast"),
     ]
 
-    for element, props in encoders:
-        if _probe_gst_encoder(element, props):
+    # Registry lookups are cheap and run concurrently; only elements that
+    # are actually installed get a live pipeline probe. This avoids GPU
+    # context creation for encoders that aren't there.
+    with ThreadPoolExecutor(max_workers=len(encoders)) as executor:
+        present = list(executor.map(_gst_element_exists, [e for e, _ in encoders]))
+    installed = [enc for enc, exists in zip(encoders, present) if exists]
+    if not installed:
+        _log_e("No working GStreamer H.264 encoder found")
+        return None
+
+    # Probe the installed candidates concurrently; import time is bounded
+    # by the slowest single probe rather than the sum of all of them.
+    # The first working one in priority order wins.
+    executor = ThreadPoolExecutor(max_workers=len(installed))
+    futures = [executor.submit(_probe_gst_encoder, element, props)
+               for element, props in installed]
+    wait(futures, timeout=6)
+    executor.shutdown(wait=False)
+
+    for (element, _), future in zip(installed, futures):
+        if future.done() and future.result():
             _log("Encoder probe: %s is available" % element)
             return element
 
@@ -115,7 +156,15 @@ def _detect_gst_encoder():
 
 
 # Detect once at import time
-_BEST_GST_ENCODER = _detect_gst_encoder() if _GST_LAUNCH else None
+# (cached on disk by GStreamer version, installed elements and hardware;
+# see probe_cache.py)
+_BEST_GST_ENCODER = (
+    probe_cache.cached_probe(
+        "gst_encoder", [_GST_LAUNCH, "--version"], _detect_gst_encoder,
+        plugins_cmd=[_GST_INSPECT] if _GST_INSPECT else None,
+    )
+    if _GST_LAUNCH else None
+)
 
 
 def get_gst_encoder():
@@ -127,31 +176,57 @@ def get_gst_encoder():
 # GStreamer pipeline builder
 # ---------------------------------------------------------------------------
 
-def _encoder_params(encoder, fps, quality="medium"):
+# No lookahead, no B-frames, slice threading: every frame leaves the
+# encoder as soon as it is encoded. intra-refresh is deliberately left off —
+# late-joining clients need real IDR frames to start decoding.
+_X264_LOW_LATENCY = (
+    "tune=zerolatency speed-preset=ultrafast bframes=0 b-adapt=false "
+    "rc-lookahead=0 sync-lookahead=0 mb-tree=false sliced-threads=true "
+    "byte-stream=true aud=true"
+)
+
+# Jetson: clock the encoder at max frequency, no picture reordering
+# (poc-type=2), SPS/PPS before every IDR, constant bitrate.
+_NVV4L2_LOW_LATENCY = "maxperf-enable=true poc-type=2 preset-level=1 insert-sps-pps=1 control-rate=1"
+
+
+# Encoder element + properties per detected encoder. Placeholders:
+#   {fps}     keyframe interval (one IDR per second)
+#   {qp}      constant QP for the quality level
+#   {kbps}    software bitrate for the quality level, kbit/s
+#   {hw_kbps} hardware (NVENC) bitrate — twice {kbps}
+#   {bps}     bitrate in bit/s
+_ENCODER_TEMPLATES = {
+    # CBR keeps frame sizes (and so WebSocket pacing) predictable
+    "nvh264enc": "nvh264enc preset=low-latency rc-mode=cbr-ld-hq bitrate={hw_kbps} gop-size={fps} "
+                 "zerolatency=true rc-lookahead=0 bframes=0",
+    "nvv4l2h264enc": "nvv4l2h264enc " + _NVV4L2_LOW_LATENCY + " iframeinterval={fps} bitrate={bps}",
+    "vaapih264enc": "vaapih264enc rate-control=cqp init-qp={qp} keyframe-period={fps}",
+    "qsvh264enc": "qsvh264enc target-usage=7 gop-size={fps}",
+    "x264enc": "x264enc " + _X264_LOW_LATENCY + " key-int-max={fps} bitrate={kbps} ! video/x-h264,profile=baseline",
+}
+
+# quality -> QP / software bitrate (kbit/s)
+_QUALITY_QP = {"low": 32, "medium": 23, "high": 15}
+_QUALITY_KBPS = {"low": 1000, "medium": 2000, "high": 4000}
+
+
+def _encoder_params(encoder, fps, quality="medium", bps=None):
     """Return encoder-specific GStreamer properties as a string."""
-    # quality -> QP/bitrate mapping
-    qp_map      = {"low": 32, "medium": 23, "high": 15}
-    bitrate_map = {"low": 1000, "medium": 2000, "high": 4000}  # kbps for x264enc
-    qp = qp_map.get(quality, 23)
-    bitrate = bitrate_map.get(quality, 2000)
-
-    if encoder == "nvh264enc":
-        return "nvh264enc preset=low-latency-hq rc-mode=constqp qp-const=%d gop-size=%d" % (qp, fps)
-    elif encoder == "nvv4l2h264enc":
-        return "nvv4l2h264enc preset-level=1 iframeinterval=%d bitrate=%d" % (fps, bitrate * 1000)
-    elif encoder == "vaapih264enc":
-        return "vaapih264enc rate-control=cqp init-qp=%d keyframe-period=%d" % (qp, fps)
-    elif encoder == "qsvh264enc":
-        return "qsvh264enc target-usage=7 gop-size=%d" % fps
-    elif encoder == "x264enc":
-        return "x264enc tune=zerolatency speed-preset=ultrafast key-int-max=%d bitrate=%d ! video/x-h264,profile=baseline" % (fps, bitrate)
-    else:
-        return "x264enc tune=zerolatency speed-preset=ultrafast key-int-max=%d ! video/x-h264,profile=baseline" % fps
+    kbps = _QUALITY_KBPS.get(quality, 2000)
+    template = _ENCODER_TEMPLATES.get(encoder, _ENCODER_TEMPLATES["x264enc"])
+    return template.format(
+        fps=fps,
+        qp=_QUALITY_QP.get(quality, 23),
+        kbps=kbps,
+        hw_kbps=kbps * 2,
+        bps=bps if bps is not None else kbps * 1000,
+    )
 
 
 def build_gst_pipeline(config, encoder):
     """
-    Build a gst-launch-1.0 pipeline string from a camera config dict.
+    Build a gst-launch-1.0 pipeline from a camera config dict.
 
     Args:
         config: dict with keys like source, device, url, width, height, fps,
@@ -159,7 +234,9 @@ def build_gst_pipeline(config, encoder):
         encoder: GStreamer encoder element name (e.g. 'x264enc', 'nvh264enc')
 
     Returns:
-        Pipeline string suitable for: gst-launch-1.0 -q -e <pipeline>
+        List of argv tokens for: gst-launch-1.0 -q -e <pipeline...>
+        User-supplied values (device paths, URLs) are single tokens, so
+        spaces or shell metacharacters in them need no quoting.
     """
     source = config.get("source", "test")
     w = config.get("width", 640)
@@ -171,55 +248,61 @@ def build_gst_pipeline(config, encoder):
     # --- Source segment ---
     if source == "v4l2":
         device = config.get("device", "/dev/video0")
-        src = "v4l2src device=%s ! video/x-raw,width=%d,height=%d,framerate=%d/1" % (device, w, h, fps)
+        src = ["v4l2src", "device=%s" % device, "!",
+               "video/x-raw,width=%d,height=%d,framerate=%d/1" % (w, h, fps)]
 
     elif source == "rtsp":
         url = config.get("url", "")
         if passthrough:
-            # RTSP passthrough: already H.264, skip encoding entirely
-            src = "rtspsrc location=%s latency=200 ! rtph264depay" % url
-            tail = "! h264parse config-interval=-1 ! video/x-h264,stream-format=byte-stream ! fdsink fd=1"
-            return "%s %s" % (src, tail)
+            # RTSP passthrough: already H.264, skip encoding entirely.
+            # SPS/PPS go before every IDR (config-interval=-1): the client
+            # backlog resync (_find_sps in handlers.py) resumes at an SPS
+            # and relies on a keyframe following it. Emit whole access units.
+            return ["rtspsrc", "location=%s" % url, "latency=200", "!",
+                    "rtph264depay", "!",
+                    "h264parse", "config-interval=-1", "!",
+                    "video/x-h264,stream-format=byte-stream,alignment=au", "!",
+                    "fdsink", "fd=1"]
         else:
             # RTSP re-encode: decode then re-encode
-            src = (
-                "rtspsrc location=%s latency=200 ! rtph264depay ! avdec_h264 ! "
-                "video/x-raw,width=%d,height=%d" % (url, w, h)
-            )
+            src = ["rtspsrc", "location=%s" % url, "latency=200", "!",
+                   "rtph264depay", "!", "avdec_h264", "!",
+                   "video/x-raw,width=%d,height=%d" % (w, h)]
 
     elif source == "libcamera":
-        src = "libcamerasrc ! video/x-raw,width=%d,height=%d,framerate=%d/1" % (w, h, fps)
+        src = ["libcamerasrc", "!",
+               "video/x-raw,width=%d,height=%d,framerate=%d/1" % (w, h, fps)]
 
     elif source == "nvargus":
         sensor_id = config.get("sensor_id", 0)
-        src = (
-            "nvarguscamerasrc sensor-id=%d ! "
-            "video/x-raw(memory:NVMM),width=%d,height=%d,framerate=%d/1" % (sensor_id, w, h, fps)
-        )
+        src = ["nvarguscamerasrc", "sensor-id=%d" % sensor_id, "!",
+               "video/x-raw(memory:NVMM),width=%d,height=%d,framerate=%d/1" % (w, h, fps)]
 
     else:  # test
         pattern = config.get("pattern", "ball")
-        src = "videotestsrc pattern=%s is-live=true ! video/x-raw,width=%d,height=%d,framerate=%d/1" % (
-            pattern, w, h, fps
-        )
+        src = ["videotestsrc", "pattern=%s" % pattern, "is-live=true", "!",
+               "video/x-raw,width=%d,height=%d,framerate=%d/1" % (w, h, fps)]
 
     # --- Encode + output segment ---
     # nvargus produces NVMM buffers — use nvv4l2h264enc directly, skip videoconvert
     if source == "nvargus":
-        enc = "nvv4l2h264enc preset-level=1 iframeinterval=%d bitrate=4000000" % fps
-        convert = ""
+        enc = _encoder_params("nvv4l2h264enc", fps, quality, bps=4000000)
+        convert = []
+    elif encoder == "nvv4l2h264enc":
+        # Jetson: let the VIC convert + upload into NVMM instead of a CPU
+        # videoconvert pass, so the encoder reads GPU-accessible memory
+        enc = _encoder_params(encoder, fps, quality)
+        convert = ["nvvidconv", "!", "video/x-raw(memory:NVMM),format=NV12", "!"]
     else:
         enc = _encoder_params(encoder, fps, quality)
-        convert = "videoconvert ! "
+        convert = ["videoconvert", "!"]
 
-    tail = (
-        "%s%s ! "
-        "h264parse config-interval=-1 ! "
-        "video/x-h264,stream-format=byte-stream ! "
-        "fdsink fd=1" % (convert, enc)
-    )
+    tail = ["!", "h264parse", "config-interval=-1", "!",
+            "video/x-h264,stream-format=byte-stream", "!",
+            "fdsink", "fd=1"]
 
-    return "%s ! %s" % (src, tail)
+    # Encoder params are built internally and never contain quoted values
+    return src + ["!"] + convert + enc.split() + tail
 
 
 # ---------------------------------------------------------------------------
@@ -232,20 +315,28 @@ class GStreamerStream:
     and outputs H.264 byte-stream to stdout.
 
     Simpler than H264Stream — no stdin writer thread. GStreamer handles
-    capture + encode internally. We just read stdout.
+    capture + encode internally. We just read stdout, from the shared
+    pipe I/O thread (pipe_io.py) rather than a thread of our own.
 
     Binary frame format (via on_data callback):
         [1 byte: topic name length N] [N bytes: camera_id UTF-8] [H.264 data]
+
+    Stdout reads are re-chunked to a constant size: data accumulates in a
+    buffer and goes out in `chunk_size`-byte frames (camera_config key).
+    A partial chunk is flushed once it is older than BATCH_DEADLINE seconds
+    so low-bitrate streams don't stall.
     """
 
+    DEFAULT_CHUNK_SIZE = 32 * 1024
+    BATCH_DEADLINE = 0.005  # seconds
+    READ_SIZE = 65536
+
     def __init__(self, camera_id, camera_config):
         self.camera_id = camera_id
         self.camera_config = camera_config
         self.on_data = None  # callback(binary_frame) — set by usv_node
 
         self._process = None
-        self._reader_thread = None
-        self._stderr_thread = None
         self._stopped = False
         self._chunks_sent = 0
         self._total_bytes = 0
@@ -256,6 +347,11 @@ class GStreamerStream:
             id_bytes = id_bytes[:255]
         self._topic_header = bytes([len(id_bytes)]) + id_bytes
 
+        self._chunk_size = self.DEFAULT_CHUNK_SIZE
+        self._alloc_buffer()
+        self._flush_scheduled = False
+        self._stderr_buf = b""
+
         self._start_gstreamer()
 
     def _start_gstreamer(self):
@@ -271,15 +367,22 @@ class GStreamerStream:
             self.camera_config,
             encoder or "x264enc",
         )
-        _log("Starting GStreamer for %s: gst-launch-1.0 %s" % (self.camera_id, pipeline))
+        _log("Starting GStreamer for %s: gst-launch-1.0 %s" % (self.camera_id, " ".join(pipeline)))
 
-        cmd = [_GST_LAUNCH, "-q", "-e"] + shlex.split(pipeline)
+        cmd = [_GST_LAUNCH, "-q", "-e"] + pipeline
         try:
+            # close_fds stays on: fds opened by C libraries without
+            # O_CLOEXEC (DDS sockets, shared memory from the RMW) would
+            # otherwise be held by the long-lived gst-launch child. With an
+            # absolute executable and no preexec_fn, CPython 3.13+ on glibc
+            # 2.34+ still uses posix_spawn instead of forking the whole ROS
+            # process. With warnings suppressed nobody reads stderr — let the
+            # kernel discard it instead of piping it through us.
             self._process = subprocess.Popen(
                 cmd,
                 stdin=subprocess.DEVNULL,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.PIPE if is_enabled_for(WARN) else subprocess.DEVNULL,
             )
         except FileNotFoundError:
             _log_e("gst-launch-1.0 not found")
@@ -293,59 +396,112 @@ class GStreamerStream:
         self._stopped = False
         self._chunks_sent = 0
         self._total_bytes = 0
+        self._chunk_size = max(1, int(self.camera_config.get("chunk_size", self.DEFAULT_CHUNK_SIZE)))
+        self._alloc_buffer()
+        self._stderr_buf = b""
 
         name = self.camera_config.get("name", self.camera_id)
         _log("Started for %s (%s)" % (self.camera_id, name))
 
-        self._reader_thread = threading.Thread(
-            target=self._read_loop, daemon=True
-        )
-        self._reader_thread.start()
-
-        self._stderr_thread = threading.Thread(
-            target=self._stderr_loop, daemon=True
-        )
-        self._stderr_thread.start()
-
-    def _read_loop(self):
-        """Read H.264 encoded chunks from GStreamer stdout and deliver via callback."""
+        # Raw non-blocking fds: one read() syscall per chunk, no BufferedReader
+        process = self._process
+        stdout_fd = process.stdout.fileno()
+        os.set_blocking(stdout_fd, False)
+        _IO_LOOP.register(stdout_fd, lambda fd: self._on_stdout_ready(process, fd))
+        if process.stderr is not None:
+            stderr_fd = process.stderr.fileno()
+            os.set_blocking(stderr_fd, False)
+            _IO_LOOP.register(stderr_fd, lambda fd: self._on_stderr_ready(process, fd))
+
+    def _alloc_buffer(self):
+        """
+        Allocate the persistent read buffer: topic header, one outbound
+        chunk and one read's worth of space. It always starts with the
+        header and stdout is read straight into it after the buffered data,
+        so there is no per-read allocation and an outbound frame is a
+        single copy of the buffer prefix.
+        """
+        header_len = len(self._topic_header)
+        self._buf = bytearray(header_len + self._chunk_size + self.READ_SIZE)
+        self._buf[:header_len] = self._topic_header
+        self._view = memoryview(self._buf)
+        self._fill = header_len
+
+    def _on_stdout_ready(self, process, fd):
+        """Read one H.264 chunk from GStreamer stdout (I/O loop thread)."""
+        if process is not self._process:
+            _IO_LOOP.unregister(fd)
+            return
+        view = self._view
         try:
-            stdout = self._process.stdout
-            while not self._stopped and self._process and stdout:
-                chunk = stdout.read1(65536)
-                if not chunk:
-                    _log("GStreamer stdout EOF for %s (sent %d chunks, %d bytes)"
-                         % (self.camera_id, self._chunks_sent, self._total_bytes))
-                    break
-                self._chunks_sent += 1
-                self._total_bytes += len(chunk)
-                if self._chunks_sent == 1:
-                    _log("First H.264 chunk from %s (%d bytes)" % (self.camera_id, len(chunk)))
-                if self.on_data:
-                    binary_frame = self._topic_header + chunk
-                    self.on_data(binary_frame)
-        except Exception as e:
-            if not self._stopped:
-                _log_e("Reader error for %s: %s" % (self.camera_id, e))
-        finally:
+            n = os.readv(fd, [view[self._fill:]])
+        except BlockingIOError:
+            return
+        if not n:
+            _IO_LOOP.unregister(fd)
+            _log("GStreamer stdout EOF for %s (sent %d chunks, %d bytes)"
+                 % (self.camera_id, self._chunks_sent, self._total_bytes))
             if not self._stopped:
+                self._flush_partial(process)
                 _log("GStreamer process exited for %s" % self.camera_id)
+            return
 
-    def _stderr_loop(self):
-        """Read and log GStreamer stderr output."""
+        self._chunks_sent += 1
+        self._total_bytes += n
+        if self._chunks_sent == 1:
+            _log("First H.264 chunk from %s (%d bytes)" % (self.camera_id, n))
+
+        header_len = len(self._topic_header)
+        chunk_size = self._chunk_size
+        fill = self._fill + n
+        # Send whole chunks, move the remainder down behind the header
+        while fill - header_len >= chunk_size:
+            end = header_len + chunk_size
+            self._dispatch(end)
+            remainder = fill - end
+            view[header_len:header_len + remainder] = view[end:fill]
+            fill = header_len + remainder
+        self._fill = fill
+        if fill > header_len and not self._flush_scheduled:
+            self._flush_scheduled = True
+            _IO_LOOP.call_later(self.BATCH_DEADLINE, lambda: self._flush_partial(process))
+
+    def _flush_partial(self, process):
+        """Send whatever is buffered once the flush deadline passes."""
+        if process is not self._process:
+            return  # scheduled before a restart; the buffer is the new process's
+        self._flush_scheduled = False
+        if self._fill > len(self._topic_header):
+            self._dispatch(self._fill)
+            self._fill = len(self._topic_header)
+
+    def _dispatch(self, end):
+        """Send buffer[:end] (topic header + H.264 data) as one binary frame."""
+        if self.on_data:
+            self.on_data(bytes(self._view[:end]))
+
+    def _on_stderr_ready(self, process, fd):
+        """Log complete GStreamer stderr lines (I/O loop thread)."""
         try:
-            while self._process and self._process.stderr:
-                line = self._process.stderr.readline()
-                if not line:
-                    break
-                text = line.decode("utf-8", errors="replace").rstrip()
-                if text:
-                    _log_w("GStreamer stderr [%s]: %s" % (self.camera_id, text))
-        except Exception:
-            pass
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        if not data:
+            _IO_LOOP.unregister(fd)
+            data = b"\n"
+        if not is_enabled_for(WARN):
+            # Drain the pipe but skip splitting/decoding lines nobody sees
+            self._stderr_buf = b""
+            return
+        lines = (self._stderr_buf + data).split(b"\n")
+        self._stderr_buf = lines.pop()
+        for line in lines:
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if text:
+                _log_w("GStreamer stderr [%s]: %s" % (self.camera_id, text))
 
     def stop(self):
-        """Stop the GStreamer subprocess and all threads."""
+        """Stop the GStreamer subprocess."""
         self._stopped = True
         self._cleanup_process()
         _log("Stopped %s" % self.camera_id)
@@ -354,6 +510,14 @@ class GStreamerStream:
         """Terminate and clean up the GStreamer process."""
         if self._process is None:
             return
+        # Unregister on the I/O thread first: it may be inside
+        # _on_stdout_ready for these fds right now
+        pipes = [p for p in (self._process.stdout, self._process.stderr) if p is not None]
+        _IO_LOOP.unregister_sync(*[p.fileno() for p in pipes])
+        # Drop the old process's partial chunk; a flush timer still queued
+        # for it checks the process and does nothing
+        self._fill = len(self._topic_header)
+        self._flush_scheduled = False
         try:
             # GStreamer with -e flag handles SIGINT gracefully (EOS)
             self._process.terminate()
@@ -366,6 +530,8 @@ class GStreamerStream:
                 pass
         except Exception:
             pass
+        for pipe in pipes:
+            pipe.close()
         self._process = None
 
     def restart(self, camera_config=None):
@@ -386,32 +552,52 @@ class GStreamerStream:
 # V4L2 camera auto-discovery
 # ---------------------------------------------------------------------------
 
+_V4L2_CTL = shutil.which("v4l2-ctl")
+
+# (device_path, st_ino, st_mtime_ns) -> card name; the stat fields change
+# when a device node is re-created on hotplug
+_V4L2_NAME_CACHE = {}
+
+
 def _get_v4l2_device_name(device_path):
     """
     Get the human-readable name of a V4L2 device via v4l2-ctl.
     Returns the card name or the device path as fallback.
     """
-    v4l2_ctl = shutil.which("v4l2-ctl")
-    if not v4l2_ctl:
+    if not _V4L2_CTL:
         return os.path.basename(device_path)
 
+    try:
+        st = os.stat(device_path)
+        cache_key = (device_path, st.st_ino, st.st_mtime_ns)
+    except OSError:
+        cache_key = None
+    if cache_key in _V4L2_NAME_CACHE:
+        return _V4L2_NAME_CACHE[cache_key]
+
+    name = None
     try:
         result = subprocess.run(
-            [v4l2_ctl, "-d", device_path, "--info"],
+            [_V4L2_CTL, "-d", device_path, "--info"],
             capture_output=True, timeout=3,
         )
         if result.returncode == 0:
-            for line in result.stdout.decode("utf-8", errors="replace").splitlines():
-                line = line.strip()
-                if line.startswith("Card type"):
-                    # "Card type      : USB Camera"
-                    name = line.split(":", 1)[1].strip()
-                    if name:
-                        return name
+            # "Card type      : USB Camera" — decode only that line
+            out = result.stdout
+            idx = out.find(b"Card type")
+            if idx >= 0:
+                eol = out.find(b"\n", idx)
+                line = out[idx:eol if eol >= 0 else len(out)].decode("utf-8", errors="replace")
+                if ":" in line:
+                    name = line.split(":", 1)[1].strip() or None
     except Exception:
         pass
 
-    return os.path.basename(device_path)
+    if name is None:
+        return os.path.basename(device_path)
+    if cache_key is not None:
+        _V4L2_NAME_CACHE[cache_key] = name
+    return name
 
 
 def _probe_v4l2_device(device_path):
@@ -419,8 +605,7 @@ def _probe_v4l2_device(device_path):
     if not _GST_LAUNCH:
         return False
 
-    pipeline = "v4l2src device=%s num-buffers=1 ! fakesink" % device_path
-    cmd = [_GST_LAUNCH, "-q"] + shlex.split(pipeline)
+    cmd = [_GST_LAUNCH, "-q", "v4l2src", "device=%s" % device_path, "num-buffers=1", "!", "fakesink"]
     try:
         result = subprocess.run(
             cmd,
@@ -447,12 +632,14 @@ def discover_v4l2_cameras():
     if not devices:
         return []
 
-    cameras = []
-    for device_path in devices:
-        if not _probe_v4l2_device(device_path):
-            continue
+    # Each probe is a subprocess with its own timeout — run them side by side
+    with ThreadPoolExecutor(max_workers=min(8, len(devices))) as executor:
+        usable = [device_path for device_path, ok
+                  in zip(devices, executor.map(_probe_v4l2_device, devices)) if ok]
+        names = list(executor.map(_get_v4l2_device_name, usable))
 
-        name = _get_v4l2_device_name(device_path)
+    cameras = []
+    for device_path, name in zip(usable, names):
         cameras.append({
             "name": name,
             "source": "v4l2",
@@ -473,10 +660,23 @@ def discover_v4l2_cameras():
 # Camera config loader
 # ---------------------------------------------------------------------------
 
+try:
+    import yaml as _yaml
+    # libyaml-backed loader is several times faster than the pure-Python one
+    _YAML_LOADER = getattr(_yaml, "CSafeLoader", _yaml.SafeLoader)
+except ImportError:
+    _yaml = None
+    _YAML_LOADER = None
+
+# (path, st_mtime_ns) -> parsed camera list
+_CONFIG_CACHE = {}
+
+
 def load_camera_config(config_path=None):
     """
     Load camera configuration from a YAML file.
     If the file does not exist, falls back to V4L2 auto-discovery.
+    The parsed file is cached until its mtime changes.
 
     Args:
         config_path: path to cameras.yaml (or None for auto-discovery only)
@@ -485,17 +685,22 @@ def load_camera_config(config_path=None):
         list of camera config dicts
     """
     if config_path and os.path.isfile(config_path):
-        try:
-            import yaml
-            with open(config_path, "r") as f:
-                data = yaml.safe_load(f)
-            cameras = data.get("cameras", []) if isinstance(data, dict) else []
-            _log("Loaded %d camera(s) from %s" % (len(cameras), config_path))
-            return cameras
-        except ImportError:
+        if _yaml is None:
             _log_e("PyYAML not installed — cannot load %s. Falling back to auto-discovery." % config_path)
-        except Exception as e:
-            _log_e("Error loading %s: %s. Falling back to auto-discovery." % (config_path, e))
+        else:
+            try:
+                key = (config_path, os.stat(config_path).st_mtime_ns)
+                cameras = _CONFIG_CACHE.get(key)
+                if cameras is None:
+                    with open(config_path, "r") as f:
+                        data = _yaml.load(f, Loader=_YAML_LOADER)
+                    cameras = data.get("cameras", []) if isinstance(data, dict) else []
+                    _CONFIG_CACHE.clear()
+                    _CONFIG_CACHE[key] = cameras
+                    _log("Loaded %d camera(s) from %s" % (len(cameras), config_path))
+                return list(cameras)
+            except Exception as e:
+                _log_e("Error loading %s: %s. Falling back to auto-discovery." % (config_path, e))
 
     # No config file or failed to load — auto-discover
     return discover_v4l2_cameras()
@@ -1,19 +1,148 @@
+import collections
 import copy
+import functools
 import gzip
+import itertools
 import json
 import os
+import socket
 import sqlite3
+import struct
+import sys
 import time
 import types
-import uuid
+import urllib.parse
 import traceback
+from array import array
 
+import tornado.ioloop
+import tornado.iostream
 import tornado.web
 import tornado.websocket
 
+try:
+    import msgpack
+    _HAS_MSGPACK = True
+except ImportError:
+    _HAS_MSGPACK = False
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 from .log import info as _log, warn as _log_w, error as _log_e
 
 
+def _to_builtin(obj):
+    """Serializer fallback for array types ros2dict() passes through
+    unconverted (numpy arrays, array.array)."""
+    try:
+        return obj.tolist()
+    except AttributeError:
+        raise TypeError("Cannot serialize %s" % type(obj).__name__)
+
+
+# MessagePack ext type codes for numeric arrays, sent as their raw
+# little-endian bytes and decoded into JS typed arrays by msgpack.js.
+# Keyed by (kind, itemsize): numpy dtype.kind, or 'i'/'u'/'f' for array.array.
+_TYPED_ARRAY_EXT = {
+    ('i', 1): 0x10, ('u', 1): 0x11,
+    ('i', 2): 0x12, ('u', 2): 0x13,
+    ('i', 4): 0x14, ('u', 4): 0x15,
+    ('f', 4): 0x16, ('f', 8): 0x17,
+}
+
+# array.array typecode -> kind
+_ARRAY_KIND = {'b': 'i', 'h': 'i', 'i': 'i', 'l': 'i', 'q': 'i',
+               'B': 'u', 'H': 'u', 'I': 'u', 'L': 'u', 'Q': 'u',
+               'f': 'f', 'd': 'f'}
+
+
+def _msgpack_default(obj):
+    """msgpack fallback: numeric arrays become one typed-array ext blob
+    (e.g. LaserScan.ranges) instead of one msgpack number per element.
+    64-bit integer and multi-dimensional arrays fall back to lists."""
+    if sys.byteorder == 'little':
+        if type(obj) is array:
+            code = _TYPED_ARRAY_EXT.get((_ARRAY_KIND.get(obj.typecode), obj.itemsize))
+            if code is not None:
+                return msgpack.ExtType(code, obj.tobytes())
+        else:
+            dtype = getattr(obj, 'dtype', None)
+            if dtype is not None and obj.ndim == 1:
+                code = _TYPED_ARRAY_EXT.get((dtype.kind, dtype.itemsize))
+                if code is not None and dtype.byteorder in ('=', '<', '|'):
+                    return msgpack.ExtType(code, obj.tobytes())
+    return _to_builtin(obj)
+
+
+if _HAS_ORJSON:
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def _dumps(obj):
+        """Compact JSON as UTF-8 bytes (orjson). numpy arrays are
+        serialized natively, without a tolist() round trip."""
+        return orjson.dumps(obj, default=_to_builtin, option=_ORJSON_OPTS)
+
+    # Accepts str or bytes; orjson.JSONDecodeError subclasses ValueError
+    _loads = orjson.loads
+else:
+    def _dumps(obj):
+        """Compact JSON as UTF-8 bytes (stdlib fallback)."""
+        return json.dumps(obj, separators=(',', ':'), default=_to_builtin).encode('utf-8')
+
+    _loads = json.loads
+
+
+# Message type constants (first element of every [type, payload] message)
+MSG_PING = "p"
+MSG_PONG = "q"
+MSG_MSG = "m"
+MSG_TOPICS = "t"
+MSG_SUB = "s"
+MSG_UNSUB = "u"
+MSG_SYSTEM = "y"
+MSG_JOY = "j"  # joystick publish (browser -> server)
+MSG_RESOURCES = "r"  # system metrics (CPU/GPU usage)
+MSG_VIDEO_META = "v"  # video stream metadata (fps, resolution, encoder)
+MSG_CAMERAS = "c"     # camera list (server -> browser)
+MSG_CAM_SUB = "d"     # camera subscribe (browser -> server)
+MSG_CAM_UNSUB = "e"   # camera unsubscribe (browser -> server)
+MSG_VIDEO_SETTINGS = "f"  # per-stream settings override (browser -> server)
+MSG_MISSIONS  = "w"   # mission list (server -> browser)
+MSG_GPS_POS   = "g"   # USV GPS position update (server -> browser)
+MSG_MAP_LAYERS = "l"  # offline map layer list (server -> browser)
+MSG_BATCH = "b"       # several messages in one frame (server -> browser)
+
+PING_SEQ = "s"
+PONG_SEQ = "s"
+
+# Message types sent unfiltered to every connected client
+_BROADCAST_ALL = frozenset((MSG_TOPICS, MSG_RESOURCES, MSG_VIDEO_META, MSG_CAMERAS,
+                            MSG_MISSIONS, MSG_GPS_POS))
+
+# Message types sent as MessagePack to clients that negotiated it
+_MSGPACK_TYPES = frozenset((MSG_MSG, MSG_RESOURCES, MSG_GPS_POS))
+
+_HAS_TCP_CORK = hasattr(socket, "TCP_CORK")  # Linux only
+
+
+def _find_sps(frame, start):
+    """Offset of the Annex-B start code of the first SPS NAL unit (type 7)
+    in frame[start:], or -1."""
+    pos = frame.find(b'\x00\x00\x01', start)
+    while pos >= 0:
+        if pos + 3 < len(frame) and frame[pos + 3] & 0x1F == 7:
+            # Include the leading zero of a 4-byte start code
+            if pos > start and frame[pos - 1] == 0:
+                pos -= 1
+            return pos
+        pos = frame.find(b'\x00\x00\x01', pos + 3)
+    return -1
+
+
 class NoCacheStaticFileHandler(tornado.web.StaticFileHandler):
     def set_extra_headers(self, path):
         self.set_header('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
@@ -41,48 +170,107 @@ class USVSocketHandler(tornado.websocket.WebSocketHandler):
         ["m", {ros msg dict}] - ROS MESSAGE data
         ["t", {topic_map}]    - TOPIC LIST
         ["y", {system_info}]  - SYSTEM info on connect
-    """
+        ["b", [msg, ...]]     - BATCH of the above, coalesced per IOLoop tick
 
-    # Message type constants
-    MSG_PING = "p"
-    MSG_PONG = "q"
-    MSG_MSG = "m"
-    MSG_TOPICS = "t"
-    MSG_SUB = "s"
-    MSG_UNSUB = "u"
-    MSG_SYSTEM = "y"
-    MSG_JOY = "j"  # joystick publish (browser -> server)
-    MSG_RESOURCES = "r"  # system metrics (CPU/GPU usage)
-    MSG_VIDEO_META = "v"  # video stream metadata (fps, resolution, encoder)
-    MSG_CAMERAS = "c"     # camera list (server -> browser)
-    MSG_CAM_SUB = "d"     # camera subscribe (browser -> server)
-    MSG_CAM_UNSUB = "e"   # camera unsubscribe (browser -> server)
-    MSG_VIDEO_SETTINGS = "f"  # per-stream settings override (browser -> server)
-    MSG_MISSIONS  = "w"   # mission list (server -> browser)
-    MSG_GPS_POS   = "g"   # USV GPS position update (server -> browser)
-    MSG_MAP_LAYERS = "l"  # offline map layer list (server -> browser)
-
-    PING_SEQ = "s"
-    PONG_SEQ = "s"
+    Clients negotiating the "usv.msgpack" subprotocol receive "m", "r" and
+    "g" messages as binary frames instead: a 0x00 byte (a zero-length video
+    topic name) followed by the MessagePack-encoded [type, payload] array.
+    """
 
+    # Message type constants, also reachable as USVSocketHandler.MSG_*
+    MSG_PING = MSG_PING
+    MSG_PONG = MSG_PONG
+    MSG_MSG = MSG_MSG
+    MSG_TOPICS = MSG_TOPICS
+    MSG_SUB = MSG_SUB
+    MSG_UNSUB = MSG_UNSUB
+    MSG_SYSTEM = MSG_SYSTEM
+    MSG_JOY = MSG_JOY
+    MSG_RESOURCES = MSG_RESOURCES
+    MSG_VIDEO_META = MSG_VIDEO_META
+    MSG_CAMERAS = MSG_CAMERAS
+    MSG_CAM_SUB = MSG_CAM_SUB
+    MSG_CAM_UNSUB = MSG_CAM_UNSUB
+    MSG_VIDEO_SETTINGS = MSG_VIDEO_SETTINGS
+    MSG_MISSIONS = MSG_MISSIONS
+    MSG_GPS_POS = MSG_GPS_POS
+    MSG_MAP_LAYERS = MSG_MAP_LAYERS
+    MSG_BATCH = MSG_BATCH
+
+    # Upper bound on a single batched frame; larger backlogs are split
+    BATCH_MAX_BYTES = 64 * 1024
+
+    # Kernel send buffer per client, sized for a burst of video frames plus
+    # batched messages (Tornado's own IOStream write buffer is unbounded)
+    SEND_BUFFER_BYTES = 1024 * 1024
+
+    # Unsent video (beyond the kernel send buffer) at which a client starts
+    # dropping frames until the next keyframe
+    VIDEO_BACKLOG_BYTES = 2 * 1024 * 1024
+
+    SUBPROTOCOL_MSGPACK = "usv.msgpack"
+    SUBPROTOCOL_JSON = "usv.json"
+
+    PING_SEQ = PING_SEQ
+    PONG_SEQ = PONG_SEQ
+
+    # Ping send times (monotonic ms) are kept in a ring of PING_SLOTS int64s
+    # (power of two)
+    PING_SLOTS = 1024
+    PING_MASK = PING_SLOTS - 1
+
+    # Open connections, maintained by open()/on_close(). Broadcasts iterate
+    # the _sockets_tuple snapshot of it without checking is_closing():
+    # writing to a socket that is closing raises WebSocketClosedError,
+    # which the write helpers swallow.
     sockets = set()
+    _sockets_tuple = ()
+    # Connection ids: small ints hash and compare far cheaper than UUIDs in
+    # the node's subscriber sets
+    _ids = itertools.count(1)
+    # topic_name -> set of sockets subscribed to it (broadcast index,
+    # kept in step with node.remote_subs)
+    topic_to_sockets = {}
+    # camera_id -> set of sockets subscribed to that direct camera stream
+    camera_to_sockets = {}
+    # topic_name -> earliest next_allowed_ns_by_topic among its subscribers;
+    # reset to 0 whenever the topic's subscriber set or rates change
+    topic_next_due_ns = {}
 
     def initialize(self, node):
         self.node = node
 
     def get_compression_options(self):
-        return {}
+        # permessage-deflate compresses every frame separately for each
+        # client. Level 3 costs about half the CPU of zlib's default for a
+        # few percent larger JSON; mem_level 5 shrinks the per-socket state.
+        return {"compression_level": 3, "mem_level": 5}
 
     def check_origin(self, origin):
         # Allow connections from any origin (needed for WireGuard access)
         return True
 
+    def select_subprotocol(self, subprotocols):
+        if _HAS_MSGPACK and self.SUBPROTOCOL_MSGPACK in subprotocols:
+            return self.SUBPROTOCOL_MSGPACK
+        if subprotocols:
+            # Browsers drop the connection if none of the offered
+            # subprotocols is echoed back, so fall back to plain JSON
+            return self.SUBPROTOCOL_JSON
+        return None
+
     def open(self):
-        self.id = uuid.uuid4()
+        self.id = next(USVSocketHandler._ids)
+        self.use_msgpack = self.selected_subprotocol == self.SUBPROTOCOL_MSGPACK
         self.latency = 0
-        self.last_ping_times = [0] * 1024
+        self.last_ping_times = array('q', bytes(8 * self.PING_SLOTS))
         self.ping_seq = 0
         self.set_nodelay(True)
+        try:
+            self.ws_connection.stream.socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, self.SEND_BUFFER_BYTES)
+        except (AttributeError, OSError):
+            pass
 
         # Polyfill for older tornado
         if not hasattr(self.ws_connection, "is_closing"):
@@ -91,68 +279,292 @@ class USVSocketHandler(tornado.websocket.WebSocketHandler):
                 self.ws_connection
             )
 
-        self.update_intervals_by_topic = {}
-        self.last_data_times_by_topic = {}
+        # Throttle state in integer nanoseconds (time.monotonic_ns)
+        self.update_intervals_ns_by_topic = {}
+        # Earliest time the next message of each topic may be sent
+        self.next_allowed_ns_by_topic = {}
+
+        # Reverse index of this client's subscriptions, for O(own subs) cleanup
+        self._subscribed_topics = set()
+        self._subscribed_cameras = set()
+
+        # Outgoing text messages (encoded JSON) waiting for the next flush
+        self._pending = []
+        self._flush_scheduled = False
+        # TCP_CORK state, see _cork()
+        self._corked = False
+        # Video bytes handed to Tornado but not yet written to the socket,
+        # and streams waiting for a keyframe after being dropped
+        self._video_backlog = 0
+        self._video_resync = set()
 
         USVSocketHandler.sockets.add(self)
+        USVSocketHandler._rebuild_snapshot()
         self.node.loginfo("WebSocket client connected: %s" % str(self.id))
 
-        self.write_message(json.dumps([self.MSG_SYSTEM, {
+        frames = USVSocketHandler._cached_open_frames
+        if frames is None:
+            frames = USVSocketHandler._cached_open_frames = self._build_open_frames()
+        for frame in frames:
+            self.write_message(frame)
+
+        # Topic list is only broadcast when the ROS graph changes, so a new
+        # client needs the current one now
+        self.write_message(self._topics_frame())
+
+        # Send mission list immediately on connect (changes at runtime, so
+        # it is not part of the cached frames)
+        if self.node.mission_manager:
+            self.write_message(
+                b'["' + MSG_MISSIONS.encode() + b'",'
+                + self.node.mission_manager.get_mission_list_bytes() + b']'
+            )
+
+    # Encoded connect-time frames (system info, camera list, map layers).
+    # These are fixed after startup, so they are built on the first
+    # connection and reused; call invalidate_open_frames() if one changes.
+    _cached_open_frames = None
+
+    @classmethod
+    def invalidate_open_frames(cls):
+        cls._cached_open_frames = None
+
+    def _topics_frame(self):
+        topics = self.node.all_topics
+        cached = USVSocketHandler._last_serialized.get(MSG_TOPICS)
+        if cached is not None and cached[0] is topics and cached[1] is not None:
+            return cached[1]
+        json_msg = _dumps([MSG_TOPICS, topics])
+        USVSocketHandler._last_serialized[MSG_TOPICS] = (topics, json_msg, None)
+        return json_msg
+
+    def _build_open_frames(self):
+        frames = [_dumps([MSG_SYSTEM, {
             "hostname": self.node.title,
             "version": self.node.version,
-        }], separators=(',', ':')))
+        }])]
 
         # Send camera list immediately so client doesn't wait for sync cycle
         if self.node.cameras_available:
-            self.write_message(json.dumps([self.MSG_CAMERAS,
-                self.node.cameras_available], separators=(',', ':')))
+            frames.append(_dumps([MSG_CAMERAS, self.node.cameras_available]))
 
-        # Send mission list immediately on connect
-        if self.node.mission_manager:
-            self.write_message(json.dumps(
-                [self.MSG_MISSIONS, self.node.mission_manager.get_mission_list_payload()],
-                separators=(',', ':')
-            ))
+        # Offline map layer list
+        if USVSocketHandler._map_layers_frame is None:
+            USVSocketHandler.refresh_map_layers(self.node)
+        frames.append(USVSocketHandler._map_layers_frame)
+        return tuple(frames)
 
-        # Send offline map layer list immediately on connect
+    # Encoded "l" frame (public map layer list); see refresh_map_layers()
+    _map_layers_frame = None
+
+    @classmethod
+    def refresh_map_layers(cls, node):
+        """Re-encode the public map layer list. Called at startup, after
+        the MBTiles layers are opened, and whenever node.map_layers changes."""
         # Strip server-internal 'path' field — browser only needs 'label' and 'format'
         map_layers_public = {
             name: {
                 'label': info['label'],
                 'format': MBTilesHandler._meta.get(name, {}).get('format', 'png'),
             }
-            for name, info in self.node.map_layers.items()
+            for name, info in node.map_layers.items()
         }
-        self.write_message(json.dumps(
-            [self.MSG_MAP_LAYERS, map_layers_public],
-            separators=(',', ':')
-        ))
+        cls._map_layers_frame = _dumps([MSG_MAP_LAYERS, map_layers_public])
+        cls.invalidate_open_frames()
 
     def on_close(self):
         USVSocketHandler.sockets.discard(self)
-        for topic_name in self.node.remote_subs:
-            self.node.remote_subs[topic_name].discard(self.id)
+        USVSocketHandler._rebuild_snapshot()
+        for topic_name in self._subscribed_topics:
+            if topic_name in self.node.remote_subs:
+                self.node.remote_subs[topic_name].discard(self.id)
+            if topic_name in USVSocketHandler.topic_to_sockets:
+                USVSocketHandler.topic_to_sockets[topic_name].discard(self)
         # Clean up camera subscriptions
-        for camera_id in list(self.node.camera_remote_subs.keys()):
-            self.node.camera_remote_subs[camera_id].discard(self.id)
-        # Stop camera streams that have no remaining subscribers
+        for camera_id in self._subscribed_cameras:
+            if camera_id in self.node.camera_remote_subs:
+                self.node.camera_remote_subs[camera_id].discard(self.id)
+            if camera_id in USVSocketHandler.camera_to_sockets:
+                USVSocketHandler.camera_to_sockets[camera_id].discard(self)
+        # Drop ROS subscriptions and stop camera streams that have no
+        # remaining subscribers
+        if self._subscribed_topics:
+            self.node.request_sync()
         self.node.sync_camera_streams()
         self.node.loginfo("WebSocket client disconnected: %s" % str(self.id))
 
+    @classmethod
+    def _rebuild_snapshot(cls):
+        # Tuples iterate faster than sets and cannot change under a loop
+        cls._sockets_tuple = tuple(cls.sockets)
+
+    def _enqueue(self, json_msg):
+        """Queue an encoded JSON message; all messages queued during one
+        IOLoop iteration go out together as a single frame."""
+        self._pending.append(json_msg)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            tornado.ioloop.IOLoop.current().add_callback(self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        self._cork()
+        try:
+            if len(pending) == 1:
+                self.write_message(pending[0])
+                return
+            # Wrap in ["b",[...]] envelopes of at most BATCH_MAX_BYTES each
+            batch = []
+            size = 0
+            for json_msg in pending:
+                if batch and size + len(json_msg) > self.BATCH_MAX_BYTES:
+                    self.write_message(b'["b",[' + b','.join(batch) + b']]')
+                    batch = []
+                    size = 0
+                batch.append(json_msg)
+                size += len(json_msg) + 1
+            if len(batch) == 1:
+                self.write_message(batch[0])
+            else:
+                self.write_message(b'["b",[' + b','.join(batch) + b']]')
+        except tornado.websocket.WebSocketClosedError:
+            pass
+
+    def _write_binary(self, frame):
+        """Write a binary frame; returns Tornado's write Future, or None
+        if the connection is closed."""
+        # Text queued before this frame must reach the client first
+        if self._pending:
+            self._flush()
+        self._cork()
+        try:
+            return self.write_message(frame, binary=True)
+        except tornado.websocket.WebSocketClosedError:
+            return None
+
+    def _write_raw_binary(self, frame):
+        """Write `frame` as one binary WebSocket frame, bypassing
+        write_message().
+
+        write_message() deflates the payload when permessage-deflate is
+        negotiated (wasted work on H.264) and concatenates it onto the frame
+        header, copying it once per client. Here the header is written
+        separately and the payload buffer is queued on the IOStream as-is;
+        TCP_CORK keeps the two in the same segments. Uncompressed frames
+        (RSV1 clear) are valid under permessage-deflate.
+        """
+        conn = self.ws_connection
+        stream = getattr(conn, "stream", None)
+        if stream is None or getattr(conn, "mask_outgoing", True):
+            return self._write_binary(frame)
+        if conn.is_closing():
+            return None
+        if self._pending:
+            self._flush()
+        self._cork()
+        n = len(frame)
+        if n < 126:
+            header = struct.pack("!BB", 0x82, n)
+        elif n <= 0xFFFF:
+            header = struct.pack("!BBH", 0x82, 126, n)
+        else:
+            header = struct.pack("!BBQ", 0x82, 127, n)
+        try:
+            stream.write(header)
+            return stream.write(frame)
+        except tornado.iostream.StreamClosedError:
+            return None
+
+    def _write_video(self, frame, topic_name, header_len):
+        """Write an H.264 chunk unless this client is falling behind.
+
+        A client whose unsent video exceeds VIDEO_BACKLOG_BYTES stops
+        receiving that stream until the next SPS (start of a keyframe), so
+        a slow link sheds whole GOPs instead of growing Tornado's write
+        buffer without bound and drifting further behind real time.
+        """
+        if topic_name in self._video_resync:
+            pos = _find_sps(frame, header_len)
+            if pos < 0:
+                return
+            self._video_resync.discard(topic_name)
+            if pos > header_len:
+                frame = frame[:header_len] + frame[pos:]
+        elif self._video_backlog > self.VIDEO_BACKLOG_BYTES:
+            self._video_resync.add(topic_name)
+            return
+        future = self._write_raw_binary(frame)
+        if future is not None:
+            size = len(frame)
+            self._video_backlog += size
+            future.add_done_callback(
+                functools.partial(self._on_video_written, size))
+
+    def _on_video_written(self, size, _future):
+        self._video_backlog -= size
+
+    def _cork(self):
+        """Hold back partial TCP segments until the next IOLoop iteration.
+
+        Everything written to this client in the current callback batch
+        (batched text, video frames of several topics) then leaves in
+        full-sized segments instead of one send per WebSocket frame.
+        """
+        if self._corked or not _HAS_TCP_CORK:
+            return
+        try:
+            self.ws_connection.stream.socket.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+        except (AttributeError, OSError):
+            return
+        self._corked = True
+        tornado.ioloop.IOLoop.current().add_callback(self._uncork)
+
+    def _uncork(self):
+        self._corked = False
+        try:
+            self.ws_connection.stream.socket.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+        except (AttributeError, OSError):
+            pass
+
+    @staticmethod
+    def _pack(message):
+        return b'\x00' + msgpack.packb(message, use_bin_type=True, default=_msgpack_default)
+
     @classmethod
     def send_pings(cls):
-        for sock in cls.sockets:
+        # Clients with the same (seq, latency) get the same payload — encode
+        # it once and reuse the bytes
+        payloads = {}
+        mask = cls.PING_MASK
+        now_ms = time.monotonic_ns() // 1000000
+        for sock in cls._sockets_tuple:
             try:
-                sock.last_ping_times[sock.ping_seq % 1024] = time.time() * 1000
-                if sock.ws_connection and not sock.ws_connection.is_closing():
-                    sock.write_message(json.dumps([cls.MSG_PING, {
-                        cls.PING_SEQ: sock.ping_seq,
-                        "l": round(sock.latency, 1),
-                    }], separators=(',', ':')))
+                sock.last_ping_times[sock.ping_seq & mask] = now_ms
+                key = (sock.ping_seq, round(sock.latency, 1))
+                payload = payloads.get(key)
+                if payload is None:
+                    payload = _dumps([MSG_PING, {
+                        PING_SEQ: key[0],
+                        "l": key[1],
+                    }])
+                    payloads[key] = payload
+                # Queued with the tick's other text; the flush runs in the
+                # next loop iteration, well below latency resolution
+                sock._enqueue(payload)
                 sock.ping_seq += 1
             except Exception as e:
                 _log_e("WebSocket", "Error sending ping: %s" % str(e))
 
+    # Header ([len][topic]) and decoded topic of the last binary frame
+    _last_binary_header = None
+    _last_binary_topic = None
+
     @classmethod
     def broadcast_binary(cls, binary_frame):
         """Send binary H.264 video frame to subscribed clients.
@@ -161,62 +573,113 @@ class USVSocketHandler(tornado.websocket.WebSocketHandler):
             [1 byte: topic name length N] [N bytes: topic name UTF-8] [H.264 data]
 
         No per-client throttle — FFmpeg controls the output rate, and
-        throttling mid-stream H.264 would corrupt the decoder state.
+        throttling mid-stream H.264 would corrupt the decoder state. Only a
+        client that cannot keep up is cut back to keyframes (_write_video).
         """
         try:
-            topic_name_len = binary_frame[0]
-            topic_name = binary_frame[1:1 + topic_name_len].decode('utf-8')
-
-            for sock in cls.sockets:
-                # Check both ROS2 topic subs and camera subs
-                subscribed = False
-                if topic_name in sock.node.remote_subs and sock.id in sock.node.remote_subs[topic_name]:
-                    subscribed = True
-                elif topic_name in sock.node.camera_remote_subs and sock.id in sock.node.camera_remote_subs[topic_name]:
-                    subscribed = True
-                if not subscribed:
-                    continue
-                if sock.ws_connection and not sock.ws_connection.is_closing():
-                    try:
-                        sock.write_message(binary_frame, binary=True)
-                    except Exception:
-                        pass
+            # Consecutive frames usually belong to the same stream: reuse the
+            # previous topic when the frame starts with the same header
+            header = cls._last_binary_header
+            if header is not None and binary_frame.startswith(header):
+                topic_name = cls._last_binary_topic
+            else:
+                topic_name_len = binary_frame[0]
+                topic_name = sys.intern(
+                    str(memoryview(binary_frame)[1:1 + topic_name_len], 'utf-8'))
+                cls._last_binary_header = binary_frame[:1 + topic_name_len]
+                cls._last_binary_topic = topic_name
+
+            # Subscribers of both ROS2 image topics and direct camera streams
+            ros_subs = cls.topic_to_sockets.get(topic_name)
+            cam_subs = cls.camera_to_sockets.get(topic_name)
+            if ros_subs and cam_subs:
+                subscribers = ros_subs | cam_subs
+            else:
+                subscribers = ros_subs or cam_subs
+            if not subscribers:
+                return
+
+            # Closed sockets leave the index in on_close(); one that is
+            # closing in the meantime just drops the frame
+            header_len = len(cls._last_binary_header)
+            for sock in subscribers:
+                try:
+                    sock._write_video(binary_frame, topic_name, header_len)
+                except Exception:
+                    pass
         except Exception as e:
             _log_e("WebSocket", "Error broadcasting binary: %s" % str(e))
 
+    # msg_type -> (payload, json bytes, msgpack bytes) of the last broadcast
+    _last_serialized = {}
+
     @classmethod
     def broadcast(cls, message):
+        """Serialize `message` once per wire format and queue the same bytes
+        for every recipient. Tornado would otherwise re-encode a str for
+        each socket.
+
+        Payloads are treated as immutable once broadcast: passing the very
+        same object again reuses its cached encoding, so callers must build
+        a new payload when its contents change.
+        """
         try:
-            if message[0] == cls.MSG_TOPICS:
-                json_msg = json.dumps(message, separators=(',', ':'))
-                for sock in cls.sockets:
-                    if sock.ws_connection and not sock.ws_connection.is_closing():
-                        sock.write_message(json_msg)
-
-            elif message[0] in (cls.MSG_RESOURCES, cls.MSG_VIDEO_META, cls.MSG_CAMERAS,
-                               cls.MSG_MISSIONS, cls.MSG_GPS_POS):
-                json_msg = json.dumps(message, separators=(',', ':'))
-                for sock in cls.sockets:
-                    if sock.ws_connection and not sock.ws_connection.is_closing():
-                        sock.write_message(json_msg)
-
-            elif message[0] == cls.MSG_MSG:
+            msg_type = message[0]
+            packable = msg_type in _MSGPACK_TYPES
+            if msg_type in _BROADCAST_ALL:
+                # Periodic re-broadcasts of the same payload object (e.g. the
+                # camera list every sync cycle) reuse the previous encoding
+                payload = message[1]
+                cached = cls._last_serialized.get(msg_type)
+                if cached is not None and cached[0] is payload:
+                    json_msg, packed = cached[1], cached[2]
+                else:
+                    json_msg = packed = None
+                for sock in cls._sockets_tuple:
+                    if packable and sock.use_msgpack:
+                        if packed is None:
+                            packed = cls._pack(message)
+                        sock._write_binary(packed)
+                    else:
+                        if json_msg is None:
+                            json_msg = _dumps(message)
+                        sock._enqueue(json_msg)
+                cls._last_serialized[msg_type] = (payload, json_msg, packed)
+
+            elif msg_type == MSG_MSG:
                 topic_name = message[1]["_topic_name"]
+                subscribers = cls.topic_to_sockets.get(topic_name)
+                if not subscribers:
+                    return
+                t_ns = time.monotonic_ns()
+                # No subscriber is due before the earliest of their deadlines:
+                # one comparison instead of a pass over every socket
+                if t_ns < cls.topic_next_due_ns.get(topic_name, 0):
+                    return
                 json_msg = None
-                for sock in cls.sockets:
-                    if topic_name not in sock.node.remote_subs:
-                        continue
-                    if sock.id not in sock.node.remote_subs[topic_name]:
+                packed = None
+                earliest = None
+                for sock in subscribers:
+                    next_allowed = sock.next_allowed_ns_by_topic.get(topic_name, 0)
+                    if t_ns < next_allowed:
+                        if earliest is None or next_allowed < earliest:
+                            earliest = next_allowed
                         continue
-                    t = time.time()
-                    if t - sock.last_data_times_by_topic.get(topic_name, 0.0) < \
-                            sock.update_intervals_by_topic.get(topic_name, 0.0) - 2e-4:
-                        continue
-                    if sock.ws_connection and not sock.ws_connection.is_closing():
+                    # Serialized lazily, so a message every client throttles
+                    # away costs nothing
+                    if sock.use_msgpack:
+                        if packed is None:
+                            packed = cls._pack(message)
+                        sock._write_binary(packed)
+                    else:
                         if json_msg is None:
-                            json_msg = json.dumps(message, separators=(',', ':'))
-                        sock.write_message(json_msg)
-                    sock.last_data_times_by_topic[topic_name] = t
+                            json_msg = _dumps(message)
+                        sock._enqueue(json_msg)
+                    next_allowed = t_ns + sock.update_intervals_ns_by_topic.get(topic_name, 0)
+                    sock.next_allowed_ns_by_topic[topic_name] = next_allowed
+                    if earliest is None or next_allowed < earliest:
+                        earliest = next_allowed
+                cls.topic_next_due_ns[topic_name] = earliest
         except Exception as e:
             _log_e("WebSocket", "Error broadcasting: %s" % str(e))
             traceback.print_exc()
@@ -225,78 +688,147 @@ class USVSocketHandler(tornado.websocket.WebSocketHandler):
         if self.ws_connection.is_closing():
             return
 
+        if type(message) is bytes:
+            # Binary frames carry MessagePack (joystick input on usv.msgpack)
+            if not self.use_msgpack:
+                return
+            try:
+                argv = msgpack.unpackb(message, raw=False)
+            except Exception:
+                _log_w("WebSocket", "Bad MessagePack frame (%d bytes)" % len(message))
+                return
+        else:
+            try:
+                argv = _loads(message)
+            except (ValueError, TypeError):
+                _log_w("WebSocket", "Bad JSON: %s" % message[:200])
+                return
+
+        # Every browser -> server message is [type, payload dict]
         try:
-            argv = json.loads(message)
+            msg_type, data = argv
+            handler = self._HANDLERS.get(msg_type)
         except (ValueError, TypeError):
-            _log_w("WebSocket", "Bad JSON: %s" % message[:200])
-            return
-
-        if type(argv) is not list or len(argv) < 1 or type(argv[0]) is not str:
             _log_w("WebSocket", "Bad message format: %s" % message[:200])
             return
+        if handler is None or type(data) is not dict:
+            return
+        handler(self, data)
 
-        msg_type = argv[0]
-
-        if msg_type == self.MSG_PONG:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            received_time = time.time() * 1000
-            seq = argv[1].get(self.PONG_SEQ, 0) % 1024
-            self.latency = (received_time - self.last_ping_times[seq]) / 2
-
-        elif msg_type == self.MSG_SUB:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            topic_name = argv[1].get("topicName")
-            if topic_name is None:
-                return
-            max_update_rate = float(argv[1].get("maxUpdateRate", 24.0))
-            self.update_intervals_by_topic[topic_name] = 1.0 / max_update_rate
-            self.node.update_intervals_by_topic[topic_name] = min(
-                self.node.update_intervals_by_topic.get(topic_name, 1.0),
-                self.update_intervals_by_topic[topic_name]
-            )
-            if topic_name not in self.node.remote_subs:
-                self.node.remote_subs[topic_name] = set()
-            self.node.remote_subs[topic_name].add(self.id)
-            self.node.sync_subs()
+    def _on_pong(self, data):
+        received_ms = time.monotonic_ns() // 1000000
+        seq = data.get(PONG_SEQ, 0)
+        if type(seq) is not int:
+            return
+        self.latency = (received_ms - self.last_ping_times[seq & self.PING_MASK]) / 2
 
-        elif msg_type == self.MSG_UNSUB:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            topic_name = argv[1].get("topicName")
-            if topic_name in self.node.remote_subs:
-                self.node.remote_subs[topic_name].discard(self.id)
+    def _on_sub(self, data):
+        topic_name = data.get("topicName")
+        if topic_name is None:
+            return
+        max_update_rate = float(data.get("maxUpdateRate", 24.0))
+        # 0.2 ms of slack so a publisher running at exactly the
+        # requested rate is not throttled by timer jitter
+        self.update_intervals_ns_by_topic[topic_name] = int(1e9 / max_update_rate) - 200000
+        self.node.update_intervals_ns_by_topic[topic_name] = min(
+            self.node.update_intervals_ns_by_topic.get(topic_name, 1000000000),
+            self.update_intervals_ns_by_topic[topic_name]
+        )
+        if topic_name not in self.node.remote_subs:
+            self.node.remote_subs[topic_name] = set()
+        self.node.remote_subs[topic_name].add(self.id)
+        USVSocketHandler.topic_to_sockets.setdefault(topic_name, set()).add(self)
+        USVSocketHandler.topic_next_due_ns[topic_name] = 0
+        self._subscribed_topics.add(topic_name)
+        self.node.request_sync()
+
+    def _on_unsub(self, data):
+        topic_name = data.get("topicName")
+        if topic_name in self.node.remote_subs:
+            self.node.remote_subs[topic_name].discard(self.id)
+        if topic_name in USVSocketHandler.topic_to_sockets:
+            USVSocketHandler.topic_to_sockets[topic_name].discard(self)
+        self._subscribed_topics.discard(topic_name)
+        self.node.request_sync()
 
-        elif msg_type == self.MSG_JOY:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            self.node.on_joy_input(argv[1])
+    def _on_joy(self, data):
+        self.node.on_joy_input(data)
 
-        elif msg_type == self.MSG_CAM_SUB:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            camera_id = argv[1].get("cameraId")
-            if camera_id is None:
-                return
-            self.node.on_camera_subscribe(camera_id, self.id)
+    def _on_cam_sub(self, data):
+        camera_id = data.get("cameraId")
+        if camera_id is None:
+            return
+        self._subscribed_cameras.add(camera_id)
+        USVSocketHandler.camera_to_sockets.setdefault(camera_id, set()).add(self)
+        self.node.on_camera_subscribe(camera_id, self.id)
 
-        elif msg_type == self.MSG_CAM_UNSUB:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            camera_id = argv[1].get("cameraId")
-            if camera_id is None:
-                return
-            self.node.on_camera_unsubscribe(camera_id, self.id)
+    def _on_cam_unsub(self, data):
+        camera_id = data.get("cameraId")
+        if camera_id is None:
+            return
+        self._subscribed_cameras.discard(camera_id)
+        if camera_id in USVSocketHandler.camera_to_sockets:
+            USVSocketHandler.camera_to_sockets[camera_id].discard(self)
+        self.node.on_camera_unsubscribe(camera_id, self.id)
+
+    def _on_video_settings(self, data):
+        topic = data.get("topic")
+        fps = data.get("fps")       # int or 0 (auto)
+        quality = data.get("quality")  # "low" / "medium" / "high"
+        if topic is not None:
+            self.node.on_video_settings(topic, fps, quality)
+
+    # Inbound message type -> handler (unbound; called as handler(self, data))
+    _HANDLERS = {
+        MSG_PONG: _on_pong,
+        MSG_SUB: _on_sub,
+        MSG_UNSUB: _on_unsub,
+        MSG_JOY: _on_joy,
+        MSG_CAM_SUB: _on_cam_sub,
+        MSG_CAM_UNSUB: _on_cam_unsub,
+        MSG_VIDEO_SETTINGS: _on_video_settings,
+    }
+
+
+# Tiles in a deployed MBTiles file never change: let browsers keep them for
+# a week without revalidating
+_TILE_CACHE_CONTROL = 'public, max-age=604800, immutable'
+
+
+class _TileCache:
+    """LRU of tile bytes bounded by total payload size rather than entry
+    count, since tiles range from a few hundred bytes to tens of KiB.
+    Misses (None) are cached too and charged a small fixed cost."""
+
+    _ENTRY_OVERHEAD = 128  # rough per-entry cost: key tuple + dict slot
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._size = 0
+
+    def lookup(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def store(self, key, value):
+        cost = self._ENTRY_OVERHEAD + (len(value) if value else 0)
+        if cost > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._size += cost
+        while self._size > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._size -= self._ENTRY_OVERHEAD + (len(old) if old else 0)
 
-        elif msg_type == self.MSG_VIDEO_SETTINGS:
-            if len(argv) != 2 or type(argv[1]) is not dict:
-                return
-            topic = argv[1].get("topic")
-            fps = argv[1].get("fps")       # int or 0 (auto)
-            quality = argv[1].get("quality")  # "low" / "medium" / "high"
-            if topic is not None:
-                self.node.on_video_settings(topic, fps, quality)
+    def clear(self):
+        self._entries.clear()
+        self._size = 0
 
 
 class MBTilesHandler(tornado.web.RequestHandler):
@@ -321,6 +853,24 @@ class MBTilesHandler(tornado.web.RequestHandler):
     # Per-layer metadata cache: layer_name -> {format, normalised}
     _meta = {}
 
+    # Per-layer tile lookup SQL, chosen once for the layer's schema
+    _sql = {}
+
+    _SQL_SIMPLE = ("SELECT tile_data FROM tiles "
+                   "WHERE zoom_level=? AND tile_column=? AND tile_row=?")
+    _SQL_NORMALISED = ("SELECT images.tile_data FROM images "
+                       "JOIN map ON images.tile_id = map.tile_id "
+                       "WHERE map.zoom_level=? AND map.tile_column=? AND map.tile_row=?")
+
+    # Tiles are only ever read: memory-map the file, keep a large page
+    # cache, and refuse writes
+    _PRAGMAS = (
+        "PRAGMA mmap_size=268435456",   # 256 MiB
+        "PRAGMA cache_size=-65536",     # 64 MiB
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA query_only=1",
+    )
+
     @classmethod
     def open_layers(cls, layers):
         """
@@ -337,8 +887,13 @@ class MBTilesHandler(tornado.web.RequestHandler):
             if name in cls._conns:
                 continue
             try:
-                conn = sqlite3.connect(path, check_same_thread=False)
+                # Read-only + immutable: tile files never change while the
+                # server runs, so SQLite can skip file locking and change checks
+                uri = 'file:%s?mode=ro&immutable=1' % urllib.parse.quote(os.path.abspath(path))
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
                 conn.row_factory = None  # raw tuples, faster
+                for pragma in cls._PRAGMAS:
+                    conn.execute(pragma)
                 cls._conns[name] = conn
 
                 # Read format from metadata table
@@ -353,7 +908,36 @@ class MBTilesHandler(tornado.web.RequestHandler):
                 ).fetchall()}
                 normalised = ('images' in tables and 'map' in tables and 'tiles' not in tables)
 
-                cls._meta[name] = {'format': tile_format, 'normalised': normalised}
+                # Tile ETags derive from the file's identity, not a hash of
+                # each response body (Tornado's default)
+                st = os.stat(path)
+                cls._meta[name] = {
+                    'format': tile_format,
+                    'normalised': normalised,
+                    'etag_base': '%x-%x' % (st.st_mtime_ns, st.st_size),
+                }
+                cls._sql[name] = cls._SQL_NORMALISED if normalised else cls._SQL_SIMPLE
+
+                # Without an index on (zoom_level, tile_column, tile_row) every
+                # tile lookup is a full table scan; the file is opened
+                # read-only, so only warn
+                plan = conn.execute("EXPLAIN QUERY PLAN " + cls._sql[name], (0, 0, 0)).fetchall()
+                if any(row[-1].startswith('SCAN') for row in plan):
+                    _log_w("MBTiles", "Layer '%s' has no tile index — lookups will scan the "
+                           "whole table. Add one with: CREATE UNIQUE INDEX tile_index ON "
+                           "%s (zoom_level, tile_column, tile_row)"
+                           % (name, 'map' if normalised else 'tiles'))
+
+                if tile_format == 'pbf':
+                    # PBF tiles are normally stored gzip-compressed; sample one
+                    # to find layers that need compressing when served
+                    sample = conn.execute(
+                        "SELECT tile_data FROM %s LIMIT 1"
+                        % ('images' if normalised else 'tiles')
+                    ).fetchone()
+                    cls._meta[name]['pre_gzipped'] = (
+                        sample is None or bytes(sample[0][:2]) == b'\x1f\x8b')
+
                 _log("MBTiles", "Opened layer '%s': format=%s schema=%s path=%s"
                      % (name, tile_format, 'normalised' if normalised else 'simple', path))
 
@@ -363,6 +947,44 @@ class MBTilesHandler(tornado.web.RequestHandler):
             except Exception as e:
                 _log_e("MBTiles", "Failed to open layer '%s' (%s): %s" % (name, path, e))
 
+        cls._tile_cache.clear()
+        VectorTileHandler.gzipped_tile.cache_clear()
+        # Layer formats are part of the "l" frame sent on connect
+        USVSocketHandler._map_layers_frame = None
+        USVSocketHandler.invalidate_open_frames()
+
+    # Hot tiles across all layers: (layer_name, z, x, tms_y) -> bytes/None
+    _tile_cache = _TileCache(64 * 1024 * 1024)
+
+    @classmethod
+    def fetch_tile(cls, layer_name, z, x, tms_y):
+        """Return the stored tile bytes at a TMS coordinate, or None.
+
+        Cached: map clients keep re-requesting the tiles around the
+        current viewport. open_layers() clears the cache.
+        """
+        key = (layer_name, z, x, tms_y)
+        hit, tile_data = cls._tile_cache.lookup(key)
+        if not hit:
+            row = cls._conns[layer_name].execute(cls._sql[layer_name], (z, x, tms_y)).fetchone()
+            tile_data = None if row is None else bytes(row[0])
+            cls._tile_cache.store(key, tile_data)
+        return tile_data
+
+    @staticmethod
+    def tile_etag(meta, z, x, y):
+        return '"%s-%d-%d-%d"' % (meta.get('etag_base', ''), z, x, y)
+
+    # Set by get() before writing a tile; see compute_etag()
+    _etag = None
+
+    def compute_etag(self):
+        # Tornado would SHA-1 the whole body on every response; tiles of a
+        # given file never change, so their coordinates identify them
+        if self._etag is not None:
+            return self._etag
+        return tornado.web.RequestHandler.compute_etag(self)
+
     def initialize(self, node):
         self._node = node
 
@@ -387,34 +1009,20 @@ class MBTilesHandler(tornado.web.RequestHandler):
 
         try:
             z, x, y = int(z), int(x), int(y)
-            tms_y = (2 ** z - 1) - y  # flip TMS y-axis
-
-            if meta.get('normalised'):
-                # Normalised schema: tile_data lives in 'images', keyed via 'map'
-                cursor = conn.execute(
-                    "SELECT images.tile_data FROM images "
-                    "JOIN map ON images.tile_id = map.tile_id "
-                    "WHERE map.zoom_level=? AND map.tile_column=? AND map.tile_row=?",
-                    (z, x, tms_y)
-                )
-            else:
-                # Simple schema: tile_data directly in 'tiles'
-                cursor = conn.execute(
-                    "SELECT tile_data FROM tiles "
-                    "WHERE zoom_level=? AND tile_column=? AND tile_row=?",
-                    (z, x, tms_y)
-                )
-            row = cursor.fetchone()
-
-            if row is None:
+            tms_y = ((1 << z) - 1) - y  # flip TMS y-axis
+
+            tile_data = MBTilesHandler.fetch_tile(layer_name, z, x, tms_y)
+
+            if tile_data is None:
                 self.set_status(204)
                 self.finish()
                 return
 
             content_type = 'image/jpeg' if tile_format in ('jpg', 'jpeg') else 'image/png'
             self.set_header('Content-Type', content_type)
-            self.set_header('Cache-Control', 'public, max-age=86400')
-            self.write(row[0])
+            self.set_header('Cache-Control', _TILE_CACHE_CONTROL)
+            self._etag = MBTilesHandler.tile_etag(meta, z, x, y)
+            self.write(tile_data)
 
         except Exception as e:
             _log_e("MBTiles", "Error serving tile %s/%s/%s/%s: %s" % (layer_name, z, x, y, e))
@@ -438,12 +1046,28 @@ class VectorTileHandler(tornado.web.RequestHandler):
         404              — layer name unknown or not a vector layer
     """
 
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def gzipped_tile(layer_name, z, x, tms_y):
+        """Tile bytes gzip-compressed for layers stored uncompressed.
+
+        Compressed once at level 1 (PBF is already compact) and cached,
+        instead of running zlib on every request.
+        """
+        tile_data = MBTilesHandler.fetch_tile(layer_name, z, x, tms_y)
+        if tile_data is None or tile_data[:2] == b'\x1f\x8b':
+            return tile_data
+        return gzip.compress(tile_data, compresslevel=1)
+
     def initialize(self, node):
         self._node = node
 
     def set_default_headers(self):
         self.set_header('Access-Control-Allow-Origin', '*')
 
+    _etag = None
+    compute_etag = MBTilesHandler.compute_etag
+
     def get(self, layer_name, z, x, y):
         conn = MBTilesHandler._conns.get(layer_name)
         if conn is None:
@@ -461,43 +1085,29 @@ class VectorTileHandler(tornado.web.RequestHandler):
             z, x, y = int(z), int(x), int(y)
             # MBTiles always uses TMS row order (y=0 at south).
             # MapLibre requests XYZ (y=0 at north), so flip y.
-            tms_y = (2 ** z - 1) - y
-
-            if meta.get('normalised'):
-                cursor = conn.execute(
-                    "SELECT images.tile_data FROM images "
-                    "JOIN map ON images.tile_id = map.tile_id "
-                    "WHERE map.zoom_level=? AND map.tile_column=? AND map.tile_row=?",
-                    (z, x, tms_y)
-                )
+            tms_y = ((1 << z) - 1) - y
+
+            # MBTiles PBF tiles are stored gzip-compressed and sent as-is;
+            # layers found uncompressed at open time go through the
+            # compressed-tile cache. MapLibre GL decompresses either way.
+            if meta.get('pre_gzipped', True):
+                tile_data = MBTilesHandler.fetch_tile(layer_name, z, x, tms_y)
             else:
-                cursor = conn.execute(
-                    "SELECT tile_data FROM tiles "
-                    "WHERE zoom_level=? AND tile_column=? AND tile_row=?",
-                    (z, x, tms_y)
-                )
-            row = cursor.fetchone()
-
-            if row is None:
+                tile_data = VectorTileHandler.gzipped_tile(layer_name, z, x, tms_y)
+
+            if tile_data is None:
                 self.set_status(204)
                 self.finish()
                 return
 
-            tile_data = bytes(row[0])
-
-            # MBTiles PBF tiles are stored gzip-compressed.
-            # Detect by magic bytes [1f 8b]; if already gzip, send as-is.
-            # MapLibre GL decompresses them automatically.
-            if tile_data[:2] == b'\x1f\x8b':
-                # Already gzip-compressed
-                self.set_header('Content-Encoding', 'gzip')
-            else:
-                # Compress on the fly (rare, but handle it)
-                tile_data = gzip.compress(tile_data)
-                self.set_header('Content-Encoding', 'gzip')
+            if tile_data[:2] != b'\x1f\x8b':
+                # Stray uncompressed tile in a gzip layer (rare, but handle it)
+                tile_data = gzip.compress(tile_data, compresslevel=1)
+            self.set_header('Content-Encoding', 'gzip')
 
             self.set_header('Content-Type', 'application/x-protobuf')
-            self.set_header('Cache-Control', 'public, max-age=86400')
+            self.set_header('Cache-Control', _TILE_CACHE_CONTROL)
+            self._etag = MBTilesHandler.tile_etag(meta, z, x, y)
             self.write(tile_data)
 
         except Exception as e:
@@ -516,62 +1126,46 @@ class MapStyleHandler(tornado.web.RequestHandler):
       - glyphs                → /fonts/{fontstack}/{range}.pbf
       - sprite                → /sprites/positron
     Returns patched JSON with no-cache headers.
+
+    The base style is patched and serialized once into a template holding
+    placeholder origin/layer strings; each (host, layer) variant is a byte
+    substitution on that template, cached after first use.
     """
 
-    # Cached base style — loaded once, patched per-request
+    # Cached base style — loaded once
     _base_style = None
     _base_style_path = None
 
+    # Serialized patched style with placeholders (see _build_template)
+    _style_template = None
+    # (host, layer_name) -> style JSON bytes
+    _style_cache = {}
+    _STYLE_CACHE_MAX = 64  # Host header is client-supplied; bound the cache
+
+    _ORIGIN_MARK = '@@USV_ORIGIN@@'
+    _LAYER_MARK = '@@USV_LAYER@@'
+
     @classmethod
     def set_style_path(cls, path):
         cls._base_style_path = path
+        cls._base_style = None
+        cls._style_template = None
+        cls._style_cache = {}
 
-    def initialize(self, node):
-        self._node = node
-
-    def set_default_headers(self):
-        self.set_header('Access-Control-Allow-Origin', '*')
-
-    def get(self, layer_name):
-        _log("MapStyle", "Request for layer '%s' (path=%s)" % (layer_name, MapStyleHandler._base_style_path))
-
-        conn = MBTilesHandler._conns.get(layer_name)
-        if conn is None:
-            _log_w("MapStyle", "Layer '%s' not found in _conns (keys: %s)" % (layer_name, list(MBTilesHandler._conns.keys())))
-            self.set_status(404)
-            self.finish()
-            return
-
-        meta = MBTilesHandler._meta.get(layer_name, {})
-        if meta.get('format', '') != 'pbf':
-            _log_w("MapStyle", "Layer '%s' is not pbf (format=%s)" % (layer_name, meta.get('format')))
-            self.set_status(404)
-            self.finish()
-            return
-
-        if MapStyleHandler._base_style is None:
-            try:
-                with open(MapStyleHandler._base_style_path, 'r', encoding='utf-8') as f:
-                    MapStyleHandler._base_style = json.load(f)
-                _log("MapStyle", "Loaded base style from %s" % MapStyleHandler._base_style_path)
-            except Exception as e:
-                _log_e("MapStyle", "Failed to load base style from '%s': %s" % (MapStyleHandler._base_style_path, e))
-                self.set_status(500)
-                self.finish()
-                return
-
-        style = copy.deepcopy(MapStyleHandler._base_style)
+    @classmethod
+    def _build_template(cls):
+        style = copy.deepcopy(cls._base_style)
+        origin = cls._ORIGIN_MARK
 
         # MapLibre GL requires absolute URLs in tiles[], glyphs, and sprite.
-        # Build them from the Host header so they work on any port / WireGuard IP.
-        host = self.request.host  # e.g. "localhost:8888" or "10.0.0.1:8888"
-        origin = 'http://%s' % host
+        # They are built from the Host header so they work on any port /
+        # WireGuard IP; the origin is substituted per request.
 
         # Patch sources: replace remote MapTiler URL with our local tile server
         style['sources'] = {
             'openmaptiles': {
                 'type': 'vector',
-                'tiles': ['%s/tiles/%s/{z}/{x}/{y}.pbf' % (origin, layer_name)],
+                'tiles': ['%s/tiles/%s/{z}/{x}/{y}.pbf' % (origin, cls._LAYER_MARK)],
                 'minzoom': 0,
                 'maxzoom': 14,
             }
@@ -591,8 +1185,63 @@ class MapStyleHandler(tornado.web.RequestHandler):
             if 'text-font' in layout:
                 layout['text-font'] = ['Open Sans Regular']
 
-        style_json = json.dumps(style, separators=(',', ':'))
-        _log("MapStyle", "Serving style for '%s' (%d bytes, origin=%s)" % (layer_name, len(style_json), origin))
+        return _dumps(style)
+
+    def initialize(self, node):
+        self._node = node
+
+    def set_default_headers(self):
+        self.set_header('Access-Control-Allow-Origin', '*')
+
+    def get(self, layer_name):
+        _log("MapStyle", "Request for layer '%s' (path=%s)" % (layer_name, MapStyleHandler._base_style_path))
+
+        conn = MBTilesHandler._conns.get(layer_name)
+        if conn is None:
+            _log_w("MapStyle", "Layer '%s' not found in _conns (keys: %s)" % (layer_name, list(MBTilesHandler._conns.keys())))
+            self.set_status(404)
+            self.finish()
+            return
+
+        meta = MBTilesHandler._meta.get(layer_name, {})
+        if meta.get('format', '') != 'pbf':
+            _log_w("MapStyle", "Layer '%s' is not pbf (format=%s)" % (layer_name, meta.get('format')))
+            self.set_status(404)
+            self.finish()
+            return
+
+        host = self.request.host  # e.g. "localhost:8888" or "10.0.0.1:8888"
+        key = (host, layer_name)
+        style_json = MapStyleHandler._style_cache.get(key)
+
+        if style_json is None:
+            if MapStyleHandler._base_style is None:
+                try:
+                    with open(MapStyleHandler._base_style_path, 'rb') as f:
+                        MapStyleHandler._base_style = _loads(f.read())
+                    _log("MapStyle", "Loaded base style from %s" % MapStyleHandler._base_style_path)
+                except Exception as e:
+                    _log_e("MapStyle", "Failed to load base style from '%s': %s" % (MapStyleHandler._base_style_path, e))
+                    self.set_status(500)
+                    self.finish()
+                    return
+
+            if MapStyleHandler._style_template is None:
+                MapStyleHandler._style_template = MapStyleHandler._build_template()
+
+            # Placeholders sit inside JSON strings, so substitute JSON-escaped text
+            origin = 'http://%s' % host
+            style_json = MapStyleHandler._style_template.replace(
+                MapStyleHandler._ORIGIN_MARK.encode(), _dumps(origin)[1:-1]
+            ).replace(
+                MapStyleHandler._LAYER_MARK.encode(), _dumps(layer_name)[1:-1]
+            )
+
+            if len(MapStyleHandler._style_cache) >= MapStyleHandler._STYLE_CACHE_MAX:
+                MapStyleHandler._style_cache.clear()
+            MapStyleHandler._style_cache[key] = style_json
+
+        _log("MapStyle", "Serving style for '%s' (%d bytes, host=%s)" % (layer_name, len(style_json), host))
         self.set_header('Content-Type', 'application/json')
         self.set_header('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
         self.write(style_json)
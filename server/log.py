@@ -8,10 +8,23 @@ Colors:
 
 Uses ANSI escape codes. Automatically disables color when output
 is not a terminal (e.g., piped to a file or journald).
+
+The minimum level comes from the USV_LOG_LEVEL environment variable
+(info/warn/error, default info) or set_level(). Callers on hot paths can
+check is_enabled_for(WARN) before formatting a message at all.
 """
 
+import os
 import sys
 
+# Levels
+INFO = 20
+WARN = 30
+ERROR = 40
+
+_LEVEL_NAMES = {"info": INFO, "warn": WARN, "warning": WARN, "error": ERROR}
+_level = _LEVEL_NAMES.get(os.environ.get("USV_LOG_LEVEL", "").strip().lower(), INFO)
+
 # ANSI color codes
 _RESET = "\033[0m"
 _WHITE = "\033[97m"
@@ -23,23 +36,64 @@ _DIM = "\033[90m"
 _USE_COLOR = hasattr(sys.stderr, "isatty") and sys.stderr.isatty()
 
 
-def _c(code, text):
-    """Wrap text in ANSI color if output is a terminal."""
+# Pre-encoded line prefixes/suffixes: "[" tag "] " msg, colored per level
+def _affixes(code, marker):
     if _USE_COLOR:
-        return code + text + _RESET
-    return text
+        return (code + "[").encode(), ("] " + marker).encode(), (_RESET + "\n").encode()
+    return b"[", ("] " + marker).encode(), b"\n"
+
+
+_INFO_AFFIXES = _affixes(_WHITE, "")
+_WARN_AFFIXES = _affixes(_YELLOW, "⚠ ")
+_ERROR_AFFIXES = _affixes(_RED, "✖ ")
+
+
+def _write(affixes, tag, msg):
+    """Write one log line straight to stderr's byte buffer (one write call)."""
+    line = b"".join((
+        affixes[0], tag.encode("utf-8", "replace"),
+        affixes[1], str(msg).encode("utf-8", "replace"),
+        affixes[2],
+    ))
+    stream = sys.stderr
+    buf = getattr(stream, "buffer", None)
+    try:
+        if buf is None:
+            # Replaced stderr (e.g. a test capture) without a byte layer
+            stream.write(line.decode("utf-8"))
+            stream.flush()
+        else:
+            buf.write(line)
+            buf.flush()
+    except (OSError, ValueError):
+        pass
+
+
+def set_level(level):
+    """Set the minimum level that gets printed (INFO, WARN or ERROR)."""
+    global _level
+    _level = level
+
+
+def is_enabled_for(level):
+    """Return True if messages at `level` would be printed."""
+    return level >= _level
 
 
 def info(tag, msg):
     """Info level — white."""
-    print(_c(_WHITE, "[%s] %s" % (tag, msg)), file=sys.stderr, flush=True)
+    if _level > INFO:
+        return
+    _write(_INFO_AFFIXES, tag, msg)
 
 
 def warn(tag, msg):
     """Warning level — yellow."""
-    print(_c(_YELLOW, "[%s] ⚠ %s" % (tag, msg)), file=sys.stderr, flush=True)
+    if _level > WARN:
+        return
+    _write(_WARN_AFFIXES, tag, msg)
 
 
 def error(tag, msg):
     """Error level — red."""
-    print(_c(_RED, "[%s] ✖ %s" % (tag, msg)), file=sys.stderr, flush=True)
+    _write(_ERROR_AFFIXES, tag, msg)
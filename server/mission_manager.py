@@ -21,8 +21,15 @@ mission list on connect and re-renders whenever the list changes.
 
 import json
 import os
+import tempfile
 import threading
 
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 from .log import info as _log_info, warn as _log_warn, error as _log_error
 
 
@@ -40,19 +47,24 @@ class MissionManager:
         self._json_path = os.path.abspath(json_path)
         self._lock = threading.Lock()
         self._missions = []
+        # Compact JSON encoding of get_mission_list_payload(); reset
+        # whenever _missions changes
+        self._payload_bytes = None
         self.load()
 
     def load(self):
         """Load missions from json_path. Creates empty structure if missing or malformed."""
         with self._lock:
+            self._payload_bytes = None
             if not os.path.isfile(self._json_path):
                 _log_info("MissionManager",
                           "missions.json not found at %s — starting empty" % self._json_path)
                 self._missions = []
                 return
             try:
-                with open(self._json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self._json_path, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if _HAS_ORJSON else json.loads(raw)
                 self._missions = data.get('missions', [])
                 _log_info("MissionManager",
                           "Loaded %d mission(s) from %s" % (len(self._missions), self._json_path))
@@ -62,13 +74,41 @@ class MissionManager:
                 self._missions = []
 
     def save(self):
-        """Write current state to json_path. Thread-safe."""
+        """Write current state to json_path. Thread-safe.
+
+        Written to a temporary file in the same directory and renamed over
+        json_path, so readers (and a crash mid-write) never see a partial file.
+        The temporary file takes the existing file's permissions (0644 for a
+        new one) instead of mkstemp's 0600.
+        """
         with self._lock:
+            tmp_path = None
             try:
-                with open(self._json_path, 'w', encoding='utf-8') as f:
-                    json.dump({'missions': self._missions}, f, indent=2)
+                data = {'missions': self._missions}
+                if _HAS_ORJSON:
+                    raw = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+                else:
+                    raw = json.dumps(data, indent=2).encode('utf-8')
+                fd, tmp_path = tempfile.mkstemp(
+                    prefix='.missions-', suffix='.tmp',
+                    dir=os.path.dirname(self._json_path))
+                try:
+                    mode = os.stat(self._json_path).st_mode & 0o7777
+                except OSError:
+                    mode = 0o644
+                with os.fdopen(fd, 'wb') as f:
+                    os.fchmod(f.fileno(), mode)
+                    f.write(raw)
+                os.replace(tmp_path, self._json_path)
+                tmp_path = None
             except Exception as e:
                 _log_error("MissionManager", "Failed to save to %s: %s" % (self._json_path, e))
+            finally:
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
 
     def get_missions(self):
         """Return a copy of the mission list. Thread-safe."""
@@ -78,3 +118,19 @@ class MissionManager:
     def get_mission_list_payload(self):
         """Ready-to-broadcast payload for MSG_MISSIONS ('w') message."""
         return {'missions': self.get_missions()}
+
+    def get_mission_list_bytes(self):
+        """get_mission_list_payload() encoded as compact JSON bytes.
+
+        Encoded once and reused until the mission list changes, so clients
+        connecting in a burst share the same bytes. Thread-safe.
+        """
+        with self._lock:
+            if self._payload_bytes is None:
+                data = {'missions': self._missions}
+                if _HAS_ORJSON:
+                    self._payload_bytes = orjson.dumps(data)
+                else:
+                    self._payload_bytes = json.dumps(
+                        data, separators=(',', ':')).encode('utf-8')
+            return self._payload_bytes
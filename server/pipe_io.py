@@ -0,0 +1,130 @@
+"""
+Shared pipe I/O loop
+
+A single daemon thread multiplexing the output pipes of the encoder
+subprocesses (GStreamer cameras, FFmpeg image-topic encoders) with a
+selector, plus one-shot timers for flush deadlines. The thread is
+started on the first register().
+"""
+
+import heapq
+import os
+import selectors
+import threading
+import time
+
+from .log import error as _log_error
+
+
+def _log_e(msg):
+    _log_error("PipeIO", msg)
+
+
+class PipeIOLoop:
+    """
+    One selector thread servicing the stdout/stderr pipes of every
+    GStreamer and FFmpeg subprocess, instead of blocking reader threads
+    per pipe.
+
+    Callbacks run on the loop thread and must not block:
+        register(fd, callback)      — callback(fd) when fd is readable
+        call_later(delay, callback) — callback() after `delay` seconds
+
+    Other threads must unregister_sync() a pipe before closing it.
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._timers = []  # heap of (deadline, seq, callback)
+        self._timer_seq = 0
+        self._thread = None
+        # Self-pipe so other threads can interrupt a blocking select()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    def register(self, fd, callback):
+        with self._lock:
+            self._selector.register(fd, selectors.EVENT_READ, callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake()
+
+    def unregister(self, fd):
+        with self._lock:
+            try:
+                self._selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+        self._wake()
+
+    def unregister_sync(self, *fds):
+        """
+        Unregister fds on the loop thread and wait until it has done so.
+        Afterwards no callback for them is running or still pending from
+        the last select(), so the caller may close them (and the fd numbers
+        may be reused) without the loop reading the wrong pipe.
+        """
+        if self._thread is None or threading.current_thread() is self._thread:
+            for fd in fds:
+                self.unregister(fd)
+            return
+        done = threading.Event()
+
+        def _unregister():
+            for fd in fds:
+                self.unregister(fd)
+            done.set()
+
+        self.call_later(0, _unregister)
+        if not done.wait(timeout=1):
+            _log_e("Timed out unregistering fds %s" % (fds,))
+
+    def call_later(self, delay, callback):
+        with self._lock:
+            self._timer_seq += 1
+            heapq.heappush(self._timers, (time.monotonic() + delay, self._timer_seq, callback))
+        if threading.current_thread() is not self._thread:
+            self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _run(self):
+        while True:
+            with self._lock:
+                timeout = None
+                if self._timers:
+                    timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            for key, _ in self._selector.select(timeout):
+                if key.data is None:
+                    try:
+                        os.read(self._wake_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                try:
+                    key.data(key.fd)
+                except Exception as e:
+                    _log_e("Pipe I/O callback error: %s" % e)
+                    self.unregister(key.fd)
+
+            now = time.monotonic()
+            due = []
+            with self._lock:
+                while self._timers and self._timers[0][0] <= now:
+                    due.append(heapq.heappop(self._timers)[2])
+            for callback in due:
+                try:
+                    callback()
+                except Exception as e:
+                    _log_e("Pipe I/O timer error: %s" % e)
+
+
+IO_LOOP = PipeIOLoop()
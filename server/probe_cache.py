@@ -0,0 +1,100 @@
+"""
+On-disk cache of encoder probe results.
+
+Probing encoders means spawning FFmpeg / GStreamer and creating GPU
+contexts, several seconds per boot. The result only changes when the
+tool version, its installed plugins or the hardware changes, so it is
+stored under $XDG_CACHE_HOME/usv-web-control/ together with a fingerprint
+of those, and reused while the fingerprint matches.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import platform
+import subprocess
+
+from .log import info as _log_info, warn as _log_warn
+
+
+def _log(msg):
+    _log_info("ProbeCache", msg)
+
+def _log_w(msg):
+    _log_warn("ProbeCache", msg)
+
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "usv-web-control",
+)
+
+
+def fingerprint(version_cmd, plugins_cmd=None):
+    """
+    Fingerprint of everything that decides which encoder works: the output
+    of `version_cmd` (e.g. ["ffmpeg", "-version"]) and, if given,
+    `plugins_cmd` (e.g. ["gst-inspect-1.0"], listing installed elements),
+    CPU architecture, kernel and the GPU device nodes present.
+    Returns None if a command can't be run.
+    """
+    h = hashlib.sha1()
+    for cmd in (version_cmd, plugins_cmd):
+        if cmd is None:
+            continue
+        try:
+            h.update(subprocess.run(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=5,
+            ).stdout)
+        except Exception:
+            return None
+    gpus = sorted(glob.glob("/dev/nvidia*") + glob.glob("/dev/dri/renderD*"))
+    h.update(("%s|%s|%s" % (platform.machine(), platform.release(), ",".join(gpus))).encode())
+    return h.hexdigest()
+
+
+def load(name, key):
+    """Return the value cached under `name` if its key matches, else None."""
+    try:
+        with open(os.path.join(CACHE_DIR, name), "r") as f:
+            data = json.load(f)
+        if data.get("key") == key:
+            return data.get("value")
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def save(name, key, value):
+    """Atomically write `value` (JSON-serialisable) to the cache file `name`."""
+    path = os.path.join(CACHE_DIR, name)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "value": value}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        _log_w("Could not write probe cache %s: %s" % (path, e))
+
+
+def cached_probe(name, version_cmd, probe, plugins_cmd=None):
+    """
+    Return the cached result of `probe()` when the system fingerprint
+    matches, else run it and cache a non-empty result.
+    """
+    key = fingerprint(version_cmd, plugins_cmd)
+    if key:
+        value = load(name, key)
+        if value:
+            _log("%s: using cached %s" % (name, value))
+            return value
+
+    value = probe()
+    if key and value:
+        save(name, key, value)
+    return value
@@ -4,10 +4,13 @@ System Metrics Collector
 Periodically samples CPU and GPU usage and delivers them via a callback.
 Designed to run in its own daemon thread with minimal overhead.
 
-CPU: uses psutil (cross-platform, accurate per-interval measurement).
-GPU: uses nvidia-smi CLI (no pynvml dependency, works on Jetson + desktop).
+CPU: reads /proc/stat directly on Linux (one pread per sample on a kept-open
+     fd); falls back to psutil elsewhere.
+GPU: uses NVML via pynvml when installed (direct driver query, no process
+     spawn); falls back to the nvidia-smi CLI (works on Jetson + desktop).
 """
 
+import os
 import shutil
 import subprocess
 import sys
@@ -20,8 +23,22 @@ try:
 except ImportError:
     _HAS_PSUTIL = False
 
+try:
+    import pynvml
+    pynvml.nvmlInit()
+    _NVML_HANDLE = pynvml.nvmlDeviceGetHandleByIndex(0)
+    _HAS_NVML = True
+except Exception:
+    _HAS_NVML = False
+
 _HAS_NVIDIA_SMI = shutil.which("nvidia-smi") is not None
 
+_PROC_STAT = "/proc/stat"
+_HAS_PROC_STAT = os.path.exists(_PROC_STAT)
+# Large enough for the per-CPU lines of a few hundred cores; the lines
+# after them (intr, ctxt, ...) are not needed
+_PROC_STAT_READ_SIZE = 65536
+
 
 from .log import info as _log_info, warn as _log_warn
 
@@ -29,6 +46,46 @@ def _log(msg):
     _log_info("SystemMetrics", msg)
 
 
+def _read_cpu_times(fd):
+    """
+    Read per-CPU (busy, total) jiffies from an open /proc/stat fd.
+    Busy excludes idle and iowait, matching psutil.cpu_percent().
+    """
+    buf = os.pread(fd, _PROC_STAT_READ_SIZE, 0)
+    times = []
+    # First line is the aggregate "cpu " line; per-CPU "cpuN" lines follow
+    for line in buf.split(b'\n')[1:]:
+        if not line.startswith(b'cpu'):
+            break
+        # user nice system idle iowait irq softirq steal [guest guest_nice];
+        # guest time is already counted in user/nice
+        fields = line.split()[1:9]
+        total = 0
+        for v in fields:
+            total += int(v)
+        idle = int(fields[3]) + int(fields[4])
+        times.append((total - idle, total))
+    return times
+
+
+def _read_gpu_usage_nvml():
+    """
+    Query GPU utilization via NVML (first GPU).
+    Same result shape as _read_gpu_usage(), or None on failure.
+    """
+    try:
+        util = pynvml.nvmlDeviceGetUtilizationRates(_NVML_HANDLE)
+        mem = pynvml.nvmlDeviceGetMemoryInfo(_NVML_HANDLE)
+        return {
+            'gpu_percent': float(util.gpu),
+            'mem_percent': float(util.memory),
+            'mem_used_mb': mem.used / 1048576.0,
+            'mem_total_mb': mem.total / 1048576.0,
+        }
+    except Exception:
+        return None
+
+
 def _read_gpu_usage():
     """
     Query GPU utilization via nvidia-smi.
@@ -70,21 +127,31 @@ class SystemMetricsCollector:
         self.on_metrics = None  # callback(dict)
         self._stopped = False
         self._thread = None
+        self._stat_fd = None
+        self._prev_cpu_times = None
 
-        if not _HAS_PSUTIL:
+        if _HAS_PROC_STAT:
+            _log("/proc/stat available — CPU metrics enabled")
+        elif _HAS_PSUTIL:
+            _log("psutil available — CPU metrics enabled")
+        else:
             _log_warn("SystemMetrics", "psutil not installed — CPU metrics unavailable. "
                       "Install with: pip install psutil")
-        if not _HAS_NVIDIA_SMI:
+        if _HAS_NVML:
+            _log("NVML available — GPU metrics enabled")
+        elif not _HAS_NVIDIA_SMI:
             _log("nvidia-smi not found — GPU metrics unavailable")
         else:
             _log("nvidia-smi found — GPU metrics enabled")
 
-        if _HAS_PSUTIL:
-            _log("psutil available — CPU metrics enabled")
-
     def start(self):
         """Start the collection thread."""
         self._stopped = False
+        if _HAS_PROC_STAT and self._stat_fd is None:
+            try:
+                self._stat_fd = os.open(_PROC_STAT, os.O_RDONLY)
+            except OSError as e:
+                _log_warn("SystemMetrics", "Cannot open %s: %s" % (_PROC_STAT, e))
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
 
@@ -93,8 +160,10 @@ class SystemMetricsCollector:
         self._stopped = True
 
     def _loop(self):
-        # Prime psutil's cpu_percent (first call always returns 0)
-        if _HAS_PSUTIL:
+        # Prime the CPU counters (the first reading has nothing to diff against)
+        if self._stat_fd is not None:
+            self._prev_cpu_times = _read_cpu_times(self._stat_fd)
+        elif _HAS_PSUTIL:
             psutil.cpu_percent(interval=None)
 
         while not self._stopped:
@@ -109,11 +178,35 @@ class SystemMetricsCollector:
                 except Exception:
                     pass
 
+        if self._stat_fd is not None:
+            os.close(self._stat_fd)
+            self._stat_fd = None
+
+    def _collect_cpu_proc_stat(self, data):
+        times = _read_cpu_times(self._stat_fd)
+        prev = self._prev_cpu_times
+        self._prev_cpu_times = times
+        if not times or not prev or len(prev) != len(times):
+            # CPU hotplug changed the line count; report next cycle
+            return
+        per_cpu = []
+        for (busy, total), (prev_busy, prev_total) in zip(times, prev):
+            d_total = total - prev_total
+            if d_total <= 0:
+                per_cpu.append(0.0)
+            else:
+                per_cpu.append(round(100.0 * (busy - prev_busy) / d_total, 1))
+        data['cpu_per_core'] = per_cpu
+        data['cpu_percent'] = sum(per_cpu) / len(per_cpu)
+        data['cpu_count'] = len(per_cpu)
+
     def _collect(self):
         """Collect a single metrics snapshot."""
         data = {}
 
-        if _HAS_PSUTIL:
+        if self._stat_fd is not None:
+            self._collect_cpu_proc_stat(data)
+        elif _HAS_PSUTIL:
             # Only call cpu_percent once per cycle — calling it twice
             # resets the internal counter and corrupts the second reading.
             per_cpu = psutil.cpu_percent(interval=None, percpu=True)
@@ -124,9 +217,13 @@ class SystemMetricsCollector:
                 data['cpu_percent'] = psutil.cpu_percent(interval=None)
             data['cpu_count'] = psutil.cpu_count()
 
-        if _HAS_NVIDIA_SMI:
+        if _HAS_NVML:
+            gpu = _read_gpu_usage_nvml()
+        elif _HAS_NVIDIA_SMI:
             gpu = _read_gpu_usage()
-            if gpu:
-                data.update(gpu)
+        else:
+            gpu = None
+        if gpu:
+            data.update(gpu)
 
         return data if data else None
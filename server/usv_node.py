@@ -10,6 +10,9 @@ Inspired by rosboard's architecture but with bidirectional communication:
 """
 
 import asyncio
+import bisect
+import collections
+import functools
 import importlib
 import math
 import os
@@ -17,6 +20,7 @@ import socket
 import threading
 import time
 import traceback
+from array import array
 
 import tornado
 import tornado.web
@@ -26,7 +30,18 @@ import rclpy
 from rclpy.node import Node
 from rclpy.qos import QoSProfile, QoSReliabilityPolicy, QoSDurabilityPolicy, HistoryPolicy
 
-from sensor_msgs.msg import Joy
+try:
+    from rclpy.serialization import deserialize_message
+    _HAS_RAW_SUBS = True
+except ImportError:
+    _HAS_RAW_SUBS = False
+
+from sensor_msgs.msg import Image, Joy, NavSatFix
+
+try:
+    from numpy import ndarray as _ndarray
+except ImportError:
+    _ndarray = None
 
 from .handlers import USVSocketHandler, NoCacheStaticFileHandler, CORSStaticFileHandler, MBTilesHandler, VectorTileHandler, MapStyleHandler
 from .mission_manager import MissionManager
@@ -40,30 +55,139 @@ from . import log as _clog
 from . import __version__
 
 
-def ros2dict(msg):
-    """
-    Convert a ROS2 message to a Python dict, recursively.
-    Handles nested messages, arrays, and primitive types.
-    """
-    if hasattr(msg, 'get_fields_and_field_types'):
-        result = {}
-        for field_name, field_type in msg.get_fields_and_field_types().items():
-            value = getattr(msg, field_name)
-            result[field_name] = ros2dict(value)
-        return result
-    elif isinstance(msg, (list, tuple)):
-        return [ros2dict(item) for item in msg]
-    elif isinstance(msg, bytes):
+def _value2py(value):
+    """Generic conversion for a field whose type has no dedicated converter."""
+    if hasattr(value, 'get_fields_and_field_types'):
+        return ros2dict(value)
+    elif isinstance(value, (list, tuple)):
+        return [_value2py(item) for item in value]
+    elif isinstance(value, bytes):
         # uint8[] comes as bytes in ROS2
-        return list(msg)
-    elif isinstance(msg, (int, float, str, bool)):
-        return msg
+        return list(value)
+    elif isinstance(value, (int, float, str, bool)):
+        return value
     else:
         # numpy arrays, etc.
         try:
-            return msg.tolist()
+            return value.tolist()
         except AttributeError:
-            return str(msg)
+            return str(value)
+
+
+def _identity(value):
+    return value
+
+
+def _array2list(value):
+    # Numeric arrays arrive as numpy arrays (fixed size) or array.array
+    # (sequences). Both are left for the serializer: orjson writes numpy
+    # arrays directly, msgpack sends them as typed-array ext blobs, and the
+    # other fallbacks call tolist() themselves.
+    if type(value) is _ndarray or type(value) is array:
+        return value
+    try:
+        return value.tolist()
+    except AttributeError:
+        return list(value)
+
+
+def _msg_array2list(value):
+    return [ros2dict(item) for item in value]
+
+
+# rosidl scalar types that rclpy hands back as plain Python values
+_SCALAR_TYPES = frozenset((
+    'boolean', 'char', 'float', 'double', 'string', 'wstring',
+    'int8', 'uint8', 'int16', 'uint16', 'int32', 'uint32', 'int64', 'uint64',
+))
+_NUMERIC_TYPES = _SCALAR_TYPES - {'string', 'wstring'}
+
+
+def _field_converter(field_type):
+    """Pick the converter for a field from its rosidl type string, e.g.
+    'double', 'string<=8', 'float64[9]', 'sequence<int32, 4>',
+    'std_msgs/Header', 'sequence<geometry_msgs/Point>'."""
+    is_array = False
+    base = field_type
+    if base.startswith('sequence<'):
+        is_array = True
+        base = base[len('sequence<'):-1].split(',')[0].strip()
+    elif base.endswith(']'):
+        is_array = True
+        base = base[:base.index('[')]
+    base = base.split('<=')[0]
+
+    if '/' in base:
+        return _msg_array2list if is_array else ros2dict
+    if is_array:
+        return _array2list if base in _NUMERIC_TYPES else _value2py
+    return _identity if base in _SCALAR_TYPES else _value2py
+
+
+# Message class -> ((field_name, converter), ...), built on first use
+_FIELD_CONVERTERS = {}
+
+
+def ros2dict(msg):
+    """
+    Convert a ROS2 message to a Python dict, recursively.
+    Handles nested messages, arrays, and primitive types.
+
+    The field list and a converter per field are worked out once per
+    message class, so each message is a flat loop of getattr + convert.
+    """
+    converters = _FIELD_CONVERTERS.get(type(msg))
+    if converters is None:
+        if not hasattr(msg, 'get_fields_and_field_types'):
+            return _value2py(msg)
+        converters = _FIELD_CONVERTERS[type(msg)] = tuple(
+            (field_name, _field_converter(field_type))
+            for field_name, field_type in msg.get_fields_and_field_types().items()
+        )
+    return {name: convert(getattr(msg, name)) for name, convert in converters}
+
+
+# Topic types routed to the H.264 pipeline instead of JSON
+IMAGE_TOPIC_TYPES = frozenset(("sensor_msgs/msg/Image",))
+
+# Dummy GPS track: a Lissajous figure-8 (lat uses sin(2θ), lng uses sin(θ))
+# around an anchor near the centre of the sample mission (Riga area), with a
+# drift radius of ~40 m. The path is fixed, so it is baked once into a table
+# of _DUMMY_GPS_STEPS positions per _DUMMY_GPS_PERIOD seconds.
+_DUMMY_GPS_PERIOD = 60.0
+_DUMMY_GPS_STEPS = 720
+
+
+def _dummy_gps_track(anchor_lat=56.9530, anchor_lng=24.1020,
+                     radius_lat=0.00035, radius_lng=0.00055):
+    track = []
+    for i in range(_DUMMY_GPS_STEPS):
+        phase = 2 * math.pi * i / _DUMMY_GPS_STEPS
+        track.append((anchor_lat + radius_lat * math.sin(2 * phase),
+                      anchor_lng + radius_lng * math.sin(phase)))
+    return tuple(track)
+
+
+_DUMMY_GPS_TRACK = _dummy_gps_track()
+
+# Frame rates _detect_fps() snaps to (sorted, for bisect)
+_COMMON_FPS = (10, 15, 20, 24, 25, 30, 50, 60, 90, 120)
+
+
+class _ImageState:
+    """Per-topic FPS detection and throttle state for an image topic.
+    Every field is touched on each frame, so one object beats a dict per
+    field."""
+
+    __slots__ = ('last_feed', 'frame_count', 'window_start', 'detected_fps',
+                 'last_restart')
+
+    def __init__(self):
+        self.last_feed = 0.0        # time.monotonic() of last fed frame
+        self.frame_count = 0        # frames since window_start
+        self.window_start = None    # start of the current FPS measurement
+        self.detected_fps = None    # detected source FPS (int), once known
+        self.last_restart = 0.0     # last FFmpeg crash restart
 
 
 class USVWebNode(Node):
@@ -121,6 +245,7 @@ class USVWebNode(Node):
 
         # Open SQLite connections for all offline layers at startup
         MBTilesHandler.open_layers(self.map_layers)
+        USVSocketHandler.refresh_map_layers(self)
 
         # Set path to the Positron base style JSON for vector tile styling
         _style_path = os.path.join(
@@ -130,35 +255,51 @@ class USVWebNode(Node):
 
         # --- Joy publisher ---
         self.joy_pub = self.create_publisher(Joy, self.joy_topic, 10)
-        self.last_joy_time = 0.0
-        self.joy_min_interval = 1.0 / 60.0  # max 60Hz publish rate
+        # Throttle deadlines are integer time.monotonic_ns() values
+        self.joy_min_interval_ns = 1000000000 // 60  # max 60Hz publish rate
+        self._next_joy_ns = 0
 
         # --- Topic subscription management (rosboard-style) ---
         # Remote subs: dict of topic_name -> set of socket UUIDs
         self.remote_subs = {}
         # Local ROS subscribers: dict of topic_name -> Subscription
         self.local_subs = {}
-        # Throttle intervals per topic
-        self.update_intervals_by_topic = {}
-        # Last data time per topic
-        self.last_data_times_by_topic = {}
+        # Throttle interval per topic (ns; fastest subscriber's rate)
+        self.update_intervals_ns_by_topic = {}
+        # time.monotonic_ns() before which a topic's next message is dropped
+        self.next_data_ns_by_topic = {}
+
+        # Serialized messages from raw subscriptions, converted to dicts on
+        # the conversion thread instead of the rclpy executor. Oldest
+        # entries are dropped if conversion falls behind.
+        self._raw_msg_queue = collections.deque(maxlen=256)
+        self._raw_msg_ready = threading.Event()
 
         # All known topics
         self.all_topics = {}
+        # msg_type string -> message class (or None if it failed to import)
+        self._msg_class_cache = {
+            "sensor_msgs/msg/Image": Image,
+            "sensor_msgs/msg/Joy": Joy,
+            "sensor_msgs/msg/NavSatFix": NavSatFix,
+        }
 
         # H.264 video streams: topic_name -> H264Stream instance
         self.video_streams = {}
-        self.image_topic_types = {"sensor_msgs/msg/Image"}
         self.default_video_fps = 30  # initial guess before auto-detection kicks in
+        # FFmpeg encoders are probed on first use (see video_encoder); warm
+        # the probe in the background so the first image frame needn't wait
+        threading.Thread(target=get_encoder, daemon=True).start()
+        self.gst_encoder_label = get_gst_encoder() or "gstreamer"
 
-        # FPS auto-detection: track frame arrival timestamps per topic
-        self._frame_timestamps = {}  # topic_name -> list of recent timestamps
-        self._detected_fps = {}      # topic_name -> detected FPS (int)
-        self._FPS_WINDOW = 30        # number of frames to average over
+        # FPS auto-detection and frame throttling state per image topic
+        self._image_state = {}  # topic_name -> _ImageState
 
-        # Image frame throttling: only copy/feed frames at the target FPS
-        self._last_image_feed_time = {}   # topic_name -> time.monotonic() of last fed frame
-        self._image_frame_count = {}      # topic_name -> total frames received (for FPS detection sampling)
+        # Outbound H.264 frames from encoder reader threads. Drained on the
+        # Tornado loop in batches, so a burst of chunks costs one wakeup.
+        self._video_queue = collections.deque()
+        self._video_drain_scheduled = False
+        self._VIDEO_DRAIN_MAX = 128  # frames handled per drain callback
 
         # --- Per-stream video settings overrides (from browser) ---
         # topic_name -> {"fps": int, "quality": str}  (0 fps = auto)
@@ -196,10 +337,9 @@ class USVWebNode(Node):
         # --- GPS auto-subscription state ---
         self._gps_topic = None           # name of currently subscribed NavSatFix topic
         self._gps_sub = None             # rclpy Subscription
-        self._last_gps_broadcast = 0.0   # monotonic time of last GPS broadcast
+        self._next_gps_broadcast_ns = 0  # monotonic_ns before which GPS is not re-broadcast
         self.NAV_SAT_FIX_TYPE = "sensor_msgs/msg/NavSatFix"
 
-        self.lock = threading.Lock()
 
         # --- Tornado web server ---
         static_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'frontend')
@@ -242,11 +382,16 @@ class USVWebNode(Node):
         self.metrics_collector.on_metrics = self._on_system_metrics
         self.metrics_collector.start()
 
+        # Subscription sync runs on the executor: periodically for topics
+        # appearing in the graph, and on demand via request_sync()
+        self._sync_timer = self.create_timer(self.SYNC_INTERVAL, self.sync_subs)
+        self._sync_guard = self.create_guard_condition(self.sync_subs)
+
         # Start threads
         threading.Thread(target=self.event_loop.start, daemon=True).start()
-        threading.Thread(target=self.sync_subs_loop, daemon=True).start()
-        threading.Thread(target=self.pingpong_loop, daemon=True).start()
-        threading.Thread(target=self._dummy_gps_loop, daemon=True).start()
+        self.event_loop.add_callback(self._start_periodic_callbacks)
+        if _HAS_RAW_SUBS:
+            threading.Thread(target=self._raw_msg_loop, daemon=True).start()
 
         self.loginfo("USV Web Control listening on :%d" % self.port)
 
@@ -269,8 +414,8 @@ class USVWebNode(Node):
         Called by WebSocket handler when browser sends joystick data.
         data = {"axes": [float, ...], "buttons": [int, ...]}
         """
-        t = time.time()
-        if t - self.last_joy_time < self.joy_min_interval:
+        t_ns = time.monotonic_ns()
+        if t_ns < self._next_joy_ns:
             return  # throttle
 
         axes = data.get("axes", [])
@@ -283,11 +428,33 @@ class USVWebNode(Node):
         msg.buttons = [int(b) for b in buttons]
 
         self.joy_pub.publish(msg)
-        self.last_joy_time = t
+        self._next_joy_ns = t_ns + self.joy_min_interval_ns
+
+    # --- FFmpeg encoder (probed on first use, then fixed for the process) ---
+    @functools.cached_property
+    def video_encoder(self):
+        return get_encoder()
+
+    @functools.cached_property
+    def max_video_fps(self):
+        return get_max_fps()
 
     # --- Topic subscription management ---
     def get_msg_class(self, msg_type):
-        """Import and return a ROS2 message class from its type string."""
+        """Import and return a ROS2 message class from its type string.
+
+        Results (including failures) are cached, so a type is resolved and
+        logged once rather than on every sync cycle.
+        """
+        try:
+            return self._msg_class_cache[msg_type]
+        except KeyError:
+            pass
+        msg_class = self._import_msg_class(msg_type)
+        self._msg_class_cache[msg_type] = msg_class
+        return msg_class
+
+    def _import_msg_class(self, msg_type):
         try:
             msg_module, _, msg_class_name = msg_type.replace("/", ".").rpartition(".")
         except ValueError:
@@ -302,8 +469,33 @@ class USVWebNode(Node):
             self.logerr("Could not import %s: %s" % (msg_type, str(e)))
             return None
 
-    def get_topic_qos(self, topic_name):
-        """Match the QoS of existing publishers on a topic."""
+    # Image subscriptions keep only the newest frame and never ask for
+    # retransmits, whatever the publisher offers: frames the callback cannot
+    # keep up with are overwritten in the middleware instead of queueing up
+    # (and being converted to Python objects) only to be throttled away.
+    # Best-effort readers match both reliable and best-effort publishers.
+    IMAGE_QOS = QoSProfile(
+        depth=1,
+        history=HistoryPolicy.KEEP_LAST,
+        reliability=QoSReliabilityPolicy.BEST_EFFORT,
+        durability=QoSDurabilityPolicy.VOLATILE,
+    )
+
+    # Fixed QoS for message types whose consumers only want the latest
+    # sample (GPS is throttled to 2 Hz); no publisher lookup needed
+    KNOWN_QOS = {
+        "sensor_msgs/msg/Image": IMAGE_QOS,
+        "sensor_msgs/msg/NavSatFix": IMAGE_QOS,
+    }
+
+    def get_topic_qos(self, topic_name, topic_type=None):
+        """Match the QoS of existing publishers on a topic.
+
+        Types listed in KNOWN_QOS skip the DDS graph query.
+        """
+        qos = self.KNOWN_QOS.get(topic_type)
+        if qos is not None:
+            return qos
         topic_info = self.get_publishers_info_by_topic(topic_name)
         if topic_info:
             qos = topic_info[0].qos_profile
@@ -316,47 +508,58 @@ class USVWebNode(Node):
             durability=QoSDurabilityPolicy.VOLATILE,
         )
 
-    def pingpong_loop(self):
-        while rclpy.ok():
-            time.sleep(1)
-            if self.event_loop:
-                try:
-                    self.event_loop.add_callback(USVSocketHandler.send_pings)
-                except Exception as e:
-                    self.logwarn(str(e))
+    def _start_periodic_callbacks(self):
+        """Start the 1 Hz ping and dummy-GPS timers (Tornado thread).
+
+        PeriodicCallback binds to the current IOLoop, so this runs as a
+        callback on the loop rather than from __init__.
+        """
+        self._dummy_gps_t0 = time.monotonic()
+        self._periodic_callbacks = [
+            tornado.ioloop.PeriodicCallback(USVSocketHandler.send_pings, 1000),
+            tornado.ioloop.PeriodicCallback(self._dummy_gps_tick, 1000),
+        ]
+        for callback in self._periodic_callbacks:
+            callback.start()
+
+    # Longest time between topic graph refreshes; subscription changes
+    # from clients trigger one immediately via request_sync()
+    SYNC_INTERVAL = 1.0
 
-    def sync_subs_loop(self):
-        while rclpy.ok():
-            time.sleep(1)
-            self.sync_subs()
+    def request_sync(self):
+        """Ask the executor to run sync_subs() now (any thread, non-blocking)."""
+        self._sync_guard.trigger()
 
     def sync_subs(self):
-        self.lock.acquire()
+        """Refresh the topic list and create/destroy ROS subscriptions.
+
+        Runs only on the rclpy executor thread (timer + guard condition), so
+        subscription state needs no lock. remote_subs is mutated by the
+        Tornado thread and is therefore only read through snapshots here.
+        """
         try:
             # Refresh topic list
             topic_list = self.get_topic_names_and_types()
-            self.all_topics = {}
+            all_topics = {}
             for topic_name, topic_types in topic_list:
                 if topic_types:
-                    self.all_topics[topic_name] = topic_types[0]
-
-            # Broadcast topic list to all clients
-            if self.event_loop:
-                self.event_loop.add_callback(
-                    USVSocketHandler.broadcast,
-                    [USVSocketHandler.MSG_TOPICS, self.all_topics]
-                )
+                    all_topics[topic_name] = topic_types[0]
+            # Broadcast the topic list only when the graph changed; new
+            # clients get the current list in open(). The camera list is
+            # fixed after startup and is only sent on connect.
+            if all_topics != self.all_topics:
+                self.all_topics = all_topics
+                if self.event_loop:
+                    self.event_loop.add_callback(
+                        USVSocketHandler.broadcast,
+                        [USVSocketHandler.MSG_TOPICS, all_topics]
+                    )
 
-            # Broadcast camera list to all clients
-            if self.event_loop and self.cameras_available:
-                self.event_loop.add_callback(
-                    USVSocketHandler.broadcast,
-                    [USVSocketHandler.MSG_CAMERAS, self.cameras_available]
-                )
+            remote_subs = list(self.remote_subs.items())
 
             # Create subscribers for topics that clients want
-            for topic_name in self.remote_subs:
-                if len(self.remote_subs[topic_name]) == 0:
+            for topic_name, subs in remote_subs:
+                if len(subs) == 0:
                     continue
                 if topic_name not in self.all_topics:
                     continue
@@ -368,31 +571,42 @@ class USVWebNode(Node):
                 if msg_class is None:
                     continue
 
-                self.last_data_times_by_topic[topic_name] = 0.0
+                self.next_data_ns_by_topic[topic_name] = 0
                 self.loginfo("Subscribing to %s [%s]" % (topic_name, topic_type))
 
-                qos = self.get_topic_qos(topic_name)
-
-                if topic_type in self.image_topic_types:
+                if topic_type in IMAGE_TOPIC_TYPES:
                     # Image topics use FFmpeg H.264 encoding pipeline
                     self.local_subs[topic_name] = self.create_subscription(
                         msg_class,
                         topic_name,
-                        lambda msg, tn=topic_name: self.on_image_msg(msg, tn),
-                        qos_profile=qos,
+                        functools.partial(self.on_image_msg, topic_name=topic_name),
+                        qos_profile=self.get_topic_qos(topic_name, topic_type),
+                    )
+                elif _HAS_RAW_SUBS:
+                    # Normal topics use ros2dict + JSON broadcast. rclpy hands
+                    # over the serialized bytes; throttled messages are never
+                    # deserialized and the rest are converted off-executor.
+                    self.local_subs[topic_name] = self.create_subscription(
+                        msg_class,
+                        topic_name,
+                        functools.partial(self.on_raw_ros_msg, topic_name=topic_name,
+                                          topic_type=topic_type, msg_class=msg_class),
+                        qos_profile=self.get_topic_qos(topic_name),
+                        raw=True,
                     )
                 else:
-                    # Normal topics use ros2dict + JSON broadcast
                     self.local_subs[topic_name] = self.create_subscription(
                         msg_class,
                         topic_name,
-                        lambda msg, tn=topic_name, tt=topic_type: self.on_ros_msg(msg, tn, tt),
-                        qos_profile=qos,
+                        functools.partial(self.on_ros_msg, topic_name=topic_name,
+                                          topic_type=topic_type),
+                        qos_profile=self.get_topic_qos(topic_name),
                     )
 
             # Clean up subs nobody wants anymore
+            wanted = {topic_name for topic_name, subs in remote_subs if len(subs) > 0}
             for topic_name in list(self.local_subs.keys()):
-                if topic_name not in self.remote_subs or len(self.remote_subs[topic_name]) == 0:
+                if topic_name not in wanted:
                     self.loginfo("Unsubscribing from %s" % topic_name)
                     self.destroy_subscription(self.local_subs[topic_name])
                     del self.local_subs[topic_name]
@@ -401,10 +615,7 @@ class USVWebNode(Node):
                         self.video_streams[topic_name].stop()
                         del self.video_streams[topic_name]
                     # Clean up FPS tracking and throttle state
-                    self._frame_timestamps.pop(topic_name, None)
-                    self._detected_fps.pop(topic_name, None)
-                    self._image_frame_count.pop(topic_name, None)
-                    self._last_image_feed_time.pop(topic_name, None)
+                    self._image_state.pop(topic_name, None)
 
             # Auto-subscribe to NavSatFix for the map panel
             self._maybe_subscribe_gps()
@@ -412,13 +623,11 @@ class USVWebNode(Node):
         except Exception as e:
             self.logwarn("sync_subs error: %s" % str(e))
             traceback.print_exc()
-        finally:
-            self.lock.release()
 
     def _maybe_subscribe_gps(self):
         """
         Auto-subscribe to the first NavSatFix topic found in all_topics.
-        Called from sync_subs() (already under self.lock).
+        Called from sync_subs() (rclpy executor thread).
         Cleans up stale subscription if the topic disappeared.
         """
         if self._gps_sub is not None:
@@ -436,11 +645,11 @@ class USVWebNode(Node):
                 msg_class = self.get_msg_class(topic_type)
                 if msg_class is None:
                     continue
-                qos = self.get_topic_qos(topic_name)
+                qos = self.get_topic_qos(topic_name, topic_type)
                 self._gps_sub = self.create_subscription(
                     msg_class,
                     topic_name,
-                    lambda msg, tn=topic_name: self._on_gps_msg(msg, tn),
+                    functools.partial(self._on_gps_msg, topic_name=topic_name),
                     qos_profile=qos,
                 )
                 self._gps_topic = topic_name
@@ -452,10 +661,10 @@ class USVWebNode(Node):
         Handle sensor_msgs/NavSatFix. Broadcast lat/lng to all clients as a 'g' message.
         Rate-limited to 2 Hz — the map doesn't need faster updates.
         """
-        now = time.monotonic()
-        if now - self._last_gps_broadcast < 0.5:  # 2 Hz max
+        now_ns = time.monotonic_ns()
+        if now_ns < self._next_gps_broadcast_ns:
             return
-        self._last_gps_broadcast = now
+        self._next_gps_broadcast_ns = now_ns + 500000000  # 2 Hz max
 
         payload = {
             "lat": msg.latitude,
@@ -474,7 +683,7 @@ class USVWebNode(Node):
                 [USVSocketHandler.MSG_GPS_POS, payload]
             )
 
-    def _detect_fps(self, topic_name):
+    def _detect_fps(self, st, topic_name, now):
         """
         Auto-detect source FPS from message arrival rate.
         Uses a simple counter + two timestamps approach: counts frames between
@@ -485,51 +694,49 @@ class USVWebNode(Node):
 
         Returns int FPS or default.
         """
-        now = time.monotonic()
-
         # Count every frame
-        count = self._image_frame_count.get(topic_name, 0) + 1
-        self._image_frame_count[topic_name] = count
+        count = st.frame_count = st.frame_count + 1
+        prev = st.detected_fps
 
         # Record start timestamp on first frame
-        if topic_name not in self._frame_timestamps:
-            self._frame_timestamps[topic_name] = now
-            return self._detected_fps.get(topic_name, self.default_video_fps)
+        if st.window_start is None:
+            st.window_start = now
+            return prev or self.default_video_fps
 
         # Only recompute FPS after enough time has passed (at least 1 second)
         # This avoids wildly wrong readings from message bursts at startup
-        start_time = self._frame_timestamps[topic_name]
-        elapsed = now - start_time
+        elapsed = now - st.window_start
         if elapsed < 1.0:
-            return self._detected_fps.get(topic_name, self.default_video_fps)
+            return prev or self.default_video_fps
 
         # count-1 intervals in elapsed seconds (frame 1 set the timestamp,
         # so we've seen count-1 inter-frame gaps since then)
         raw_fps = (count - 1) / elapsed
 
         # Reset checkpoint for next measurement
-        self._frame_timestamps[topic_name] = now
-        self._image_frame_count[topic_name] = 1  # this frame is the new "frame 1"
+        st.window_start = now
+        st.frame_count = 1  # this frame is the new "frame 1"
 
-        # Round to nearest common FPS value for stability
-        common_fps = [10, 15, 20, 24, 25, 30, 50, 60, 90, 120]
-        nearest = min(common_fps, key=lambda f: abs(f - raw_fps))
+        # Round to nearest common FPS value for stability (ties go low)
+        i = bisect.bisect_left(_COMMON_FPS, raw_fps)
+        lo = _COMMON_FPS[max(0, i - 1)]
+        hi = _COMMON_FPS[min(len(_COMMON_FPS) - 1, i)]
+        nearest = hi if hi - raw_fps < raw_fps - lo else lo
 
         # Clamp to reasonable range
         nearest = max(5, min(120, nearest))
 
         # Hysteresis: stick with current value unless raw FPS deviates by >20%.
         # This prevents bouncing between adjacent values (e.g. 20↔24 at 22fps).
-        prev = self._detected_fps.get(topic_name)
         if prev is not None and abs(raw_fps - prev) / prev < 0.20:
             detected = prev  # keep current — not enough change to switch
         else:
             detected = nearest
 
-        if topic_name not in self._detected_fps or self._detected_fps[topic_name] != detected:
+        if prev != detected:
             self.loginfo("Detected source FPS for %s: %d (raw: %.1f)" % (topic_name, detected, raw_fps))
 
-        self._detected_fps[topic_name] = detected
+        st.detected_fps = detected
         return detected
 
     def on_image_msg(self, msg, topic_name):
@@ -542,93 +749,140 @@ class USVWebNode(Node):
         if we don't throttle first.
         """
         now = time.monotonic()
+        st = self._image_state.get(topic_name)
+        if st is None:
+            st = self._image_state[topic_name] = _ImageState()
 
         # --- Lightweight FPS detection (just counts + occasional timestamp) ---
-        source_fps = self._detect_fps(topic_name)
+        source_fps = self._detect_fps(st, topic_name, now)
+
+        stream = self.video_streams.get(topic_name)
 
         # --- Determine target FPS (capped by encoder capability) ---
-        max_fps = get_max_fps()
+        max_fps = stream.max_fps if stream is not None else self.max_video_fps
         target_fps = min(source_fps, max_fps)
         min_interval = 1.0 / target_fps
 
         # --- Throttle BEFORE the expensive bytes() copy ---
-        last_feed = self._last_image_feed_time.get(topic_name, 0.0)
-        if now - last_feed < min_interval - 0.001:  # 1ms tolerance
+        if now - st.last_feed < min_interval - 0.001:  # 1ms tolerance
             return  # skip this frame entirely — no copy, no work
 
-        self._last_image_feed_time[topic_name] = now
+        st.last_feed = now
 
         # --- Now it's worth doing the expensive work ---
         width = msg.width
         height = msg.height
         encoding = msg.encoding
-        raw_data = bytes(msg.data)
-
-        stream = self.video_streams.get(topic_name)
+        # msg.data is an array.array('B'): wrap it instead of copying. The
+        # view keeps the message buffer alive until the writer thread is
+        # done with it, and rclpy never reuses a delivered message.
+        try:
+            raw_data = memoryview(msg.data).cast('B')
+        except TypeError:
+            raw_data = bytes(msg.data)
 
         # Respect FPS override from browser (0 = auto)
         settings = self._video_settings.get(topic_name, {})
         fps_override = settings.get("fps", 0)
         if fps_override > 0:
-            target_fps = min(fps_override, get_max_fps())
+            target_fps = min(fps_override, max_fps)
         quality = settings.get("quality", "medium")
 
         if stream is None:
             # First frame — lazily spawn FFmpeg (need dimensions from message)
             self.loginfo("Starting video stream for %s: %dx%d @ %dfps (source: %dfps, encoder: %s)"
-                         % (topic_name, width, height, target_fps, source_fps, get_encoder()))
+                         % (topic_name, width, height, target_fps, source_fps, self.video_encoder))
             stream = H264Stream(
                 topic_name, width, height, target_fps, encoding, quality=quality
             )
-            stream.on_data = lambda data: self._send_video_binary(data)
+            stream.on_data = self._send_video_binary
             self.video_streams[topic_name] = stream
-            self._send_video_meta(topic_name, target_fps, width, height)
+            self._send_video_meta(topic_name, target_fps, width, height, encoder=stream.encoder)
         elif not stream.alive:
             # FFmpeg crashed — restart (with cooldown to prevent tight restart loops)
-            last_restart = getattr(stream, '_last_restart_time', 0.0)
-            if now - last_restart < 2.0:
+            if now - st.last_restart < 2.0:
                 return  # wait before trying again
-            stream._last_restart_time = now
+            st.last_restart = now
             self.loginfo("FFmpeg crashed for %s, restarting..." % topic_name)
             stream.restart(width, height, target_fps, encoding, quality=quality)
-            stream.on_data = lambda data: self._send_video_binary(data)
-            self._send_video_meta(topic_name, target_fps, width, height)
-        elif stream.width != width or stream.height != height or stream.encoding != encoding:
+            self._send_video_meta(topic_name, target_fps, width, height, encoder=stream.encoder)
+        elif stream.params != (width, height, encoding):
             # Resolution or encoding changed — restart
             self.loginfo("Image params changed for %s, restarting FFmpeg" % topic_name)
             stream.restart(width, height, target_fps, encoding, quality=quality)
-            stream.on_data = lambda data: self._send_video_binary(data)
-            self._send_video_meta(topic_name, target_fps, width, height)
+            self._send_video_meta(topic_name, target_fps, width, height, encoder=stream.encoder)
         elif stream.fps != target_fps:
             # FPS changed (auto-detection updated or override applied) — restart
             self.loginfo("FPS changed for %s: %d -> %d, restarting FFmpeg" % (topic_name, stream.fps, target_fps))
             stream.restart(width, height, target_fps, encoding, quality=quality)
-            stream.on_data = lambda data: self._send_video_binary(data)
-            self._send_video_meta(topic_name, target_fps, width, height)
+            self._send_video_meta(topic_name, target_fps, width, height, encoder=stream.encoder)
 
         stream.feed_frame(raw_data)
 
     def _send_video_meta(self, topic_name, fps, width, height, encoder=None, passthrough=False):
-        """Send video stream metadata to all browser clients."""
-        if self.event_loop:
-            self.event_loop.add_callback(
-                USVSocketHandler.broadcast,
-                [USVSocketHandler.MSG_VIDEO_META, {
-                    "topic": topic_name,
-                    "fps": fps,
-                    "width": width,
-                    "height": height,
-                    "encoder": encoder or get_encoder(),
-                    "passthrough": passthrough,
-                }]
-            )
+        """Send video stream metadata to all browser clients.
+
+        Goes through the video queue rather than its own IOLoop callback, so
+        it is delivered in the same drain as (and always before) the
+        stream's first frames.
+        """
+        self._queue_video_item([USVSocketHandler.MSG_VIDEO_META, {
+            "topic": topic_name,
+            "fps": fps,
+            "width": width,
+            "height": height,
+            "encoder": encoder or self.video_encoder,
+            "passthrough": passthrough,
+        }])
 
     def _send_video_binary(self, binary_frame):
-        """Deliver H.264 binary frame to Tornado event loop for broadcasting."""
-        if self.event_loop:
-            self.event_loop.add_callback(
-                USVSocketHandler.broadcast_binary, binary_frame
-            )
+        """Queue an H.264 binary frame for broadcasting (any thread)."""
+        self._queue_video_item(binary_frame)
+
+    def _queue_video_item(self, item):
+        # item: binary frame (bytes) or a [type, payload] message (list)
+        self._video_queue.append(item)
+        if not self._video_drain_scheduled and self.event_loop:
+            self._video_drain_scheduled = True
+            self.event_loop.add_callback(self._drain_video_queue)
+
+    def _drain_video_queue(self):
+        """Broadcast queued video frames and metadata (Tornado thread).
+
+        Consecutive frames for the same topic are merged into one binary
+        frame so each client gets one WebSocket message per run.
+        """
+        # Clear the flag before popping: a frame queued after this point
+        # either gets popped below or schedules a fresh drain.
+        self._video_drain_scheduled = False
+        queue = self._video_queue
+        frames = []
+        for _ in range(min(len(queue), self._VIDEO_DRAIN_MAX)):
+            frames.append(queue.popleft())
+        if queue:
+            self._video_drain_scheduled = True
+            self.event_loop.add_callback(self._drain_video_queue)
+
+        i = 0
+        while i < len(frames):
+            first = frames[i]
+            if type(first) is list:
+                USVSocketHandler.broadcast(first)
+                i += 1
+                continue
+            header = first[:first[0] + 1]
+            j = i + 1
+            while j < len(frames) and type(frames[j]) is not list \
+                    and frames[j].startswith(header):
+                j += 1
+            if j - i == 1:
+                USVSocketHandler.broadcast_binary(first)
+            else:
+                n = len(header)
+                USVSocketHandler.broadcast_binary(
+                    b"".join([first] + [memoryview(f)[n:] for f in frames[i + 1:j]])
+                )
+            i = j
 
     # --- GStreamer camera management ---
     def on_camera_subscribe(self, camera_id, socket_id):
@@ -649,8 +903,10 @@ class USVWebNode(Node):
         self.sync_camera_streams()
 
     def sync_camera_streams(self):
-        """Start/stop GStreamer camera streams based on client subscriptions."""
-        self.lock.acquire()
+        """Start/stop GStreamer camera streams based on client subscriptions.
+
+        Called on the Tornado thread only (camera sub/unsub, disconnect).
+        """
         try:
             # Start streams for cameras that have subscribers
             for camera_id, subs in self.camera_remote_subs.items():
@@ -665,7 +921,7 @@ class USVWebNode(Node):
                     continue
                 self.loginfo("Starting camera stream: %s" % camera_id)
                 stream = GStreamerStream(camera_id, config)
-                stream.on_data = lambda data: self._send_video_binary(data)
+                stream.on_data = self._send_video_binary
                 self.camera_streams[camera_id] = stream
                 # Send video metadata to browser
                 info = self.cameras_available.get(camera_id, {})
@@ -674,7 +930,7 @@ class USVWebNode(Node):
                     info.get("fps", 30),
                     info.get("width", 0),
                     info.get("height", 0),
-                    encoder=get_gst_encoder() or "gstreamer",
+                    encoder=self.gst_encoder_label,
                     passthrough=info.get("passthrough", False),
                 )
 
@@ -689,8 +945,6 @@ class USVWebNode(Node):
         except Exception as e:
             self.logwarn("sync_camera_streams error: %s" % str(e))
             traceback.print_exc()
-        finally:
-            self.lock.release()
 
     def on_video_settings(self, topic, fps, quality):
         """
@@ -709,12 +963,14 @@ class USVWebNode(Node):
         # --- ROS2 image topic (FFmpeg pipeline) ---
         if topic in self.video_streams:
             stream = self.video_streams[topic]
-            target_fps = fps if fps > 0 else self._detected_fps.get(topic, self.default_video_fps)
-            target_fps = min(target_fps, get_max_fps())
+            st = self._image_state.get(topic)
+            detected = st.detected_fps if st is not None else None
+            target_fps = fps if fps > 0 else (detected or self.default_video_fps)
+            target_fps = min(target_fps, stream.max_fps)
             stream.restart(stream.width, stream.height, target_fps, stream.encoding,
                            quality=quality)
-            stream.on_data = lambda data: self._send_video_binary(data)
-            self._send_video_meta(topic, target_fps, stream.width, stream.height)
+            self._send_video_meta(topic, target_fps, stream.width, stream.height,
+                                  encoder=stream.encoder)
 
         # --- Direct camera (GStreamer pipeline) ---
         elif topic in self.camera_streams:
@@ -723,61 +979,43 @@ class USVWebNode(Node):
                 config["fps"] = fps
             config["quality"] = quality
             self.camera_streams[topic].restart(config)
-            self.camera_streams[topic].on_data = lambda data: self._send_video_binary(data)
             info = self.cameras_available.get(topic, {})
             self._send_video_meta(
                 topic,
                 fps if fps > 0 else info.get("fps", 30),
                 info.get("width", 0),
                 info.get("height", 0),
-                encoder=get_gst_encoder() or "gstreamer",
+                encoder=self.gst_encoder_label,
                 passthrough=info.get("passthrough", False),
             )
 
-    def _dummy_gps_loop(self):
+    def _dummy_gps_tick(self):
         """
         Broadcast a fake GPS position when no real NavSatFix topic is available.
         The boat drifts slowly in a figure-8 pattern around a fixed anchor point.
         Suppressed as soon as a real GPS subscription is active.
+        Runs at 1 Hz on the Tornado thread (PeriodicCallback) — plenty for a
+        dummy marker.
         """
-        # Anchor near the centre of the sample mission (Riga area)
-        anchor_lat = 56.9530
-        anchor_lng = 24.1020
-        # Drift radius in degrees (~40 m at this latitude)
-        radius_lat = 0.00035
-        radius_lng = 0.00055
-        period = 60.0   # seconds for one full loop
-
-        t0 = time.monotonic()
-        while True:
-            time.sleep(1.0)  # 1 Hz is plenty for a dummy marker
+        # Only emit when there is no real GPS subscription
+        if self._gps_sub is not None:
+            return
 
-            # Only emit when there is no real GPS subscription
-            if self._gps_sub is not None:
-                continue
+        t = time.monotonic() - self._dummy_gps_t0
+        step = int(t * _DUMMY_GPS_STEPS / _DUMMY_GPS_PERIOD) % _DUMMY_GPS_STEPS
+        lat, lng = _DUMMY_GPS_TRACK[step]
 
-            t = time.monotonic() - t0
-            phase = (t / period) * 2 * math.pi
-
-            # Lissajous figure-8: lat uses sin(2θ), lng uses sin(θ)
-            lat = anchor_lat + radius_lat * math.sin(2 * phase)
-            lng = anchor_lng + radius_lng * math.sin(phase)
-
-            # Dummy heading: slow continuous rotation (one full turn per period).
-            # On a real USV the dual-GPS receiver supplies heading directly in
-            # the NavSatFix (or a companion topic); no movement estimation needed.
-            heading_deg = (t / period * 360) % 360
-
-            if self.event_loop:
-                self.event_loop.add_callback(
-                    USVSocketHandler.broadcast,
-                    [USVSocketHandler.MSG_GPS_POS, {
-                        "lat": lat,
-                        "lng": lng,
-                        "heading": heading_deg,
-                        "topic": "dummy",
-                    }]
-                )
+        # Dummy heading: slow continuous rotation (one full turn per period).
+        # On a real USV the dual-GPS receiver supplies heading directly in
+        # the NavSatFix (or a companion topic); no movement estimation needed.
+        heading_deg = (t / _DUMMY_GPS_PERIOD * 360) % 360
+
+        USVSocketHandler.broadcast([USVSocketHandler.MSG_GPS_POS, {
+            "lat": lat,
+            "lng": lng,
+            "heading": heading_deg,
+            "topic": "dummy",
+        }])
 
     def _on_system_metrics(self, data):
         """Called by SystemMetricsCollector with CPU/GPU usage data."""
@@ -787,22 +1025,58 @@ class USVWebNode(Node):
                 [USVSocketHandler.MSG_RESOURCES, data]
             )
 
+    def on_raw_ros_msg(self, raw, topic_name, topic_type, msg_class):
+        """Serialized message received on a raw subscription (executor thread)."""
+        t_ns = time.monotonic_ns()
+        if t_ns < self.next_data_ns_by_topic.get(topic_name, 0):
+            return
+        self.next_data_ns_by_topic[topic_name] = (
+            t_ns + self.update_intervals_ns_by_topic.get(topic_name, 100000000))
+        # Wall-clock receive time, read once here rather than after conversion
+        wall_ms = int(time.time() * 1000)
+        self._raw_msg_queue.append((raw, topic_name, topic_type, msg_class, wall_ms))
+        self._raw_msg_ready.set()
+
+    def _raw_msg_loop(self):
+        """Deserialize + ros2dict queued raw messages and hand them to Tornado.
+
+        A single thread keeps each topic's messages in order.
+        """
+        queue = self._raw_msg_queue
+        while True:
+            self._raw_msg_ready.wait()
+            self._raw_msg_ready.clear()
+            while queue:
+                raw, topic_name, topic_type, msg_class, wall_ms = queue.popleft()
+                try:
+                    ros_msg_dict = ros2dict(deserialize_message(raw, msg_class))
+                except Exception as e:
+                    self.logwarn("Failed to convert message on %s: %s" % (topic_name, e))
+                    continue
+                ros_msg_dict["_topic_name"] = topic_name
+                ros_msg_dict["_topic_type"] = topic_type
+                ros_msg_dict["_time"] = wall_ms
+                if self.event_loop:
+                    self.event_loop.add_callback(
+                        USVSocketHandler.broadcast,
+                        [USVSocketHandler.MSG_MSG, ros_msg_dict]
+                    )
+
     def on_ros_msg(self, msg, topic_name, topic_type):
         """ROS2 message received on a subscribed topic. Forward to WebSocket clients."""
-        t = time.time()
-        interval = self.update_intervals_by_topic.get(topic_name, 0.1)
-        if t - self.last_data_times_by_topic.get(topic_name, 0) < interval - 1e-4:
+        t_ns = time.monotonic_ns()
+        if t_ns < self.next_data_ns_by_topic.get(topic_name, 0):
             return
 
         if not self.event_loop:
             return
+        self.next_data_ns_by_topic[topic_name] = (
+            t_ns + self.update_intervals_ns_by_topic.get(topic_name, 100000000))
 
         ros_msg_dict = ros2dict(msg)
         ros_msg_dict["_topic_name"] = topic_name
         ros_msg_dict["_topic_type"] = topic_type
-        ros_msg_dict["_time"] = time.time() * 1000
-
-        self.last_data_times_by_topic[topic_name] = t
+        ros_msg_dict["_time"] = int(time.time() * 1000)
 
         self.event_loop.add_callback(
             USVSocketHandler.broadcast,
@@ -6,12 +6,26 @@ Accepts raw pixel frames on stdin, reads H.264 encoded output from stdout,
 and delivers binary frames (with topic-name header) via a callback.
 """
 
+import collections
+import fcntl
+import os
+import selectors
 import subprocess
 import sys
 import threading
 import time
 
+try:
+    import cupy as _cp
+    import numpy as _np
+    _HAS_CUPY = True
+except ImportError:
+    _HAS_CUPY = False
+
 from .log import info as _log_info, warn as _log_warn, error as _log_error
+from .log import is_enabled_for, WARN
+from . import probe_cache
+from .pipe_io import IO_LOOP as _IO_LOOP
 
 def _log(msg):
     _log_info("H264Stream", msg)
@@ -22,6 +36,10 @@ def _log_w(msg):
 def _log_e(msg):
     _log_error("H264Stream", msg)
 
+# Start code + access unit delimiter NAL (type 9). The encoders are asked
+# to emit one before every frame (-aud / aud=1), marking frame boundaries.
+_AUD = b"\x00\x00\x01\x09"
+
 # Map ROS2 image encodings to FFmpeg pixel formats
 ROS_TO_FFMPEG_PIXFMT = {
     "bgr8": "bgr24",
@@ -34,6 +52,38 @@ ROS_TO_FFMPEG_PIXFMT = {
     "8UC4": "bgra",
 }
 
+# Bytes per pixel of each FFmpeg input pixel format
+PIXFMT_BPP = {"bgr24": 3, "rgb24": 3, "gray": 1, "bgra": 4, "rgba": 4, "nv12": 1.5}
+
+# fcntl.F_SETPIPE_SZ is only exposed from Python 3.10; value from linux/fcntl.h
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+
+def _pipe_max_size():
+    """Largest pipe buffer an unprivileged process may request (Linux)."""
+    try:
+        with open("/proc/sys/fs/pipe-max-size") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 1 << 20
+
+
+_PIPE_MAX_SIZE = _pipe_max_size()
+
+
+def _grow_pipe(fd, size):
+    """Raise a pipe's kernel buffer towards `size` bytes (default is 64 KB).
+
+    With the default buffer a 1080p bgr24 frame takes ~100 write() calls
+    and wakeups; sized to the frame it goes through in one or a few.
+    Returns the resulting capacity, or None where unsupported.
+    """
+    size = min(size, _PIPE_MAX_SIZE)
+    try:
+        return fcntl.fcntl(fd, _F_SETPIPE_SZ, size)
+    except OSError:
+        return None
+
 
 def _run_probe(cmd, test_frame, label, timeout=5):
     """Run a single FFmpeg probe command. Returns (success, stderr_text)."""
@@ -64,11 +114,15 @@ def _run_probe(cmd, test_frame, label, timeout=5):
         return False, str(e)
 
 
+# DRM render node used for VAAPI encoding
+VAAPI_DEVICE = os.environ.get("USV_VAAPI_DEVICE", "/dev/dri/renderD128")
+
+
 def _detect_best_encoder():
     """
     Probe available H.264 encoders at module load time.
     Tests each encoder with a real 1-frame encode at 256x256.
-    Returns 'nvenc', 'qsv', or 'sw'.
+    Returns 'nvenc', 'qsv', 'vaapi', 'nvmpi', 'v4l2m2m', or 'sw'.
     """
     test_w, test_h = 256, 256
     test_frame = b'\x80' * int(test_w * test_h * 1.5)
@@ -88,6 +142,33 @@ def _detect_best_encoder():
             "-c:v", "h264_qsv", "-preset", "veryfast",
             "-f", "null", "-loglevel", "error", "-"
         ]),
+        # AMD and Intel GPUs through the generic Linux VA-API
+        ("vaapi", [
+            "ffmpeg", "-vaapi_device", VAAPI_DEVICE,
+            "-f", "rawvideo", "-pix_fmt", "yuv420p",
+            "-s", "%dx%d" % (test_w, test_h), "-r", "1",
+            "-i", "pipe:0", "-frames:v", "1",
+            "-vf", "format=nv12,hwupload",
+            "-c:v", "h264_vaapi", "-qp", "23",
+            "-f", "null", "-loglevel", "error", "-"
+        ]),
+        # Jetson hardware encoder, exposed by the jetson-ffmpeg (nvmpi) build.
+        # Probed before V4L2 M2M: stock FFmpeg can't drive Jetson's encoder
+        ("nvmpi", [
+            "ffmpeg", "-f", "rawvideo", "-pix_fmt", "yuv420p",
+            "-s", "%dx%d" % (test_w, test_h), "-r", "1",
+            "-i", "pipe:0", "-frames:v", "1",
+            "-c:v", "h264_nvmpi",
+            "-f", "null", "-loglevel", "error", "-"
+        ]),
+        # V4L2 memory-to-memory encoders (Raspberry Pi, Rockchip and other SoCs)
+        ("v4l2m2m", [
+            "ffmpeg", "-f", "rawvideo", "-pix_fmt", "yuv420p",
+            "-s", "%dx%d" % (test_w, test_h), "-r", "1",
+            "-i", "pipe:0", "-frames:v", "1",
+            "-c:v", "h264_v4l2m2m",
+            "-f", "null", "-loglevel", "error", "-"
+        ]),
     ]
 
     for name, cmd in test_encoders:
@@ -132,24 +213,302 @@ def _detect_cuda_colorspace():
     return None
 
 
-# Detect best encoder once at import time
-_BEST_ENCODER = _detect_best_encoder()
+def _probe_encoders():
+    """Run the encoder probes; returns {"encoder", "cuda_colorspace"}."""
+    encoder = _detect_best_encoder()
+    # If NVENC available, detect best colorspace conversion strategy
+    cuda_colorspace = _detect_cuda_colorspace() if encoder == "nvenc" else None
+    return {"encoder": encoder, "cuda_colorspace": cuda_colorspace}
+
+
+# Probed lazily on first use rather than at import: the probes spawn FFmpeg
+# and can take seconds, which would otherwise hold up node startup. Results
+# are cached on disk by FFmpeg version and hardware (see probe_cache.py).
+_BEST_ENCODER = None
+_CUDA_COLORSPACE = None
+_probe_lock = threading.Lock()
+
+
+def _ensure_probed():
+    global _BEST_ENCODER, _CUDA_COLORSPACE
+    with _probe_lock:
+        if _BEST_ENCODER is None:
+            result = probe_cache.cached_probe(
+                "ffmpeg_encoder", ["ffmpeg", "-version"], _probe_encoders)
+            _CUDA_COLORSPACE = result.get("cuda_colorspace")
+            _BEST_ENCODER = result.get("encoder") or "sw"
+
+
+# BT.601 limited-range RGB -> NV12, one thread per 2x2 pixel block
+_NV12_KERNEL_SRC = r'''
+extern "C" __global__
+void rgb_to_nv12(const unsigned char* src, unsigned char* dst,
+                 int w, int h, int r_off, int b_off)
+{
+    int bx = blockIdx.x * blockDim.x + threadIdx.x;
+    int by = blockIdx.y * blockDim.y + threadIdx.y;
+    int x = bx * 2, y = by * 2;
+    if (x >= w || y >= h) return;
+
+    int sr = 0, sg = 0, sb = 0;
+    for (int dy = 0; dy < 2; dy++) {
+        for (int dx = 0; dx < 2; dx++) {
+            const unsigned char* p = src + ((y + dy) * w + x + dx) * 3;
+            int r = p[r_off], g = p[1], b = p[b_off];
+            dst[(y + dy) * w + x + dx] =
+                (unsigned char)(((66 * r + 129 * g + 25 * b + 128) >> 8) + 16);
+            sr += r; sg += g; sb += b;
+        }
+    }
+    sr >>= 2; sg >>= 2; sb >>= 2;
+    unsigned char* uv = dst + w * h + by * w + x;
+    uv[0] = (unsigned char)(((-38 * sr - 74 * sg + 112 * sb + 128) >> 8) + 128);
+    uv[1] = (unsigned char)(((112 * sr - 94 * sg - 18 * sb + 128) >> 8) + 128);
+}
+'''
+
+
+class _CudaNV12Converter:
+    """
+    Converts bgr24/rgb24 frames to NV12 on the GPU (CuPy) for NVENC when
+    FFmpeg itself cannot (no scale_cuda format=). Halves the bytes piped to
+    FFmpeg and takes swscale off the CPU.
+
+    Used only from the stream's writer thread.
+    """
+
+    _kernel = None  # compiled once per process
+
+    def __init__(self, width, height, pix_fmt):
+        if _CudaNV12Converter._kernel is None:
+            _CudaNV12Converter._kernel = _cp.RawKernel(_NV12_KERNEL_SRC, "rgb_to_nv12")
+        self.width = width
+        self.height = height
+        self._r_off, self._b_off = (0, 2) if pix_fmt == "rgb24" else (2, 0)
+        self._stream = _cp.cuda.Stream(non_blocking=True)
+        self._src = _cp.empty(width * height * 3, dtype=_cp.uint8)
+        self._dst = _cp.empty(width * height * 3 // 2, dtype=_cp.uint8)
+        # Pinned host buffer so the device -> host copy is a single DMA
+        out_size = width * height * 3 // 2
+        self._pinned = _cp.cuda.alloc_pinned_memory(out_size)
+        self._out = _np.frombuffer(self._pinned, dtype=_np.uint8, count=out_size)
+        self._grid = ((width // 2 + 15) // 16, (height // 2 + 15) // 16)
+
+    def convert(self, frame):
+        """Convert one frame; returns a view of the NV12 output buffer,
+        valid until the next call, or None if the frame has the wrong size
+        (e.g. padded rows; see H264Stream._drop_nv12)."""
+        src = _np.frombuffer(frame, dtype=_np.uint8)
+        if src.size != self._src.size:
+            return None
+        self._src.set(src, stream=self._stream)
+        self._kernel(self._grid, (16, 16),
+                     (self._src, self._dst, _np.int32(self.width), _np.int32(self.height),
+                      _np.int32(self._r_off), _np.int32(self._b_off)),
+                     stream=self._stream)
+        self._dst.get(out=self._out, stream=self._stream)
+        self._stream.synchronize()
+        return memoryview(self._out)
+
+
+def _make_nv12_converter(width, height, pix_fmt, encoder):
+    """Return a _CudaNV12Converter if GPU colorspace conversion is needed
+    and possible for this stream, else None."""
+    if (not _HAS_CUPY or encoder != "nvenc" or get_cuda_colorspace()
+            or pix_fmt not in ("bgr24", "rgb24") or width % 2 or height % 2):
+        return None
+    try:
+        return _CudaNV12Converter(width, height, pix_fmt)
+    except Exception as e:
+        _log_w("CuPy NV12 conversion unavailable, using CPU swscale: %s" % e)
+        return None
 
-# If NVENC available, detect best colorspace conversion strategy
-_CUDA_COLORSPACE = _detect_cuda_colorspace() if _BEST_ENCODER == "nvenc" else None
 
 # Software encoding is CPU-bound — cap FPS to avoid overloading.
 _SW_MAX_FPS = 10
 
+# libx264 defaults to 1.5x the logical cores, which starves ROS2 and the
+# camera pipelines on a shared SBC; a few slice threads keep latency steady
+_SW_MAX_THREADS = 4
+
+class _FrameSignal:
+    """
+    Wake-up flag for the stdin writer thread, waitable with select().
+
+    On Linux an eventfd: set() and clear() are one 8-byte write / read.
+    Elsewhere a non-blocking self-pipe.
+    """
+
+    def __init__(self):
+        if hasattr(os, "eventfd"):
+            self._fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+            self._write_fd = None
+        else:
+            self._fd, self._write_fd = os.pipe()
+            os.set_blocking(self._fd, False)
+            os.set_blocking(self._write_fd, False)
+
+    def fileno(self):
+        return self._fd
+
+    def set(self):
+        try:
+            if self._write_fd is None:
+                os.eventfd_write(self._fd, 1)
+            else:
+                os.write(self._write_fd, b"\0")
+        except OSError:
+            pass
+
+    def clear(self):
+        try:
+            if self._write_fd is None:
+                os.eventfd_read(self._fd)  # resets the counter to 0
+            else:
+                os.read(self._fd, 4096)
+        except OSError:
+            pass
+
+
+class _StdinWriter:
+    """
+    One thread writing raw frames to the stdin pipes of every FFmpeg
+    stream, instead of a writer thread per stream.
+
+    feed_frame() stores the frame in the stream's one-slot deque and calls
+    notify() (lock-free, never blocks the ROS callback). The thread writes
+    whatever each pipe accepts without blocking; a stream whose pipe fills
+    mid-frame is resumed when its stdin fd becomes writable.
+    The thread is started on the first add().
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        # Held while servicing streams, so remove() guarantees the thread
+        # is done with a stream's fd before the caller closes it
+        self._lock = threading.Lock()
+        self._streams = set()
+        self._ready = collections.deque()  # streams notified since the last pass
+        self._signal = _FrameSignal()
+        self._selector.register(self._signal.fileno(), selectors.EVENT_READ, None)
+        self._thread = None
+
+    def add(self, stream):
+        with self._lock:
+            self._streams.add(stream)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def remove(self, stream):
+        with self._lock:
+            self._streams.discard(stream)
+            self._unwatch(stream)
+
+    def notify(self, stream):
+        self._ready.append(stream)
+        self._signal.set()
+
+    def _watch(self, stream):
+        try:
+            self._selector.register(stream._stdin_fd, selectors.EVENT_WRITE, stream)
+        except KeyError:
+            pass  # already waiting for POLLOUT
+
+    def _unwatch(self, stream):
+        try:
+            self._selector.unregister(stream._stdin_fd)
+        except (KeyError, ValueError):
+            pass
+
+    def _run(self):
+        while True:
+            events = self._selector.select(1.0)
+            self._signal.clear()
+            pending = set()
+            while self._ready:
+                pending.add(self._ready.popleft())
+            for key, _ in events:
+                if key.data is not None:
+                    pending.add(key.data)
+            if not pending:
+                continue
+            with self._lock:
+                for stream in pending:
+                    if stream not in self._streams:
+                        continue
+                    try:
+                        blocked = stream._write_pending()
+                    except Exception as e:
+                        blocked = False
+                        self._streams.discard(stream)
+                        if not stream._stopped:
+                            _log_e("FFmpeg stdin broken for %s: %s" % (stream.topic_name, e))
+                    if blocked:
+                        self._watch(stream)
+                    else:
+                        self._unwatch(stream)
+
+
+_STDIN_WRITER = _StdinWriter()
+
+
+# Threads FFmpeg may use for the filter graph (pixel format conversion,
+# hwupload, scale_cuda), so filtering frame N+1 overlaps encoding frame N
+_FILTER_THREADS = 2
+
+# Optional CPU pinning: when USV_FFMPEG_CPUS_PER_STREAM is set, each FFmpeg
+# process is pinned to its own block of that many CPUs (round-robin), so
+# several image topics don't all contend for the same cores. Off by default.
+_CPUS_PER_STREAM = int(os.environ.get("USV_FFMPEG_CPUS_PER_STREAM", "0") or 0)
+_cpu_slot = 0
+_cpu_slot_lock = threading.Lock()
+
+
+def _pin_process(pid):
+    """Pin `pid` to the next block of _CPUS_PER_STREAM allowed CPUs."""
+    global _cpu_slot
+    if _CPUS_PER_STREAM <= 0 or not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) <= _CPUS_PER_STREAM:
+        return None
+    with _cpu_slot_lock:
+        slot = _cpu_slot
+        _cpu_slot += 1
+    start = (slot * _CPUS_PER_STREAM) % len(cpus)
+    block = {cpus[(start + i) % len(cpus)] for i in range(_CPUS_PER_STREAM)}
+    try:
+        os.sched_setaffinity(pid, block)
+    except OSError as e:
+        _log_w("Could not pin FFmpeg (pid %d): %s" % (pid, e))
+        return None
+    return block
+
+
+# SoC V4L2 encoders (e.g. Raspberry Pi 4) top out around 1080p30
+_V4L2M2M_MAX_FPS = 30
+
 
 def get_encoder():
-    """Return the detected encoder name."""
+    """Return the detected encoder name (probes on the first call)."""
+    if _BEST_ENCODER is None:
+        _ensure_probed()
     return _BEST_ENCODER
 
-def get_max_fps():
-    """Return the max FPS for the current encoder."""
-    if _BEST_ENCODER == "sw":
+def get_cuda_colorspace():
+    """Return the CUDA colorspace -vf filter, or None for CPU swscale."""
+    if _BEST_ENCODER is None:
+        _ensure_probed()
+    return _CUDA_COLORSPACE
+
+def get_max_fps(encoder=None):
+    """Return the max FPS for `encoder` (default: the detected encoder)."""
+    encoder = encoder or get_encoder()
+    if encoder == "sw":
         return _SW_MAX_FPS
+    if encoder == "v4l2m2m":
+        return _V4L2M2M_MAX_FPS
     return 60  # hardware encoders can handle this easily
 
 
@@ -162,29 +521,54 @@ class H264Stream:
         [1 byte: topic name length N] [N bytes: topic name UTF-8] [H.264 data]
     """
 
-    # Quality → CRF / QP value mapping for software / hardware encoders
-    QUALITY_CRF = {"low": 35, "medium": 26, "high": 18}
-    QUALITY_QP  = {"low": 32, "medium": 23, "high": 15}
+    # Quality → bits per pixel per frame. All encoders run at a constant
+    # bitrate: constant-QP output spikes on scene changes, which a
+    # bandwidth-bounded link (LTE, mesh radio) turns into stalls
+    QUALITY_BPP = {"low": 0.05, "medium": 0.1, "high": 0.2}
+
+    READ_SIZE = 65536  # max H.264 bytes per stdout read
+    # Output is sent per access unit: buffered until the next access unit
+    # delimiter, or until AU_DEADLINE seconds after its first byte (FFmpeg
+    # writes an encoded frame in a burst, then goes quiet until the next)
+    AU_DEADLINE = 0.004
+    MAX_AU_SIZE = 1024 * 1024  # flush regardless beyond this
 
-    def __init__(self, topic_name, width, height, fps, encoding, quality="medium"):
+    def __init__(self, topic_name, width, height, fps, encoding, quality="medium",
+                 threads=None, bitrate=None):
         self.topic_name = topic_name
         self.width = width
         self.height = height
         self.fps = fps
         self.encoding = encoding
+        # (width, height, encoding) as one tuple, for a single per-frame
+        # "did the image format change" comparison
+        self.params = (width, height, encoding)
         self.quality = quality
+        # Target bitrate in bit/s (None = derived from quality and pixel rate)
+        self.bitrate = bitrate
+        # Encoder for this stream: the detected one, unless it had to fall
+        # back (see _on_stdout_ready)
+        self.encoder = get_encoder()
+        # libx264 thread count (None = min(4, CPU count))
+        self.threads = threads or min(_SW_MAX_THREADS, os.cpu_count() or _SW_MAX_THREADS)
         self.on_data = None  # callback(binary_frame) — set by usv_node
 
         self._process = None
-        self._reader_thread = None
-        self._stderr_thread = None
-        self._writer_thread = None
+        self._cmd = None  # (settings key, FFmpeg argv) of the last start
+        self._stdin_fd = None  # raw FFmpeg stdin fd, written by _STDIN_WRITER
         self._stopped = False
         self._frame_count = 0
         self._frames_written = 0
-        self._pending_frame = None  # latest frame waiting to be written
-        self._frame_lock = threading.Lock()
-        self._frame_event = threading.Event()
+        # Latest frame waiting to be written. A one-slot deque: append()
+        # replaces the previous frame and popleft() takes it, each atomic,
+        # so the ROS callback never waits on the writer thread.
+        self._pending_frame = collections.deque(maxlen=1)
+        self._write_view = None  # rest of a partially written frame
+        self._nv12 = None  # _CudaNV12Converter when converting on the GPU
+        # Cleared when frames don't fit the converter; swscale until the
+        # image params change
+        self._use_cupy = True
+        self._input_frame_size = 0  # bytes per frame written to FFmpeg
 
         # Pre-build the topic name header (reused for every frame)
         topic_bytes = self.topic_name.encode('utf-8')
@@ -196,9 +580,11 @@ class H264Stream:
 
     def _build_ffmpeg_cmd(self, pix_fmt):
         """Build FFmpeg command using the pre-detected best encoder."""
-        encoder = _BEST_ENCODER
-        qp  = self.QUALITY_QP.get(self.quality, 23)
-        crf = self.QUALITY_CRF.get(self.quality, 26)
+        encoder = self.encoder
+        cuda_colorspace = get_cuda_colorspace()
+        bitrate = str(self.target_bitrate)
+        # Rate-control buffer (where the encoder honours one): 2x bitrate
+        bufsize = str(2 * self.target_bitrate)
 
         cmd = [
             "ffmpeg",
@@ -207,46 +593,100 @@ class H264Stream:
             "-s", "%dx%d" % (self.width, self.height),
             "-r", str(self.fps),
             "-i", "pipe:0",
+            "-filter_threads", str(_FILTER_THREADS),
+            "-filter_complex_threads", str(_FILTER_THREADS),
         ]
 
         if encoder == "nvenc":
-            if _CUDA_COLORSPACE:
+            if cuda_colorspace:
                 # GPU colorspace conversion: upload raw frame to CUDA, convert
                 # to NV12 on GPU, then encode — avoids CPU-heavy swscale.
                 # At 1080p60 this saves ~600 MB/s of CPU memory bandwidth.
                 # Requires FFmpeg 5.x+ (scale_cuda format= option).
-                cmd += ["-vf", _CUDA_COLORSPACE]
+                cmd += ["-vf", cuda_colorspace]
+            elif pix_fmt == "nv12":
+                # Already converted on the GPU by _CudaNV12Converter
+                pass
             else:
                 # Old FFmpeg — fall back to CPU swscale for colorspace conversion.
                 # Encoding still happens on GPU, just the bgr24→yuv420p is on CPU.
                 cmd += ["-pix_fmt", "yuv420p"]
             cmd += [
                 "-c:v", "h264_nvenc",
+                "-aud", "1",
                 "-preset", "p1",          # fastest NVENC preset
                 "-tune", "ull",            # ultra low latency
                 "-profile:v", "baseline",
                 "-level", "auto",
-                "-rc", "constqp",
-                "-qp", str(qp),
-                "-g", str(self.fps),
+                "-rc", "cbr",
+                "-b:v", bitrate,
+                "-maxrate", bitrate,
+                "-bufsize", bufsize,
+                # -tune ull implies these, but some driver/FFmpeg versions
+                # otherwise bring back lookahead and a few frames of delay
+                "-zerolatency", "1",
+                "-delay", "0",
+                "-rc-lookahead", "0",
+                "-no-scenecut", "1",
+                "-bf", "0",
+                "-b_ref_mode", "0",
+                "-forced-idr", "1",
+                "-g", str(2 * self.fps),
             ]
         elif encoder == "qsv":
             cmd += [
                 "-pix_fmt", "yuv420p",
                 "-c:v", "h264_qsv",
+                "-aud", "1",
                 "-preset", "veryfast",
                 "-profile:v", "baseline",
                 "-g", str(self.fps),
-                "-global_quality", str(qp),
+                "-b:v", bitrate,
+                "-maxrate", bitrate,
+            ]
+        elif encoder == "vaapi":
+            # -vaapi_device is a global option, so it goes before the input
+            cmd[1:1] = ["-vaapi_device", VAAPI_DEVICE]
+            cmd += [
+                "-vf", "format=nv12,hwupload",
+                "-c:v", "h264_vaapi",
+                "-aud", "1",
+                "-profile:v", "constrained_baseline",
+                "-rc_mode", "CBR",
+                "-b:v", bitrate,
+                "-maxrate", bitrate,
+                "-bf", "0",
+                "-g", str(self.fps),
+            ]
+        elif encoder == "nvmpi":
+            cmd += [
+                "-pix_fmt", "yuv420p",
+                "-c:v", "h264_nvmpi",
+                "-profile:v", "baseline",
+                "-rc", "cbr",
+                "-b:v", bitrate,
+                "-g", str(self.fps),
+            ]
+        elif encoder == "v4l2m2m":
+            cmd += [
+                "-pix_fmt", "yuv420p",
+                "-c:v", "h264_v4l2m2m",
+                "-b:v", bitrate,
+                "-g", str(self.fps),
             ]
         else:  # software fallback
             cmd += [
                 "-pix_fmt", "yuv420p",
+                "-threads", str(self.threads),
+                "-thread_type", "slice",
                 "-c:v", "libx264",
                 "-preset", "ultrafast",
                 "-tune", "zerolatency",
+                "-x264-params", "aud=1:nal-hrd=cbr",
                 "-profile:v", "baseline",
-                "-crf", str(crf),
+                "-b:v", bitrate,
+                "-maxrate", bitrate,
+                "-bufsize", bufsize,
                 "-g", str(self.fps),
                 "-keyint_min", str(self.fps),
             ]
@@ -267,86 +707,197 @@ class H264Stream:
                    % (self.encoding, self.topic_name, list(ROS_TO_FFMPEG_PIXFMT.keys())))
             return
 
-        cmd = self._build_ffmpeg_cmd(pix_fmt)
-        _log("Starting FFmpeg (%s): %s" % (_BEST_ENCODER, " ".join(cmd)))
+        self._nv12 = None
+        if self._use_cupy:
+            self._nv12 = _make_nv12_converter(self.width, self.height, pix_fmt, self.encoder)
+        if self._nv12 is not None:
+            pix_fmt = "nv12"
+        self._input_frame_size = int(self.width * self.height * PIXFMT_BPP.get(pix_fmt, 3))
+
+        # The command only depends on these; crash restarts with unchanged
+        # settings reuse the previous one
+        cmd_key = (self.encoder, pix_fmt, self.width, self.height, self.fps,
+                   self.target_bitrate, self.threads)
+        if self._cmd is None or self._cmd[0] != cmd_key:
+            self._cmd = (cmd_key, self._build_ffmpeg_cmd(pix_fmt))
+        cmd = self._cmd[1]
+        _log("Starting FFmpeg (%s): %s" % (self.encoder, " ".join(cmd)))
 
         try:
+            # Nobody reads stderr when warnings are suppressed; let the
+            # kernel discard it. bufsize=0: the pipes are only used through
+            # their raw fds, so no BufferedReader/Writer is put in front
             self._process = subprocess.Popen(
                 cmd,
+                bufsize=0,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.PIPE if is_enabled_for(WARN) else subprocess.DEVNULL,
             )
         except FileNotFoundError:
             _log_e("FFmpeg not found. Install with: apt install ffmpeg")
             self._process = None
             return
 
+        # Pinned after spawning rather than via preexec_fn, which is unsafe
+        # in a threaded process
+        cpus = _pin_process(self._process.pid)
+        if cpus:
+            _log("Pinned FFmpeg for %s to CPUs %s" % (self.topic_name, sorted(cpus)))
+
         self._stopped = False
         self._frame_count = 0
         self._frames_written = 0
-        self._pending_frame = None
-        self._frame_event.clear()
+        self._pending_frame.clear()
+        self._write_view = None
 
-        _log("Started for %s (%dx%d @ %dfps, encoding=%s, encoder=%s)"
+        _log("Started for %s (%dx%d @ %dfps, encoding=%s, encoder=%s%s)"
              % (self.topic_name, self.width, self.height, self.fps,
-                self.encoding, _BEST_ENCODER))
+                self.encoding, self.encoder,
+                ", CuPy NV12" if self._nv12 is not None else ""))
 
-        self._reader_thread = threading.Thread(
-            target=self._read_loop, daemon=True
-        )
-        self._reader_thread.start()
+        # stdout and stderr are serviced by the shared pipe I/O thread,
+        # stdin by the shared writer thread
+        self._chunks_read = 0
+        self._total_bytes = 0
+        self._alloc_buffer()
+        self._stderr_buf = b""
+        process = self._process
+        stdout_fd = process.stdout.fileno()
+        os.set_blocking(stdout_fd, False)
+        _IO_LOOP.register(stdout_fd, lambda fd: self._on_stdout_ready(process, fd))
+        if process.stderr is not None:
+            stderr_fd = process.stderr.fileno()
+            os.set_blocking(stderr_fd, False)
+            _IO_LOOP.register(stderr_fd, lambda fd: self._on_stderr_ready(process, fd))
 
-        self._writer_thread = threading.Thread(
-            target=self._write_loop, daemon=True
-        )
-        self._writer_thread.start()
+        self._stdin_fd = process.stdin.fileno()
+        os.set_blocking(self._stdin_fd, False)
+        pipe_size = _grow_pipe(self._stdin_fd, self._input_frame_size)
+        if pipe_size:
+            _log("stdin pipe buffer for %s: %d KB" % (self.topic_name, pipe_size >> 10))
+        _STDIN_WRITER.add(self)
 
-        self._stderr_thread = threading.Thread(
-            target=self._stderr_loop, daemon=True
-        )
-        self._stderr_thread.start()
+    def _alloc_buffer(self):
+        """
+        Allocate the persistent stdout buffer. It always starts with the
+        topic header and stdout is read straight into it after the buffered
+        data, so an outbound frame is a single copy of the buffer prefix
+        (no BufferedReader, no header + chunk concatenation).
+        """
+        header_len = len(self._topic_header)
+        self._buf = bytearray(header_len + self.MAX_AU_SIZE + self.READ_SIZE)
+        self._buf[:header_len] = self._topic_header
+        self._view = memoryview(self._buf)
+        self._fill = header_len
+        self._au_deadline = 0.0
+        self._flush_scheduled = False
 
-    def _stderr_loop(self):
-        """Read and print FFmpeg stderr output for debugging."""
+    def _on_stdout_ready(self, process, fd):
+        """Read H.264 output from FFmpeg stdout (pipe I/O thread)."""
+        if process is not self._process:
+            _IO_LOOP.unregister(fd)
+            return
+        view = self._view
+        fill = self._fill
         try:
-            while self._process and self._process.stderr:
-                line = self._process.stderr.readline()
-                if not line:
-                    break
-                _log_w("FFmpeg stderr: %s" % line.decode('utf-8', errors='replace').rstrip())
-        except Exception:
-            pass
+            n = os.readv(fd, [view[fill:fill + self.READ_SIZE]])
+        except BlockingIOError:
+            return
+        header_len = len(self._topic_header)
+        if not n:
+            _IO_LOOP.unregister(fd)
+            if fill > header_len:
+                self._emit(view, fill)
+                self._fill = header_len
+            if not self._stopped and self._chunks_read == 0 and self.encoder == "nvenc":
+                # NVENC failed before producing anything — most likely the
+                # driver's concurrent session limit (3-5 on consumer GPUs)
+                # with several image topics open. The restart after the
+                # crash uses libx264 instead.
+                _log_w("NVENC exited without output for %s; falling back to software encoding"
+                       % self.topic_name)
+                self.encoder = "sw"
 
-    def _read_loop(self):
-        """Read H.264 encoded chunks from FFmpeg stdout and deliver via callback."""
-        chunks_sent = 0
-        total_bytes = 0
-        try:
-            stdout = self._process.stdout
-            while not self._stopped and self._process and stdout:
-                chunk = stdout.read1(65536)
-                if not chunk:
-                    _log("FFmpeg stdout EOF for %s (sent %d chunks, %d bytes total)"
-                         % (self.topic_name, chunks_sent, total_bytes))
-                    break
-                chunks_sent += 1
-                total_bytes += len(chunk)
-                if chunks_sent == 1:
-                    _log("First H.264 chunk received for %s (%d bytes)" % (self.topic_name, len(chunk)))
-                if self.on_data:
-                    binary_frame = self._topic_header + chunk
-                    self.on_data(binary_frame)
-        except Exception as e:
-            if not self._stopped:
-                _log_e("Reader error for %s: %s" % (self.topic_name, e))
-        finally:
+            _log("FFmpeg stdout EOF for %s (sent %d chunks, %d bytes total)"
+                 % (self.topic_name, self._chunks_read, self._total_bytes))
             if not self._stopped:
                 _log("FFmpeg process exited for %s" % self.topic_name)
+            return
+
+        self._chunks_read += 1
+        self._total_bytes += n
+        if self._chunks_read == 1:
+            _log("First H.264 chunk received for %s (%d bytes)" % (self.topic_name, n))
+        if fill == header_len:
+            self._au_deadline = time.monotonic() + self.AU_DEADLINE
+
+        # Everything before the last AUD is complete access units. Search
+        # from just before the new data, in case the start code straddles
+        # two reads.
+        buf = self._buf
+        start = max(header_len + 1, fill - 3)
+        fill += n
+        aud = buf.rfind(_AUD, start, fill)
+        if aud > header_len and buf[aud - 1] == 0:
+            aud -= 1  # 4-byte start code
+        if aud > header_len:
+            self._emit(view, aud)
+            remainder = fill - aud
+            view[header_len:header_len + remainder] = view[aud:fill]
+            fill = header_len + remainder
+            self._au_deadline = time.monotonic() + self.AU_DEADLINE
+        elif fill - header_len >= self.MAX_AU_SIZE:
+            self._emit(view, fill)
+            fill = header_len
+        self._fill = fill
+
+        if fill > header_len and not self._flush_scheduled:
+            self._flush_scheduled = True
+            _IO_LOOP.call_later(self.AU_DEADLINE, lambda: self._flush_partial(process))
+
+    def _flush_partial(self, process):
+        """Send a partial access unit once its deadline passes (pipe I/O thread)."""
+        if process is not self._process:
+            return  # scheduled before a restart; the buffer is the new process's
+        header_len = len(self._topic_header)
+        if self._fill <= header_len:
+            self._flush_scheduled = False
+            return
+        remaining = self._au_deadline - time.monotonic()
+        if remaining > 0:
+            # The unit pending now started after this timer was set
+            _IO_LOOP.call_later(remaining, lambda: self._flush_partial(process))
+            return
+        self._flush_scheduled = False
+        self._emit(self._view, self._fill)
+        self._fill = header_len
+
+    def _on_stderr_ready(self, process, fd):
+        """Log complete FFmpeg stderr lines (pipe I/O thread)."""
+        try:
+            data = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        if not data:
+            _IO_LOOP.unregister(fd)
+            data = b"\n"
+        lines = (self._stderr_buf + data).split(b"\n")
+        self._stderr_buf = lines.pop()
+        for line in lines:
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if text:
+                _log_w("FFmpeg stderr: %s" % text)
+
+    def _emit(self, view, end):
+        """Send view[:end] (topic header + H.264 data) as one binary frame."""
+        if self.on_data:
+            self.on_data(bytes(view[:end]))
 
     def feed_frame(self, raw_bytes):
         """
-        Queue a raw pixel frame for the writer thread.
+        Queue a raw pixel frame (bytes or any buffer, e.g. a memoryview of
+        the ROS message data) for the writer thread.
         Called from the ROS2 image callback — returns immediately (non-blocking).
         Only keeps the latest frame; older unwritten frames are discarded.
 
@@ -359,50 +910,67 @@ class H264Stream:
         self._frame_count += 1
 
         # Store latest frame and signal writer thread
-        with self._frame_lock:
-            self._pending_frame = raw_bytes
-        self._frame_event.set()
+        self._pending_frame.append(raw_bytes)
+        _STDIN_WRITER.notify(self)
 
         if self._frame_count == 1:
             _log("First frame queued for %s (%d bytes)"
                  % (self.topic_name, len(raw_bytes)))
 
-    def _write_loop(self):
-        """Writer thread: takes the latest pending frame and writes to FFmpeg stdin."""
-        try:
-            while not self._stopped and self._process:
-                self._frame_event.wait(timeout=1.0)
-                if self._stopped:
-                    break
-                self._frame_event.clear()
-
-                with self._frame_lock:
-                    frame = self._pending_frame
-                    self._pending_frame = None
-
-                if frame is None:
-                    continue
+    def _write_pending(self):
+        """Write the pending frame to the non-blocking stdin fd (writer thread).
 
+        The view of the ROS buffer goes to the pipe without an intermediate
+        copy. Returns True if the pipe filled mid-frame; the rest is written
+        when the fd is writable again, before any newer frame.
+        """
+        while True:
+            view = self._write_view
+            if view is None:
                 try:
-                    self._process.stdin.write(frame)
-                    self._process.stdin.flush()
-                    self._frames_written += 1
-                    if self._frames_written % 100 == 0:
-                        _log("Written %d frames to FFmpeg for %s (received %d)"
-                             % (self._frames_written, self.topic_name, self._frame_count))
-                except (BrokenPipeError, OSError) as e:
-                    if not self._stopped:
-                        _log_e("FFmpeg stdin broken for %s: %s" % (self.topic_name, e))
-                        self._cleanup_process()
-                    break
-        except Exception as e:
-            if not self._stopped:
-                _log_e("Writer error for %s: %s" % (self.topic_name, e))
+                    frame = self._pending_frame.popleft()
+                except IndexError:
+                    return False
+                if self._nv12 is not None:
+                    frame = self._nv12.convert(frame)
+                    if frame is None:
+                        self._drop_nv12()
+                        return False
+                view = memoryview(frame).cast('B')
+            try:
+                n = os.write(self._stdin_fd, view)
+            except BlockingIOError:
+                n = 0
+            view = view[n:]
+            if view:
+                self._write_view = view
+                return True
+            self._write_view = None
+            self._frames_written += 1
+            if self._frames_written % 100 == 0:
+                _log("Written %d frames to FFmpeg for %s (received %d)"
+                     % (self._frames_written, self.topic_name, self._frame_count))
+
+    def _drop_nv12(self):
+        """Frames don't match the CuPy converter's size (e.g. padded rows):
+        stop FFmpeg, which was started for NV12 input. The node's crash
+        restart brings it back converting on the CPU (writer thread)."""
+        _log_w("Frame size for %s doesn't match %dx%d %s (padded rows?); "
+               "restarting FFmpeg with CPU swscale instead of CuPy NV12"
+               % (self.topic_name, self.width, self.height, self.encoding))
+        self._nv12 = None
+        self._use_cupy = False
+        # Not a crash: no NVENC fallback, no broken-pipe error for the
+        # frames still in flight
+        self._stopped = True
+        try:
+            self._process.terminate()
+        except Exception:
+            pass
 
     def stop(self):
         """Stop the FFmpeg subprocess and all threads."""
         self._stopped = True
-        self._frame_event.set()
         self._cleanup_process()
         _log("Stopped for %s" % self.topic_name)
 
@@ -410,6 +978,16 @@ class H264Stream:
         """Terminate and clean up the FFmpeg process."""
         if self._process is None:
             return
+        _STDIN_WRITER.remove(self)
+        self._write_view = None
+        # Unregister on the I/O thread first: it may be inside
+        # _on_stdout_ready for these fds right now
+        pipes = [p for p in (self._process.stdout, self._process.stderr) if p is not None]
+        _IO_LOOP.unregister_sync(*[p.fileno() for p in pipes])
+        # Drop the old process's partial access unit; a flush timer still
+        # queued for it checks the process and does nothing
+        self._fill = len(self._topic_header)
+        self._flush_scheduled = False
         try:
             if self._process.stdin:
                 self._process.stdin.close()
@@ -423,6 +1001,8 @@ class H264Stream:
             self._process.wait(timeout=1)
         except Exception:
             pass
+        for pipe in pipes:
+            pipe.close()
         self._process = None
 
     def restart(self, width, height, fps, encoding, quality=None):
@@ -431,14 +1011,30 @@ class H264Stream:
              % (self.topic_name, self.width, self.height, self.encoding,
                 width, height, encoding))
         self.stop()
+        if (width, height, encoding) != self.params:
+            self._use_cupy = True
         self.width = width
         self.height = height
         self.fps = fps
         self.encoding = encoding
+        self.params = (width, height, encoding)
         if quality is not None:
             self.quality = quality
         self._start_ffmpeg()
 
+    @property
+    def target_bitrate(self):
+        """Encoder bitrate in bit/s: `bitrate` if set, else from quality."""
+        if self.bitrate:
+            return self.bitrate
+        bpp = self.QUALITY_BPP.get(self.quality, 0.1)
+        return int(self.width * self.height * self.fps * bpp)
+
+    @property
+    def max_fps(self):
+        """Max FPS for this stream's encoder."""
+        return get_max_fps(self.encoder)
+
     @property
     def alive(self):
         """Check if the FFmpeg process is still running."""
@@ -6,7 +6,8 @@ Two modes:
   1. Pattern mode (default): generates simple moving bars.
   2. Video file mode (--file): decodes a video file with FFmpeg and publishes
      the raw frames. This is the best way to test the H.264 pipeline at real
-     framerates with real video content.
+     framerates with real video content. Decodes in-process with PyAV when
+     it is installed (pip install av), unless FFmpeg can decode on the GPU.
 
 Usage:
     python3 test_camera.py                          # pattern at 15fps
@@ -14,23 +15,48 @@ Usage:
     python3 test_camera.py --file video.mp4         # video file at native fps
     python3 test_camera.py --file video.mp4 --fps 30  # video file forced to 30fps
     python3 test_camera.py --file video.mp4 --loop  # loop the video forever
+    python3 test_camera.py --realtime               # SCHED_FIFO publish thread on its own core
+    python3 test_camera.py --encoding mono8         # grayscale: 1/3 of the bytes per frame
+    python3 test_camera.py --file video.mp4 --pacer python  # FFmpeg decodes ahead, we pace
 """
 
 import argparse
-import json
+import ctypes
+import fcntl
 import os
 import platform
+import struct
 import subprocess
 import sys
 import threading
 import time
+from array import array
 
 import numpy as np
 
+try:
+    import numba
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+try:
+    import av
+    _HAS_AV = True
+except ImportError:
+    _HAS_AV = False
+
 import rclpy
 from rclpy.node import Node
+from rclpy.qos import QoSProfile, QoSReliabilityPolicy, QoSDurabilityPolicy, HistoryPolicy
 from sensor_msgs.msg import Image
 
+try:
+    from rclpy.serialization import serialize_message
+    _HAS_SERIALIZATION = True
+except ImportError:
+    _HAS_SERIALIZATION = False
+
 
 def _wsl_path(path):
     """Convert Windows paths to WSL mount paths if running under WSL2.
@@ -60,37 +86,172 @@ def _wsl_path(path):
     return path
 
 
+# fcntl.F_SETPIPE_SZ is only exposed from Python 3.10; value from linux/fcntl.h
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
+
+def _grow_pipe(fd, size):
+    """Raise a pipe's kernel buffer towards `size` bytes (default is 64 KB),
+    capped at /proc/sys/fs/pipe-max-size. Returns the new capacity, or None."""
+    try:
+        with open("/proc/sys/fs/pipe-max-size") as f:
+            size = min(size, int(f.read()))
+    except (OSError, ValueError):
+        size = min(size, 1 << 20)
+    try:
+        return fcntl.fcntl(fd, _F_SETPIPE_SZ, size)
+    except OSError:
+        return None
+
+
+def _has_cuda_hwaccel():
+    """True if this FFmpeg build lists the CUDA hwaccel (`ffmpeg -hwaccels`).
+
+    Says nothing about whether a GPU is present; a CUDA decode that fails
+    to start falls back to CPU decoding (see _video_file_loop).
+    """
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", "-hwaccels"],
+                                capture_output=True, text=True, timeout=5)
+    except Exception:
+        return False
+    return "cuda" in result.stdout.split()
+
+
 def _probe_video(path):
     """Use ffprobe to get video width, height, fps."""
+    # Only the three fields needed, as one "width,height,rate" CSV line
     cmd = [
-        "ffprobe", "-v", "quiet",
-        "-print_format", "json",
-        "-show_streams",
+        "ffprobe", "-v", "error",
         "-select_streams", "v:0",
+        "-show_entries", "stream=width,height,r_frame_rate",
+        "-of", "csv=p=0",
         path,
     ]
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
         if result.returncode != 0:
             return None
-        info = json.loads(result.stdout)
-        stream = info["streams"][0]
-        w = int(stream["width"])
-        h = int(stream["height"])
-        # Parse fps from r_frame_rate (e.g. "30/1", "30000/1001")
-        num, den = stream.get("r_frame_rate", "30/1").split("/")
+        w, h, rate = result.stdout.strip().split(",")[:3]
+        # r_frame_rate is a fraction (e.g. "30/1", "30000/1001")
+        num, den = rate.split("/")
         fps = int(num) / int(den)
-        return w, h, fps
+        return int(w), int(h), fps
     except Exception as e:
         print("ffprobe failed: %s" % e, file=sys.stderr)
         return None
 
 
+# Absolute-deadline sleep for frame pacing. clock_nanosleep with
+# TIMER_ABSTIME parks the thread in the kernel until the deadline, so there
+# is no spinning and no drift from turning the deadline into a relative
+# timeout. Linux only (CLOCK_MONOTONIC is what time.monotonic_ns() reads);
+# elsewhere falls back to time.sleep().
+_CLOCK_MONOTONIC = 1
+_TIMER_ABSTIME = 1
+_EINTR = 4
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+_clock_nanosleep = None
+if sys.platform.startswith('linux'):
+    try:
+        _clock_nanosleep = ctypes.CDLL("libc.so.6").clock_nanosleep
+        _clock_nanosleep.argtypes = [ctypes.c_int, ctypes.c_int,
+                                     ctypes.POINTER(_Timespec),
+                                     ctypes.POINTER(_Timespec)]
+        _clock_nanosleep.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        _clock_nanosleep = None
+
+
+def _sleep_until(deadline_ns):
+    """Sleep until time.monotonic_ns() reaches deadline_ns."""
+    if _clock_nanosleep is not None:
+        ts = _Timespec(deadline_ns // 1000000000, deadline_ns % 1000000000)
+        while _clock_nanosleep(_CLOCK_MONOTONIC, _TIMER_ABSTIME,
+                               ctypes.byref(ts), None) == _EINTR:
+            pass
+        return
+    remaining = deadline_ns - time.monotonic_ns()
+    if remaining > 0:
+        time.sleep(remaining / 1e9)
+
+
+if _HAS_NUMBA:
+    @numba.njit(parallel=True, cache=True)
+    def _build_pattern(n, h, w, channels):
+        """All n pattern frames as an (n, h, w, channels) array, one frame
+        per parallel iteration."""
+        out = np.empty((n, h, w, channels), np.uint8)
+        for i in numba.prange(n):
+            out[i] = 30
+            bar_x = (i * 4) % w
+            out[i, :, bar_x:min(bar_x + 4, w)] = 255
+            bar_y = (i * 2) % h
+            out[i, bar_y:min(bar_y + 4, h)] = 200
+        return out
+
+
+def _frame_array(data):
+    """Copy a frame (any buffer) into an array('B').
+
+    The generated msg.data setter stores an array('B') as is; anything
+    else (bytes, bytearray) is checked element by element in debug mode
+    and copied into a new array on every assignment.
+    """
+    arr = array('B')
+    arr.frombytes(data)
+    return arr
+
+
+# A serialized Image is a 4-byte CDR encapsulation header followed by the
+# message, which starts with header.stamp (int32 sec, uint32 nanosec)
+_CDR_LE = b'\x00\x01'
+_STAMP = struct.Struct('<iI')
+_STAMP_END = 4 + _STAMP.size
+
+
+# Published encoding -> (FFmpeg decode pixel format, bytes per pixel)
+ENCODINGS = {
+    'bgr8': ('bgr24', 3),
+    'mono8': ('gray', 1),
+}
+
+
 class TestCamera(Node):
+    # Only the newest frame is worth delivering: a history of one sample
+    # keeps the middleware from holding (and copying) up to 10 full frames
+    # per publisher. Also the QoS that shared-memory transports (CycloneDDS
+    # + iceoryx, Fast DDS data sharing) accept. Still reliable, so default
+    # subscribers (rviz, ros2 topic echo) match.
+    PUB_QOS = QoSProfile(
+        depth=1,
+        history=HistoryPolicy.KEEP_LAST,
+        reliability=QoSReliabilityPolicy.RELIABLE,
+        durability=QoSDurabilityPolicy.VOLATILE,
+    )
+
     def __init__(self, topic, width=640, height=480, fps=15,
-                 video_file=None, loop=False):
+                 video_file=None, loop=False, realtime=False, wall_time=False,
+                 encoding='bgr8', pacer='ffmpeg', source=None):
         super().__init__('test_camera')
-        self.pub = self.create_publisher(Image, topic, 10)
+        self.pub = self.create_publisher(Image, topic, self.PUB_QOS)
+        # --realtime: the publish thread gets the last allowed CPU to itself
+        # and everything else (this thread, which runs the executor, and
+        # FFmpeg) the rest
+        self._realtime = realtime
+        self._rt_cpu = None
+        self._other_cpus = None
+        if realtime:
+            cpus = sorted(os.sched_getaffinity(0))
+            if len(cpus) > 1:
+                self._rt_cpu = cpus[-1]
+                self._other_cpus = set(cpus[:-1])
+                os.sched_setaffinity(0, self._other_cpus)
         self.width = width
         self.height = height
         self.fps = fps
@@ -98,91 +259,216 @@ class TestCamera(Node):
         self._stopped = False
         self._video_file = video_file
         self._loop = loop
+        # Video file mode: who paces frames. 'ffmpeg' (-re) emits them in
+        # real time and we publish on arrival; 'python' lets FFmpeg decode
+        # ahead and publishes on our own frame clock
+        self._pace_python = pacer == 'python'
+        # Probed (width, height, fps) of the video file, if known: FFmpeg
+        # is only asked to scale / change the rate when the target differs
+        self._source = source
+        self._pix_fmt, self._channels = ENCODINGS[encoding]
 
         # Pre-build the Image message template
         self._msg = Image()
         self._msg.header.frame_id = 'test_camera'
         self._msg.height = height
         self._msg.width = width
-        self._msg.encoding = 'bgr8'
+        self._msg.encoding = encoding
         self._msg.is_bigendian = 0
-        self._msg.step = width * 3
+        self._msg.step = width * self._channels
+        # Stamped in place each frame (see _stamp_frame)
+        self._stamp = self._msg.header.stamp
+        self._wall_time = wall_time
+        self._clock = self.get_clock()
 
         # FPS measurement
-        self._fps_time = time.monotonic()
-        self._fps_count = 0
-
-        self._frame_size = width * height * 3  # bgr8
+        self._fps_time_ns = time.monotonic_ns()
+        self._fps_frame = 0  # frame_num at _fps_time_ns
+
+        self._frame_size = width * height * self._channels
+        # Video file mode: a reader thread decodes into these three reused
+        # buffers ahead of the publisher. At any time one is being filled,
+        # one holds the newest complete frame (_ready_buf) and one may be
+        # being published (_publishing_buf).
+        # array('B') so they go into msg.data without a copy (see _frame_array)
+        self._frame_bufs = [_frame_array(bytes(self._frame_size)) for _ in range(3)]
+        self._frame_lock = threading.Lock()
+        self._frame_ready = threading.Event()
+        self._frame_taken = threading.Event()  # publisher took _ready_buf
+        self._ready_buf = None
+        self._publishing_buf = None
+        self._reader_end = None  # bytes of the final (short) read, at EOF
 
         if video_file:
             self.get_logger().info(
-                'Publishing %dx%d BGR frames from %s to %s at %d fps%s'
-                % (width, height, video_file, topic, fps,
+                'Publishing %dx%d %s frames from %s to %s at %d fps%s'
+                % (width, height, encoding, video_file, topic, fps,
                    ' (looping)' if loop else '')
             )
-            self._pub_thread = threading.Thread(
-                target=self._video_file_loop, daemon=True)
+            publish_loop = self._video_file_loop
         else:
             # Pre-generate pattern frames
             self._num_prebuilt = min(fps, 60)
             self._prebuilt_frames = []
             self._prebuild_frames()
             self.get_logger().info(
-                'Publishing %dx%d BGR pattern to %s at %d fps (%d pre-built)'
-                % (width, height, topic, fps, self._num_prebuilt)
+                'Publishing %dx%d %s pattern to %s at %d fps (%d pre-built)'
+                % (width, height, encoding, topic, fps, self._num_prebuilt)
             )
-            self._pub_thread = threading.Thread(
-                target=self._pattern_loop, daemon=True)
-
+            publish_loop = self._pattern_loop
+
+        # Own thread rather than a task on the executor: rclpy's executor has
+        # no asyncio loop to share, and the executor thread sits in rcl_wait
+        # with the GIL released, so the publisher rarely contends with it.
+        # Pacing stays on clock_nanosleep, which a coroutine can't use
+        self._pub_thread = threading.Thread(
+            target=self._run_publisher, args=(publish_loop,), daemon=True)
         self._pub_thread.start()
 
+    def _run_publisher(self, publish_loop):
+        """Publish thread entry point: apply --realtime, then run the loop."""
+        if self._realtime:
+            self._make_realtime()
+        publish_loop()
+
+    def _make_realtime(self):
+        """Pin the calling thread to its own CPU and run it SCHED_FIFO.
+
+        SCHED_RESET_ON_FORK keeps FFmpeg, spawned from this thread, at
+        normal priority. SCHED_FIFO needs root or CAP_SYS_NICE; without
+        it only the pinning applies.
+        """
+        if self._rt_cpu is not None:
+            os.sched_setaffinity(0, {self._rt_cpu})
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO | os.SCHED_RESET_ON_FORK,
+                                  os.sched_param(50))
+            self.get_logger().info(
+                'Publish thread: SCHED_FIFO priority 50, CPU %s' % self._rt_cpu)
+        except PermissionError:
+            self.get_logger().warn(
+                'SCHED_FIFO needs CAP_SYS_NICE; publish thread only pinned to CPU %s'
+                % self._rt_cpu)
+
     # --- Pattern mode ---
 
     def _prebuild_frames(self):
-        """Pre-generate frames as bytes so publish loop does zero numpy work."""
-        w, h = self.width, self.height
-        frame = np.zeros((h, w, 3), dtype=np.uint8)
-        for i in range(self._num_prebuilt):
-            frame[:] = 30
-            bar_x = (i * 4) % w
-            frame[:, bar_x:min(bar_x + 4, w), :] = 255
-            bar_y = (i * 2) % h
-            frame[bar_y:min(bar_y + 4, h), :, :] = 200
-            self._prebuilt_frames.append(frame.tobytes())
+        """Pre-generate frames as msg.data-ready arrays so publish loop does
+        zero numpy work (see _frame_array)."""
+        w, h, n = self.width, self.height, self._num_prebuilt
+        if _HAS_NUMBA:
+            frames = _build_pattern(n, h, w, self._channels)
+        else:
+            # The pattern is gray, so mono8 frames are just the one channel
+            shape = (n, h, w) if self._channels == 1 else (n, h, w, self._channels)
+            frames = np.full(shape, 30, dtype=np.uint8)
+            # All frames' bars in one indexed fill each: row i gets the 4
+            # columns / rows starting at its bar offset (clipped to the edge).
+            # The offsets of every frame are computed up front, so there is
+            # no per-frame Python loop left to unroll or specialize
+            idx = np.arange(n)[:, None]
+            bar = np.arange(4)
+            cols = np.minimum((idx * 4) % w + bar, w - 1)
+            rows = np.minimum((idx * 2) % h + bar, h - 1)
+            frames[idx, :, cols] = 255
+            frames[idx, rows] = 200
+        self._prebuilt_frames = [_frame_array(frame) for frame in frames]
+        self._serialize_frames()
+
+    def _serialize_frames(self):
+        """Serialize each pre-built frame once, for publishing as bytes.
+
+        Only the stamp differs between publishes of a frame, so the loop
+        splices a fresh stamp between the stored encapsulation header and
+        the rest of the message instead of having rclpy convert and
+        serialize the whole Image every time. Leaves _frame_tails None
+        (publish the message) without rclpy.serialization or when the
+        middleware doesn't produce little-endian CDR.
+        """
+        self._frame_tails = None
+        if not _HAS_SERIALIZATION:
+            return
+        tails = []
+        for data in self._prebuilt_frames:
+            self._msg.data = data
+            blob = serialize_message(self._msg)
+            if blob[:2] != _CDR_LE:
+                return
+            tails.append(blob[_STAMP_END:])
+        self._cdr_head = blob[:4]
+        self._frame_tails = tails
+        self._prebuilt_frames = None  # the tails hold the pixels now
 
     def _pattern_loop(self):
         """Publish pre-built pattern frames with precise timing."""
-        interval = 1.0 / self.fps
-        next_time = time.monotonic()
-        while not self._stopped and rclpy.ok():
-            next_time += interval
-            idx = self.frame_num % self._num_prebuilt
-            self._msg.header.stamp = self.get_clock().now().to_msg()
-            self._msg.data = self._prebuilt_frames[idx]
-            self.pub.publish(self._msg)
-            self._count_frame()
-            # Precise sleep
-            now = time.monotonic()
-            sleep_time = next_time - now
-            if sleep_time > 0.002:
-                time.sleep(sleep_time - 0.001)
-            while time.monotonic() < next_time:
-                pass
-            if time.monotonic() - next_time > interval:
-                next_time = time.monotonic()
+        # Hot loop: attributes and methods hoisted into locals
+        msg = self._msg
+        publish = self.pub.publish
+        stamp_frame = self._stamp_frame
+        stamp_ns = self._stamp_ns
+        report_fps = self._report_fps
+        frames = self._prebuilt_frames
+        tails = self._frame_tails
+        if tails is not None:
+            head = self._cdr_head
+            pack_stamp = _STAMP.pack
+            join = b''.join
+        num_frames = self._num_prebuilt
+        monotonic_ns = time.monotonic_ns
+        ok = rclpy.ok
+        interval_ns = 1000000000 // self.fps
+        next_time_ns = monotonic_ns()
+        idx = 0
+        while not self._stopped and ok():
+            next_time_ns += interval_ns
+            if tails is None:
+                stamp_frame()
+                msg.data = frames[idx]
+                publish(msg)
+            else:
+                ns = stamp_ns()
+                publish(join((head, pack_stamp(ns // 1000000000, ns % 1000000000),
+                              tails[idx])))
+            self.frame_num += 1
+            if self.frame_num & 127 == 1:
+                report_fps()
+            idx += 1
+            if idx == num_frames:
+                idx = 0
+            _sleep_until(next_time_ns)
+            # Fell more than a frame behind: resync instead of bursting
+            now_ns = monotonic_ns()
+            if now_ns - next_time_ns > interval_ns:
+                next_time_ns = now_ns
 
     # --- Video file mode ---
 
     def _spawn_ffmpeg(self):
-        """Spawn FFmpeg to decode video file into raw BGR frames on stdout."""
-        cmd = [
-            "ffmpeg",
-            "-re",  # read at native framerate (real-time pacing)
-            "-i", self._video_file,
+        """Spawn FFmpeg to decode video file into raw frames on stdout."""
+        # Scaling / rate conversion to the source's own size / rate is a
+        # no-op that still costs a full-frame filter pass; leave them out
+        source = self._source
+        scale = source is None or source[:2] != (self.width, self.height)
+        rate = source is None or abs(source[2] - self.fps) >= 0.1
+        if self._cuda_decode:
+            # Decode and scale on the GPU; only the target-size frame comes
+            # back for the (cheap) pixel format conversion
+            cmd = ["ffmpeg", "-hwaccel", "cuda", "-hwaccel_output_format", "cuda"]
+            vf = "hwdownload,format=nv12"
+            if scale:
+                vf = "scale_cuda=%d:%d,%s" % (self.width, self.height, vf)
+            out = ["-vf", vf]
+        else:
+            cmd = ["ffmpeg"]
+            out = ["-s", "%dx%d" % (self.width, self.height)] if scale else []
+        if rate:
+            out += ["-r", str(self.fps)]
+        if not self._pace_python:
+            cmd.append("-re")  # read at native framerate (real-time pacing)
+        cmd += ["-i", self._video_file] + out + [
+            "-an", "-sn", "-dn",  # video only: don't decode other streams
             "-f", "rawvideo",
-            "-pix_fmt", "bgr24",
-            "-s", "%dx%d" % (self.width, self.height),
-            "-r", str(self.fps),
+            "-pix_fmt", self._pix_fmt,
             "-v", "warning",
             "pipe:1",
         ]
@@ -190,47 +476,232 @@ class TestCamera(Node):
         # stderr=DEVNULL: FFmpeg writes progress/warnings to stderr.
         # If we capture it (PIPE) but don't read it, the pipe buffer fills
         # and FFmpeg blocks forever. DEVNULL avoids this.
-        return subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # bufsize=0: frames are readinto() our own buffer, so a
+        # BufferedReader would only add a copy
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        if self._other_cpus:
+            # Inherited the publish thread's CPU; keep the decoder off it
+            os.sched_setaffinity(proc.pid, self._other_cpus)
+        # A pipe sized to the frame lets FFmpeg write a whole frame (and us
+        # read it) in a few syscalls instead of ~100 64 KB round trips
+        pipe_size = _grow_pipe(proc.stdout.fileno(), self._frame_size)
+        if pipe_size:
+            self.get_logger().info("FFmpeg stdout pipe buffer: %d KB" % (pipe_size >> 10))
+        return proc
+
+    def _read_frame(self, stream, buf):
+        """Read one frame from `stream` into `buf`.
+
+        Returns the number of bytes read, less than a frame only at EOF.
+
+        readinto() is the only copy out of the pipe. splice(2) into a
+        shared-memory buffer would not save it: rclpy publishes from its
+        own copy of msg.data and has no loaned-message API to fill in place.
+        """
+        mv = memoryview(buf)
+        got = 0
+        while got < self._frame_size:
+            n = stream.readinto(mv[got:])
+            if not n:
+                break
+            got += n
+        return got
+
+    def _reader_loop(self, proc):
+        """Reader thread (video file mode): decode the next frame while the
+        current one is published. An unpublished frame is replaced by a
+        newer one rather than queued."""
+        if self._realtime:
+            # Started from the publish thread, so it inherited the dedicated
+            # CPU and SCHED_FIFO; move it to the other CPUs with FFmpeg
+            if self._other_cpus:
+                os.sched_setaffinity(0, self._other_cpus)
+            try:
+                os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+            except OSError:
+                pass
+        while not self._stopped:
+            if self._pace_python:
+                # No -re: FFmpeg would run ahead as fast as it decodes.
+                # Hold each frame until the publisher has taken the last
+                while self._ready_buf is not None and not self._stopped:
+                    self._frame_taken.wait(timeout=0.5)
+                    self._frame_taken.clear()
+            with self._frame_lock:
+                buf = next(b for b in self._frame_bufs
+                           if b is not self._ready_buf and b is not self._publishing_buf)
+            n = self._read_frame(proc.stdout, buf)
+            with self._frame_lock:
+                if n < self._frame_size:
+                    self._reader_end = n
+                else:
+                    self._ready_buf = buf
+            self._frame_ready.set()
+            if n < self._frame_size:
+                return
 
     def _video_file_loop(self):
-        """Read decoded frames from FFmpeg and publish them.
+        """Publish frames decoded by FFmpeg as the reader thread delivers them.
 
-        Uses the same pattern as _pattern_loop: reuse self._msg and assign
-        bytes directly to msg.data (same approach that works in pattern mode).
+        Like _pattern_loop, self._msg is reused.
         """
+        self._cuda_decode = _has_cuda_hwaccel()
+        if _HAS_AV and not self._cuda_decode and self._av_loop():
+            return
         while not self._stopped and rclpy.ok():
             proc = self._spawn_ffmpeg()
             self.get_logger().info(
                 "FFmpeg started, reading %d-byte frames..." % self._frame_size)
+            frames_read = 0
+            self._ready_buf = None
+            self._reader_end = None
+            self._frame_ready.clear()
+            reader = threading.Thread(target=self._reader_loop, args=(proc,), daemon=True)
+            reader.start()
+            msg = self._msg
+            publish = self.pub.publish
+            frame_ready = self._frame_ready
+            frame_lock = self._frame_lock
+            interval_ns = 1000000000 // self.fps
+            next_time_ns = time.monotonic_ns()
             try:
                 while not self._stopped and rclpy.ok():
-                    raw = proc.stdout.read(self._frame_size)
-                    if not raw:
-                        self.get_logger().warn("FFmpeg EOF (0 bytes)")
-                        break
-                    if len(raw) < self._frame_size:
-                        self.get_logger().warn(
-                            "FFmpeg short read: %d / %d bytes"
-                            % (len(raw), self._frame_size))
+                    if not frame_ready.wait(timeout=1.0):
+                        continue
+                    with frame_lock:
+                        frame_ready.clear()
+                        buf = self._publishing_buf = self._ready_buf
+                        self._ready_buf = None
+                        end = self._reader_end
+                    self._frame_taken.set()
+                    if buf is not None:
+                        frames_read += 1
+
+                        # Same approach as pattern mode: reuse self._msg
+                        self._stamp_frame()
+                        msg.data = buf
+                        publish(msg)
+                        self._publishing_buf = None
+                        self.frame_num += 1
+                        if self.frame_num & 127 == 1:
+                            self._report_fps()
+                    # The reader may have stored the last frame and hit EOF
+                    # before we took the lock: both arrive with one wakeup
+                    if end is not None:
+                        if end:
+                            self.get_logger().warn(
+                                "FFmpeg short read: %d / %d bytes"
+                                % (end, self._frame_size))
+                        else:
+                            self.get_logger().warn("FFmpeg EOF (0 bytes)")
                         break
-
-                    # Same approach as pattern mode: reuse self._msg, assign bytes
-                    self._msg.header.stamp = self.get_clock().now().to_msg()
-                    self._msg.data = raw
-                    self.pub.publish(self._msg)
-                    self._count_frame()
+                    if buf is None:
+                        continue
+                    if self._pace_python:
+                        next_time_ns += interval_ns
+                        _sleep_until(next_time_ns)
+                        now_ns = time.monotonic_ns()
+                        if now_ns - next_time_ns > interval_ns:
+                            next_time_ns = now_ns
             except Exception as e:
                 self.get_logger().error("Video file loop error: %s" % e)
                 import traceback
                 traceback.print_exc()
             finally:
+                self._publishing_buf = None
                 try:
                     proc.terminate()
                     proc.wait(timeout=2)
                 except Exception:
                     proc.kill()
                     proc.wait()
+                reader.join(timeout=2)
+
+            if self._cuda_decode and frames_read == 0 and not self._stopped:
+                # No GPU, or a codec / pixel format the CUDA path can't take
+                self.get_logger().warn(
+                    "CUDA decode produced no frames, retrying with CPU decoding")
+                self._cuda_decode = False
+                continue
+            if not self._loop or self._stopped:
+                self.get_logger().info(
+                    "Video file ended after %d frames" % self.frame_num)
+                break
+            self.get_logger().info(
+                "Looping video (published %d frames so far)" % self.frame_num)
+
+    def _av_loop(self):
+        """Video file mode with PyAV: decode in-process, no FFmpeg pipe.
+
+        Frames are published at their presentation times, or with
+        --pacer python on our own --fps frame clock; either way, when the
+        file's rate is above --fps, frames are dropped to match it. Frames
+        are only scaled when the file's size differs from the target.
+
+        Returns False if PyAV failed before publishing anything (e.g. a
+        container it can't open), so the caller decodes with FFmpeg instead.
+        A decode error later ends the current pass like end of file.
+        """
+        interval = 1.0 / self.fps
+        interval_ns = 1000000000 // self.fps
+        buf = self._frame_bufs[0]
+        out = np.frombuffer(buf, dtype=np.uint8)
+        while not self._stopped and rclpy.ok():
+            self.get_logger().info("PyAV decode: %s" % self._video_file)
+            pass_start = self.frame_num
+            container = None
+            try:
+                container = av.open(self._video_file)
+                stream = container.streams.video[0]
+                stream.thread_type = "AUTO"
+                start_ns = next_time_ns = time.monotonic_ns()
+                first_time = None
+                next_time = 0.0
+                size = None  # to_ndarray() scaling arguments
+                for frame in container.decode(stream):
+                    if self._stopped or not rclpy.ok():
+                        break
+                    t = frame.time
+                    if t is None:
+                        t = next_time
+                    if first_time is None:
+                        first_time = t
+                    t -= first_time
+                    if t < next_time - 1e-3:
+                        continue  # above --fps
+                    next_time = max(next_time + interval, t)
+                    if size is None:
+                        size = ({} if (frame.width, frame.height) == (self.width, self.height)
+                                else {'width': self.width, 'height': self.height})
+                    out[:] = frame.to_ndarray(format=self._pix_fmt, **size).reshape(-1)
+                    if self._pace_python:
+                        _sleep_until(next_time_ns)
+                        next_time_ns += interval_ns
+                        now_ns = time.monotonic_ns()
+                        if now_ns - next_time_ns > interval_ns:
+                            next_time_ns = now_ns
+                    else:
+                        _sleep_until(start_ns + int(t * 1e9))
+                    self._stamp_frame()
+                    self._msg.data = buf
+                    self.pub.publish(self._msg)
+                    self.frame_num += 1
+                    if self.frame_num & 127 == 1:
+                        self._report_fps()
+            except Exception as e:
+                self.get_logger().error("PyAV decode error: %s" % e)
+                if self.frame_num == 0:
+                    self.get_logger().warn("Falling back to FFmpeg decoding")
+                    return False
+                if self.frame_num == pass_start:
+                    # Nothing decodes any more; don't retry in a tight loop
+                    self.get_logger().info(
+                        "Video file ended after %d frames" % self.frame_num)
+                    return True
+            finally:
+                if container is not None:
+                    container.close()
 
             if not self._loop or self._stopped:
                 self.get_logger().info(
@@ -238,25 +709,45 @@ class TestCamera(Node):
                 break
             self.get_logger().info(
                 "Looping video (published %d frames so far)" % self.frame_num)
+        return True
 
     # --- Common ---
 
-    def _count_frame(self):
-        self.frame_num += 1
-        self._fps_count += 1
-        now = time.monotonic()
-        elapsed = now - self._fps_time
-        if elapsed >= 5.0:
-            actual_fps = self._fps_count / elapsed
+    def _stamp_ns(self):
+        """Stamp time in ns: the ROS clock (follows use_sim_time), or the
+        wall clock with --wall-time, which skips building a Time object."""
+        if self._wall_time:
+            return time.time_ns()
+        return self._clock.now().nanoseconds
+
+    def _stamp_frame(self):
+        """Set header.stamp to now (see _stamp_ns). Writes sec/nanosec of
+        the existing stamp instead of building Time objects."""
+        ns = self._stamp_ns()
+        self._stamp.sec = ns // 1000000000
+        self._stamp.nanosec = ns % 1000000000
+
+    def _report_fps(self):
+        """Log the first frame and, at least 5 s apart, the actual rate.
+
+        The publish loops count frames inline and only call this on frame 1,
+        129, 257, ... (frame_num & 127 == 1), so the clock is read once per
+        128 frames rather than per frame.
+        """
+        if self.frame_num == 1:
+            self.get_logger().info(
+                'First frame published (%d bytes)' % self._frame_size)
+            return
+        now_ns = time.monotonic_ns()
+        elapsed_ns = now_ns - self._fps_time_ns
+        if elapsed_ns >= 5000000000:
+            actual_fps = (self.frame_num - self._fps_frame) * 1e9 / elapsed_ns
             self.get_logger().info(
                 'Published %d frames (actual: %.1f fps, target: %d fps)'
                 % (self.frame_num, actual_fps, self.fps)
             )
-            self._fps_time = now
-            self._fps_count = 0
-        elif self.frame_num == 1:
-            self.get_logger().info(
-                'First frame published (%d bytes)' % self._frame_size)
+            self._fps_time_ns = now_ns
+            self._fps_frame = self.frame_num
 
     def destroy_node(self):
         self._stopped = True
@@ -271,6 +762,18 @@ def main():
                         help='Video file to decode and publish (mp4, avi, etc.)')
     parser.add_argument('--loop', action='store_true',
                         help='Loop the video file forever')
+    parser.add_argument('--wall-time', action='store_true',
+                        help='Stamp frames with wall time instead of the ROS clock '
+                             '(slightly cheaper; ignores use_sim_time)')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Run the publish thread SCHED_FIFO on a dedicated CPU '
+                             '(Linux; priority needs CAP_SYS_NICE)')
+    parser.add_argument('--encoding', choices=sorted(ENCODINGS), default='bgr8',
+                        help='Image encoding; mono8 sends a third of the bytes')
+    parser.add_argument('--pacer', choices=('ffmpeg', 'python'), default='ffmpeg',
+                        help='Video file mode frame pacing: FFmpeg -re (default; '
+                             'frame timestamps when decoding with PyAV), or frames '
+                             'are decoded ahead and published on a Python frame clock')
     parser.add_argument('--width', type=int, default=None,
                         help='Frame width (auto-detected from file)')
     parser.add_argument('--height', type=int, default=None,
@@ -283,8 +786,9 @@ def main():
     if args.file:
         args.file = _wsl_path(args.file)
 
-    # Auto-detect from video file
-    if args.file:
+    # Auto-detect from video file, unless everything was given explicitly
+    probe = None
+    if args.file and None in (args.width, args.height, args.fps):
         probe = _probe_video(args.file)
         if probe:
             file_w, file_h, file_fps = probe
@@ -312,7 +816,9 @@ def main():
     rclpy.init()
     node = TestCamera(
         args.topic, args.width, args.height, args.fps,
-        video_file=args.file, loop=args.loop,
+        video_file=args.file, loop=args.loop, realtime=args.realtime,
+        wall_time=args.wall_time, encoding=args.encoding, pacer=args.pacer,
+        source=probe,
     )
     try:
         rclpy.spin(node)